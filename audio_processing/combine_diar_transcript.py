@@ -1,4 +1,5 @@
 import json
+from bisect import bisect_left, bisect_right
 from pathlib import Path
 import re
 import os
@@ -50,23 +51,30 @@ def parse_word_timestamps(word_transcription):
     raise TypeError(f"Unsupported word_transcription type: {type(word_transcription)}")
 
 
-def combine_transcript_with_diarization(diarized_segments, word_transcription, output_path):
+def combine_transcript_with_diarization(diarized_segments, word_transcription, output_path=None):
     """
     For each diarization segment, add a 'text' field containing all words whose start time is within the segment.
     """
     word_timestamps = parse_word_timestamps(word_transcription)
+
+    # Word indices sorted by start and by end time, so each segment finds its
+    # words by binary search instead of scanning every word (O((n + m) log n))
+    by_start = sorted(range(len(word_timestamps)), key=lambda i: word_timestamps[i]['start'])
+    by_end = sorted(range(len(word_timestamps)), key=lambda i: word_timestamps[i]['end'])
+    starts = [word_timestamps[i]['start'] for i in by_start]
+    ends = [word_timestamps[i]['end'] for i in by_end]
+
     for segment in diarized_segments:
         seg_start = float(segment['start'])
         seg_end = float(segment['end'])
-        words = [
-            w['word']
-            for w in word_timestamps
-            if (seg_start <= w['start'] <= seg_end) or (seg_start <= w['end'] <= seg_end)
-        ]
-        segment['text'] = ' '.join(words)
+        hits = set(by_start[bisect_left(starts, seg_start):bisect_right(starts, seg_end)])
+        hits.update(by_end[bisect_left(ends, seg_start):bisect_right(ends, seg_end)])
+        # Keep the words in transcription order
+        segment['text'] = ' '.join(word_timestamps[i]['word'] for i in sorted(hits))
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(diarized_segments, f, indent=2, ensure_ascii=False)
-    print(f"Combined diarization and transcription saved to {output_path}")
+    if output_path is not None:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(diarized_segments, f, indent=2, ensure_ascii=False)
+        print(f"Combined diarization and transcription saved to {output_path}")
 
     return diarized_segments
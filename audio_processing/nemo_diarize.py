@@ -4,6 +4,8 @@ import json
 import os
 from pathlib import Path
 
+from audio_processing.segments import merge_segments, parse_segments
+
 diar_model = SortformerEncLabelModel.from_pretrained("nvidia/diar_sortformer_4spk-v1")
 diar_model.eval()
 
@@ -13,31 +15,6 @@ def diarizer(audio_input):
     return predicted_segments[0]
 
 
-def parse_segments(predicted_segments):
-    """Parse RTTM segments from model output into a list of dicts."""
-    segments = []
-    for segment in predicted_segments:
-        parts = segment.strip().split()
-        start, end, speaker = parts
-        segments.append({'start': start, 'end': end, 'speaker': speaker})
-    return segments
-def merge_segments(segments, max_gap=3.0):
-    merged = []
-    prev = segments[0]
-
-    for current in segments[1:]:
-        same_speaker = current['speaker'] == prev['speaker']
-        gap = float(current['start']) - float(prev['end'])
-        if same_speaker and gap < max_gap:
-            # Extend the previous segment
-            prev['end'] = current['end']
-        else:
-            # Push previous and move to current
-            merged.append(prev)
-            prev = current
-    merged.append(prev)  # Don't forget the last one
-    return merged
-
 def save_as_json(segments, file_name):
     with open(file_name, "w") as f:
         json.dump(segments, f, indent=4)
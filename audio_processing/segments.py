@@ -0,0 +1,57 @@
+# segments.py
+"""Pure-Python helpers for diarization output (no NeMo import, so stub diarizers can use them)."""
+
+from collections import defaultdict
+
+
+def parse_segments(predicted_segments):
+    """Parse RTTM segments from model output into a list of dicts."""
+    segments = []
+    for segment in predicted_segments:
+        parts = segment.strip().split()
+        start, end, speaker = parts
+        segments.append({'start': start, 'end': end, 'speaker': speaker})
+    return segments
+
+
+def merge_segments(segments, max_gap=3.0):
+    merged = []
+    prev = segments[0]
+
+    for current in segments[1:]:
+        same_speaker = current['speaker'] == prev['speaker']
+        gap = float(current['start']) - float(prev['end'])
+        if same_speaker and gap < max_gap:
+            # Extend the previous segment
+            prev['end'] = current['end']
+        else:
+            # Push previous and move to current
+            merged.append(prev)
+            prev = current
+    merged.append(prev)  # Don't forget the last one
+    return merged
+
+
+def speaker_stats(transcript):
+    """Segments, speaking time and word count per speaker."""
+    stats = defaultdict(lambda: {"segments": 0, "duration": 0, "words": 0})
+    
+    for item in transcript:
+        speaker = item["speaker"]
+        duration = item["end"] - item["start"]
+        words = len(item["text"].split())
+        
+        stats[speaker]["segments"] += 1
+        stats[speaker]["duration"] += duration
+        stats[speaker]["words"] += words
+        
+    result = []
+    for speaker, data in stats.items():
+        result.append({
+            "speaker": speaker,
+            "segments": data["segments"],
+            "duration": round(data["duration"], 2),
+            "words": data["words"]
+        })
+        
+    return result
@@ -0,0 +1,92 @@
+"""
+Evidence-to-timestamp alignment for evaluation results.
+
+The LLM returns free-text `evidence` quotes. `EvidenceAligner` builds a
+character trigram index over the transcript segments once per job and
+resolves each quote to the segment (or pair of adjacent segments) it most
+likely came from, so the UI can seek straight to it.
+"""
+
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set
+
+_NORMALIZE_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse punctuation/whitespace so ASR and LLM text compare cleanly."""
+    return _NORMALIZE_RE.sub(" ", text.lower()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of normalized text, padded so short words still index."""
+    padded = f" {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EvidenceAligner:
+    """Character trigram index over the segments of one transcript."""
+
+    def __init__(self, segments: List[dict], min_score: float = 0.6, candidates: int = 5):
+        self.segments = segments
+        self.min_score = min_score
+        self.candidates = candidates
+
+        self.grams: List[Set[str]] = [trigrams(s.get("text", "")) for s in segments]
+        self.index: Dict[str, List[int]] = defaultdict(list)
+        for idx, grams in enumerate(self.grams):
+            for gram in grams:
+                self.index[gram].append(idx)
+
+    def locate(self, quote: str) -> Optional[dict]:
+        """
+        Find where an evidence quote occurs in the transcript.
+
+        Args:
+            quote: Evidence text returned by the evaluator
+
+        Returns:
+            Dict with `segment_index`, `start`, `end` and `score` (share of the
+            quote's trigrams found), or None when nothing matches well enough
+        """
+        query = trigrams(quote)
+        if len(query) < 3:
+            return None
+
+        votes = Counter()
+        for gram in query:
+            for idx in self.index.get(gram, ()):
+                votes[idx] += 1
+        if not votes:
+            return None
+
+        best = None
+        for idx, hits in votes.most_common(self.candidates):
+            score = hits / len(query)
+            span = (idx, idx)
+            # Quotes often straddle a turn boundary; try extending to the next segment
+            if score < 1.0 and idx + 1 < len(self.segments):
+                joined = len(query & (self.grams[idx] | self.grams[idx + 1])) / len(query)
+                if joined > score + 0.1:
+                    score, span = joined, (idx, idx + 1)
+            if best is None or score > best[0]:
+                best = (score, span)
+
+        score, (first, last) = best
+        if score < self.min_score:
+            return None
+        return {
+            "segment_index": first,
+            "start": self.segments[first]["start"],
+            "end": self.segments[last]["end"],
+            "score": round(score, 3),
+        }
+
+    def annotate(self, evaluation: dict) -> dict:
+        """Attach `evidence_segment`, `evidence_start`, `evidence_end` to an evaluation in place."""
+        match = self.locate(evaluation.get("evidence") or "")
+        evaluation["evidence_segment"] = match["segment_index"] if match else None
+        evaluation["evidence_start"] = match["start"] if match else None
+        evaluation["evidence_end"] = match["end"] if match else None
+        return evaluation
@@ -0,0 +1,143 @@
+"""
+Conversation analytics computed directly from transcript segments.
+
+Everything here is vectorised with NumPy over the segment arrays, so it runs
+in milliseconds even for thousands of turns and needs no LLM call. Metrics
+include talk-time ratio, overlaps/interruptions, silence and dead air,
+longest monologue, response latency between speakers and words per minute.
+"""
+
+from typing import List
+
+import numpy as np
+
+
+def _round(value, digits: int = 2):
+    return round(float(value), digits)
+
+
+def _latency_summary(latencies: np.ndarray) -> dict:
+    if latencies.size == 0:
+        return {"count": 0, "mean": None, "median": None, "p90": None}
+    return {
+        "count": int(latencies.size),
+        "mean": _round(latencies.mean()),
+        "median": _round(np.median(latencies)),
+        "p90": _round(np.percentile(latencies, 90)),
+    }
+
+
+def compute_conversation_analytics(transcript: List[dict],
+                                   interruption_min_overlap: float = 0.5,
+                                   dead_air_threshold: float = 5.0) -> dict:
+    """
+    Compute call-level and per-speaker conversation metrics.
+
+    Args:
+        transcript: Segments with `speaker`, `start`, `end` and `text`
+        interruption_min_overlap: Seconds a new speaker must overlap the
+            current one for the turn to count as an interruption
+        dead_air_threshold: Minimum silence (seconds) reported as dead air
+
+    Returns:
+        Dictionary with `call` and `speakers` sections
+    """
+    if not transcript:
+        return {"call": {}, "speakers": []}
+
+    starts = np.fromiter((s["start"] for s in transcript), dtype=np.float64, count=len(transcript))
+    ends = np.fromiter((s["end"] for s in transcript), dtype=np.float64, count=len(transcript))
+    words = np.fromiter((len(s["text"].split()) for s in transcript), dtype=np.int64, count=len(transcript))
+    names, codes = np.unique([s["speaker"] for s in transcript], return_inverse=True)
+
+    order = np.argsort(starts, kind="stable")
+    starts, ends, words, codes = starts[order], ends[order], words[order], codes[order]
+    durations = np.clip(ends - starts, 0, None)
+    n = starts.size
+    n_speakers = names.size
+
+    # Talk time and words per speaker
+    talk = np.bincount(codes, weights=durations, minlength=n_speakers)
+    speaker_words = np.bincount(codes, weights=words, minlength=n_speakers)
+    segment_counts = np.bincount(codes, minlength=n_speakers)
+    total_talk = talk.sum()
+    call_duration = ends.max()
+
+    # Running end of speech so far, and which segment owns it
+    running_end = np.maximum.accumulate(ends)
+    owner = np.maximum.accumulate(np.where(ends >= running_end, np.arange(n), 0))
+
+    prev_end = running_end[:-1]
+    prev_owner_code = codes[owner[:-1]]
+    next_start = starts[1:]
+    next_code = codes[1:]
+
+    # Overlaps: a segment starting before everything earlier has finished
+    overlap = np.clip(np.minimum(ends[1:], prev_end) - next_start, 0, None)
+    cross_speaker = next_code != prev_owner_code
+    overlap_mask = (overlap > 0) & cross_speaker
+    interruption_mask = overlap_mask & (overlap >= interruption_min_overlap)
+    interruptions = np.bincount(next_code[interruption_mask], minlength=n_speakers)
+
+    # Silence: gaps where nobody is speaking (including before the first turn)
+    gaps = np.concatenate(([starts[0]], next_start - prev_end))
+    gap_starts = np.concatenate(([0.0], prev_end))
+    silence = np.clip(gaps, 0, None)
+    dead_air = np.flatnonzero(gaps >= dead_air_threshold)
+
+    # Monologues: maximal runs of consecutive turns by the same speaker
+    run_bounds = np.flatnonzero(np.diff(codes)) + 1
+    run_first = np.concatenate(([0], run_bounds))
+    run_last = np.concatenate((run_bounds - 1, [n - 1]))
+    run_ends = np.maximum.reduceat(ends, run_first)
+    run_durations = run_ends - starts[run_first]
+    longest = int(np.argmax(run_durations))
+
+    # Response latency: gap between a speaker change and the end of everything
+    # said before it. Turns starting inside earlier speech are overlaps (counted
+    # above), not responses, so they are left out.
+    change = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    latencies = starts[change] - running_end[change - 1]
+    responded = latencies >= 0
+    latencies, responder = latencies[responded], codes[change][responded]
+
+    speakers = []
+    for code, name in enumerate(names):
+        minutes = talk[code] / 60.0
+        speakers.append({
+            "speaker": str(name),
+            "segments": int(segment_counts[code]),
+            "talk_time": _round(talk[code]),
+            "talk_ratio": _round(talk[code] / total_talk, 3) if total_talk > 0 else 0.0,
+            "words": int(speaker_words[code]),
+            "words_per_minute": _round(speaker_words[code] / minutes, 1) if minutes > 0 else 0.0,
+            "interruptions": int(interruptions[code]),
+            "response_latency": _latency_summary(latencies[responder == code]),
+        })
+
+    total_minutes = total_talk / 60.0
+    return {
+        "call": {
+            "duration": _round(call_duration),
+            "talk_time": _round(total_talk),
+            "silence_time": _round(silence.sum()),
+            "silence_ratio": _round(silence.sum() / call_duration, 3) if call_duration > 0 else 0.0,
+            "overlap_time": _round(overlap[overlap_mask].sum()),
+            "overlap_count": int(overlap_mask.sum()),
+            "interruption_count": int(interruption_mask.sum()),
+            "dead_air": [
+                {"start": _round(gap_starts[i]), "end": _round(starts[i]), "duration": _round(gaps[i])}
+                for i in dead_air
+            ],
+            "longest_monologue": {
+                "speaker": str(names[codes[run_first[longest]]]),
+                "start": _round(starts[run_first[longest]]),
+                "end": _round(run_ends[longest]),
+                "duration": _round(run_durations[longest]),
+                "turns": int(run_last[longest] - run_first[longest] + 1),
+            },
+            "response_latency": _latency_summary(latencies),
+            "words_per_minute": _round(words.sum() / total_minutes, 1) if total_minutes > 0 else 0.0,
+        },
+        "speakers": speakers,
+    }
@@ -1,17 +1,40 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Query
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+import asyncio
 import os
 import uuid
 import json
 import mimetypes
+import time
+from datetime import date
 from typing import Optional, List
 from pydantic import BaseModel
 from pathlib import Path
+from functools import partial
+
+from audio_upload import (UploadError, check_content_length, check_extension, iter_upload_file,
+                          save_stream)
+from export import FORMATS as EXPORT_FORMATS, ExportInProgress, export_dir_from_env, export_results, load_state
+from janitor import janitor_from_env
+from job_store import JobStore
+from metrics import (CONTENT_TYPE, REGISTRY, UPLOAD_BYTES, UPLOAD_SECONDS, monitor_event_loop_lag,
+                     register_job_store)
+from profiling import PROFILERS, profiler_from_env
+from progress_stream import job_event_stream
+from question_store import QuestionStore, default_questions
+from renditions import PLAYBACK_MEDIA_TYPE, existing
+from result_response import (RESULT_VIEWS, cached_json_response, decode_result, dumps,
+                             etag_matches, not_modified_response, result_view)
+from pipeline import (DEFAULT_STAGE_WORKERS, MODEL_STAGES, STAGES, pipeline_version,
+                      prepared_files, questions_hash, remove_job, resume_stage,
+                      reuse_previous_run, run_stage)
+from scheduler import PRIORITIES, QueueFullError, scheduler_from_env
+from search_index import SearchQueryError, fts_query
 
 # Get the directory where app.py is located
 BASE_DIR = Path(__file__).resolve().parent
@@ -30,12 +53,12 @@ app.add_middleware(
 # Create directories
 TEMPLATES_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "static"
-UPLOAD_DIR = BASE_DIR / "uploads"
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", str(BASE_DIR / "uploads")))
 DATA_DIR = BASE_DIR / "data"
 
 TEMPLATES_DIR.mkdir(exist_ok=True)
 STATIC_DIR.mkdir(exist_ok=True)
-UPLOAD_DIR.mkdir(exist_ok=True)
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 DATA_DIR.mkdir(exist_ok=True)
 (STATIC_DIR / "css").mkdir(exist_ok=True)
 (STATIC_DIR / "js").mkdir(exist_ok=True)
@@ -47,26 +70,11 @@ CUSTOM_QUESTIONS_FILE = DATA_DIR / "custom_questions.json"
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
-# Store job status
-jobs = {}
+# Persistent job state, shared by all worker processes
+JOB_DB_PATH = Path(os.getenv("JOB_DB_PATH", str(DATA_DIR / "jobs.db")))
+job_store = JobStore(JOB_DB_PATH)
+register_job_store(job_store)
 
-# Lazy loading
-transcriber = None
-evaluator = None
-
-def get_transcriber():
-    global transcriber
-    if transcriber is None:
-        from transcriber import AudioTranscriber
-        transcriber = AudioTranscriber()
-    return transcriber
-
-def get_evaluator():
-    global evaluator
-    if evaluator is None:
-        from evaluator import CallEvaluator
-        evaluator = CallEvaluator()
-    return evaluator
 
 
 # Pydantic Models
@@ -77,6 +85,8 @@ class QuestionModel(BaseModel):
     description: str = ""
     weight: int = 3
     enabled: bool = True
+    keywords: List[str] = []
+    rules: Optional[dict] = None
 
 
 class QuestionUpdate(BaseModel):
@@ -85,6 +95,8 @@ class QuestionUpdate(BaseModel):
     description: Optional[str] = None
     weight: Optional[int] = None
     enabled: Optional[bool] = None
+    keywords: Optional[List[str]] = None
+    rules: Optional[dict] = None
 
 
 class CategoryModel(BaseModel):
@@ -94,26 +106,8 @@ class CategoryModel(BaseModel):
     color: str = "#6366f1"
 
 
-def load_custom_questions():
-    """Load custom questions from file or return defaults"""
-    if CUSTOM_QUESTIONS_FILE.exists():
-        with open(CUSTOM_QUESTIONS_FILE, 'r') as f:
-            return json.load(f)
-    else:
-        # Return default questions
-        from questions_config import PREDEFINED_QUESTIONS, QUESTION_CATEGORIES
-        return {
-            "questions": [
-                {**q, "enabled": True} for q in PREDEFINED_QUESTIONS
-            ],
-            "categories": QUESTION_CATEGORIES
-        }
-
-
-def save_custom_questions(data):
-    """Save custom questions to file"""
-    with open(CUSTOM_QUESTIONS_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+# Cached question configuration (custom file, or defaults until first edit)
+question_store = QuestionStore(CUSTOM_QUESTIONS_FILE, default_questions)
 
 
 @app.get("/")
@@ -126,20 +120,19 @@ async def home(request: Request):
 @app.get("/api/questions")
 async def get_questions():
     """Get all questions (custom or default)"""
-    return load_custom_questions()
+    return await question_store.aget()
 
 
 @app.post("/api/questions")
 async def add_question(question: QuestionModel):
     """Add a new question"""
-    data = load_custom_questions()
+    def add(data):
+        # Check if ID already exists
+        if any(q['id'] == question.id for q in data['questions']):
+            raise HTTPException(status_code=400, detail="Question ID already exists")
+        data['questions'].append(question.dict())
     
-    # Check if ID already exists
-    if any(q['id'] == question.id for q in data['questions']):
-        raise HTTPException(status_code=400, detail="Question ID already exists")
-    
-    data['questions'].append(question.dict())
-    save_custom_questions(data)
+    await question_store.aupdate(add)
     
     return {"message": "Question added successfully", "question": question.dict()}
 
@@ -147,36 +140,38 @@ async def add_question(question: QuestionModel):
 @app.put("/api/questions/{question_id}")
 async def update_question(question_id: str, update: QuestionUpdate):
     """Update an existing question"""
-    data = load_custom_questions()
-    
-    question_idx = next((i for i, q in enumerate(data['questions']) if q['id'] == question_id), None)
-    
-    if question_idx is None:
-        raise HTTPException(status_code=404, detail="Question not found")
-    
-    # Update only provided fields
-    update_dict = update.dict(exclude_unset=True)
-    for key, value in update_dict.items():
-        if value is not None:
-            data['questions'][question_idx][key] = value
+    def apply(data):
+        question = next((q for q in data['questions'] if q['id'] == question_id), None)
+        
+        if question is None:
+            raise HTTPException(status_code=404, detail="Question not found")
+        
+        # Update only provided fields
+        update_dict = update.dict(exclude_unset=True)
+        for key, value in update_dict.items():
+            if key == 'rules' and not value:
+                # An explicit null or {} removes the question's rules
+                question.pop('rules', None)
+            elif value is not None:
+                question[key] = value
+        return question
     
-    save_custom_questions(data)
+    question = await question_store.aupdate(apply)
     
-    return {"message": "Question updated successfully", "question": data['questions'][question_idx]}
+    return {"message": "Question updated successfully", "question": question}
 
 
 @app.delete("/api/questions/{question_id}")
 async def delete_question(question_id: str):
     """Delete a question"""
-    data = load_custom_questions()
-    
-    original_len = len(data['questions'])
-    data['questions'] = [q for q in data['questions'] if q['id'] != question_id]
-    
-    if len(data['questions']) == original_len:
-        raise HTTPException(status_code=404, detail="Question not found")
+    def remove(data):
+        original_len = len(data['questions'])
+        data['questions'] = [q for q in data['questions'] if q['id'] != question_id]
+        
+        if len(data['questions']) == original_len:
+            raise HTTPException(status_code=404, detail="Question not found")
     
-    save_custom_questions(data)
+    await question_store.aupdate(remove)
     
     return {"message": "Question deleted successfully"}
 
@@ -184,39 +179,40 @@ async def delete_question(question_id: str):
 @app.post("/api/questions/{question_id}/toggle")
 async def toggle_question(question_id: str):
     """Toggle question enabled/disabled"""
-    data = load_custom_questions()
-    
-    question = next((q for q in data['questions'] if q['id'] == question_id), None)
-    
-    if question is None:
-        raise HTTPException(status_code=404, detail="Question not found")
+    def toggle(data):
+        question = next((q for q in data['questions'] if q['id'] == question_id), None)
+        
+        if question is None:
+            raise HTTPException(status_code=404, detail="Question not found")
+        
+        question['enabled'] = not question.get('enabled', True)
+        return question['enabled']
     
-    question['enabled'] = not question.get('enabled', True)
-    save_custom_questions(data)
+    enabled = await question_store.aupdate(toggle)
     
-    return {"message": "Question toggled", "enabled": question['enabled']}
+    return {"message": "Question toggled", "enabled": enabled}
 
 
 @app.post("/api/questions/reorder")
 async def reorder_questions(question_ids: List[str]):
     """Reorder questions based on provided ID list"""
-    data = load_custom_questions()
-    
-    # Create a map of questions by ID
-    questions_map = {q['id']: q for q in data['questions']}
-    
-    # Reorder based on provided list
-    reordered = []
-    for qid in question_ids:
-        if qid in questions_map:
-            reordered.append(questions_map[qid])
-            del questions_map[qid]
-    
-    # Add any remaining questions not in the list
-    reordered.extend(questions_map.values())
+    def reorder(data):
+        # Create a map of questions by ID
+        questions_map = {q['id']: q for q in data['questions']}
+        
+        # Reorder based on provided list
+        reordered = []
+        for qid in question_ids:
+            if qid in questions_map:
+                reordered.append(questions_map[qid])
+                del questions_map[qid]
+        
+        # Add any remaining questions not in the list
+        reordered.extend(questions_map.values())
+        
+        data['questions'] = reordered
     
-    data['questions'] = reordered
-    save_custom_questions(data)
+    await question_store.aupdate(reorder)
     
     return {"message": "Questions reordered successfully"}
 
@@ -224,10 +220,7 @@ async def reorder_questions(question_ids: List[str]):
 @app.post("/api/questions/reset")
 async def reset_questions():
     """Reset to default questions"""
-    if CUSTOM_QUESTIONS_FILE.exists():
-        os.remove(CUSTOM_QUESTIONS_FILE)
-    
-    return {"message": "Questions reset to defaults", "data": load_custom_questions()}
+    return {"message": "Questions reset to defaults", "data": await question_store.areset()}
 
 
 # ============== CATEGORY MANAGEMENT ==============
@@ -235,18 +228,17 @@ async def reset_questions():
 @app.post("/api/categories")
 async def add_category(category: CategoryModel):
     """Add a new category"""
-    data = load_custom_questions()
-    
-    if category.name in data['categories']:
-        raise HTTPException(status_code=400, detail="Category already exists")
-    
-    data['categories'][category.name] = {
-        "description": category.description,
-        "icon": category.icon,
-        "color": category.color
-    }
+    def add(data):
+        if category.name in data['categories']:
+            raise HTTPException(status_code=400, detail="Category already exists")
+        
+        data['categories'][category.name] = {
+            "description": category.description,
+            "icon": category.icon,
+            "color": category.color
+        }
     
-    save_custom_questions(data)
+    await question_store.aupdate(add)
     
     return {"message": "Category added successfully"}
 
@@ -254,207 +246,417 @@ async def add_category(category: CategoryModel):
 @app.delete("/api/categories/{category_name}")
 async def delete_category(category_name: str):
     """Delete a category (questions in this category will be moved to 'General')"""
-    data = load_custom_questions()
-    
-    if category_name not in data['categories']:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    # Move questions to General
-    for q in data['questions']:
-        if q.get('category') == category_name:
-            q['category'] = 'General'
+    def remove(data):
+        if category_name not in data['categories']:
+            raise HTTPException(status_code=404, detail="Category not found")
+        
+        # Move questions to General
+        for q in data['questions']:
+            if q.get('category') == category_name:
+                q['category'] = 'General'
+        
+        del data['categories'][category_name]
     
-    del data['categories'][category_name]
-    save_custom_questions(data)
+    await question_store.aupdate(remove)
     
     return {"message": "Category deleted successfully"}
 
 
+# ============== TRANSCRIPT SEARCH ==============
+
+@app.get("/api/search")
+async def search_transcripts(
+    q: str = Query(..., min_length=1),
+    mode: str = Query("all"),
+    speaker: Optional[str] = Query(None),
+    job_id: Optional[str] = Query(None),
+    min_score: Optional[float] = Query(None),
+    max_score: Optional[float] = Query(None),
+    since: Optional[float] = Query(None),
+    until: Optional[float] = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Search the transcripts of all processed calls.
+    
+    `q` takes words, "quoted phrases" and prefixes (`refun*`); `mode=all`
+    requires every term, `mode=any` one of them. Hits are transcript segments,
+    best match first, with millisecond timestamps and a highlighted snippet.
+    Filters: speaker, job_id, overall score range, completion time range
+    (epoch seconds).
+    """
+    if not job_store.search_enabled:
+        raise HTTPException(status_code=503, detail="Search is unavailable: SQLite lacks FTS5")
+    if mode not in ("all", "any"):
+        raise HTTPException(status_code=400, detail="Invalid mode. Allowed: all, any")
+    try:
+        query = fts_query(q, match_any=mode == "any")
+    except SearchQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # One extra row tells whether there is another page
+    hits = await asyncio.to_thread(
+        job_store.search, query, speaker=speaker, job_id=job_id, min_score=min_score,
+        max_score=max_score, since=since, until=until, limit=limit + 1, offset=offset
+    )
+    for hit in hits:
+        hit["audio_url"] = f"/audio/{hit['job_id']}"
+    
+    return {
+        "query": q,
+        "results": hits[:limit],
+        "offset": offset,
+        "limit": limit,
+        "has_more": len(hits) > limit
+    }
+
+
+# ============== QA ANALYTICS ==============
+
+@app.get("/api/analytics")
+async def qa_analytics(
+    since: Optional[str] = Query(None),
+    until: Optional[str] = Query(None),
+    category: Optional[str] = Query(None)
+):
+    """
+    QA results across calls: per-question pass rates, per-category scores,
+    grade distribution and daily averages for the UTC days `since`..`until`
+    (YYYY-MM-DD, inclusive). Answered from rollups maintained as jobs finish.
+    """
+    for name, value in (("since", since), ("until", until)):
+        if value is not None:
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid {name} date. Use YYYY-MM-DD")
+    
+    return await asyncio.to_thread(job_store.qa_analytics, since=since, until=until, category=category)
+
+
+# ============== COLUMNAR EXPORT ==============
+
+@app.post("/api/export")
+async def export_columnar(
+    format: str = Query("parquet"),
+    full: bool = Query(False)
+):
+    """
+    Export completed jobs to partitioned Parquet/Arrow files in EXPORT_DIR:
+    transcript segments, per-question evaluations, speaker stats and a call
+    table. Only jobs completed since the last export unless `full` is set,
+    which re-exports everything and replaces earlier files.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Use one of: {', '.join(EXPORT_FORMATS)}")
+    try:
+        return await asyncio.to_thread(export_results, job_store, export_dir_from_env(), format, full)
+    except ExportInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@app.get("/api/export")
+def export_status():
+    """Watermark and recent runs of the export in EXPORT_DIR"""
+    return load_state(export_dir_from_env())
+
+
 # ============== AUDIO PROCESSING ENDPOINTS ==============
 
 @app.post("/upload")
-async def upload_audio(file: UploadFile = File(...)):
-    """Upload audio file and return job ID"""
-    
-    allowed_extensions = ['.wav', '.mp3', '.m4a', '.flac', '.ogg', '.webm']
-    file_ext = os.path.splitext(file.filename)[1].lower()
-    
-    if file_ext not in allowed_extensions:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
-        )
-    
+async def upload_audio(request: Request, file: UploadFile = File(...)):
+    """Upload audio file (multipart form) and return job ID"""
+    try:
+        # Allow some room for the multipart envelope around the file
+        check_content_length(request.headers.get("content-length"), overhead=64 * 1024)
+        file_ext = check_extension(file.filename)
+        return await _store_upload(iter_upload_file(file), file.filename, file_ext)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@app.post("/upload/stream")
+async def upload_audio_stream(request: Request, filename: str = Query(...)):
+    """Upload audio sent as the raw request body and return job ID"""
+    try:
+        check_content_length(request.headers.get("content-length"))
+        file_ext = check_extension(filename)
+        return await _store_upload(request.stream(), filename, file_ext)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+async def _store_upload(chunks, filename: str, file_ext: str) -> dict:
+    """Stream an upload to disk and create its job."""
     job_id = str(uuid.uuid4())
     file_path = UPLOAD_DIR / f"{job_id}{file_ext}"
     
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    started = time.perf_counter()
+    saved = await save_stream(chunks, file_path)
+    UPLOAD_SECONDS.observe(time.perf_counter() - started)
+    UPLOAD_BYTES.inc(saved["size"])
+    
+    await asyncio.to_thread(
+        job_store.create,
+        job_id,
+        status="pending",
+        progress=0,
+        message="File uploaded successfully",
+        file_path=str(file_path),
+        filename=filename,
+        file_size=saved["size"],
+        content_hash=saved["sha256"]
+    )
     
-    jobs[job_id] = {
-        "status": "pending",
-        "progress": 0,
+    return {
+        "job_id": job_id,
         "message": "File uploaded successfully",
-        "file_path": str(file_path),
-        "filename": file.filename,
-        "result": None
+        "size": saved["size"],
+        "sha256": saved["sha256"]
     }
-    
-    return {"job_id": job_id, "message": "File uploaded successfully"}
 
 
 @app.post("/process/{job_id}")
-async def process_audio(job_id: str, background_tasks: BackgroundTasks):
-    """Start processing the uploaded audio"""
+async def process_audio(job_id: str, priority: str = Query("interactive"),
+                        force: bool = Query(False), profile: Optional[str] = Query(None)):
+    """
+    Queue the uploaded audio for processing.
+
+    `force` skips reuse of identical earlier uploads. `profile` ("sampling" or
+    "torch") profiles every stage and implies `force`.
+    """
     
-    if job_id not in jobs:
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    if jobs[job_id]["status"] == "processing":
+    if job["status"] in ("queued", "deferred", "processing"):
         raise HTTPException(status_code=400, detail="Job already processing")
     
-    jobs[job_id]["status"] = "processing"
-    jobs[job_id]["progress"] = 0
-    jobs[job_id]["message"] = "Starting processing..."
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority. Allowed: {', '.join(PRIORITIES)}")
+    
+    if profile is not None and profile not in PROFILERS:
+        raise HTTPException(status_code=400, detail=f"Invalid profiler. Allowed: {', '.join(PROFILERS)}")
+    
+    # Snapshot the enabled questions so workers evaluate exactly what was asked for
+    enabled_questions, questions_version = await question_store.asnapshot()
+    # The job store calls below block on SQLite; keep them off the event loop
+    return await asyncio.to_thread(
+        _start_processing, job_id, priority, force, profile, enabled_questions, questions_version
+    )
+
+
+def _start_processing(job_id: str, priority: str, force: bool, profile: Optional[str],
+                      enabled_questions: List[dict], questions_version: int) -> dict:
+    """Record the question snapshot, reuse an identical earlier run if allowed, else queue the job."""
+    job_store.update(
+        job_id,
+        questions=json.dumps(enabled_questions),
+        questions_version=questions_version,
+        questions_hash=questions_hash(enabled_questions),
+        pipeline_version=pipeline_version(),
+        profiler=profile or DEFAULT_PROFILER,
+        deduplicated_from=None
+    )
+    
+    # A fresh run recomputes every stage unless the same audio was already processed
+    job_store.clear_stages(job_id)
+    job_store.clear_events(job_id)
+    reused = None if force or profile else reuse_previous_run(job_store, job_id)
+    if reused == "completed":
+        return {
+            "message": "Reused results from an identical earlier upload",
+            "status": "completed",
+            "deduplicated_from": job_store.get(job_id)["deduplicated_from"]
+        }
+    
+    status = _submit_job(job_id, priority, reused)
+    
+    return {"message": "Processing started", "status": status, **job_scheduler.queue_info(job_id)}
+
+
+@app.post("/retry/{job_id}")
+def retry_job(job_id: str, priority: str = Query("interactive")):
+    """Re-queue a failed job from its first incomplete stage, reusing finished stages"""
+    # Plain def: the job store calls run in the threadpool, off the event loop
+    
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job["status"] != "failed":
+        raise HTTPException(status_code=400, detail="Only failed jobs can be retried")
     
-    background_tasks.add_task(process_audio_task, job_id)
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority. Allowed: {', '.join(PRIORITIES)}")
     
-    return {"message": "Processing started"}
+    stage = resume_stage(job_store, job_id)
+    status = _submit_job(job_id, priority, stage)
+    
+    return {
+        "message": f"Resuming from {stage}",
+        "status": status,
+        "stage": stage,
+        **job_scheduler.queue_info(job_id)
+    }
 
 
-def process_audio_task(job_id: str):
-    """Background task to process audio"""
-    trans = get_transcriber()
+def _submit_job(job_id: str, priority: str, stage: str = None) -> str:
+    """Admit a job to the scheduler, turning a full queue into a 429 response."""
     try:
-        file_path = jobs[job_id]["file_path"]
-        
-        # Step 1: Load models
-        jobs[job_id]["progress"] = 5
-        jobs[job_id]["message"] = "Loading models..."
-        
-        # Models are lazily loaded inside the transcriber; this just ensures the
-        # singleton instance is created.
-        
-        # Step 2: Diarization
-        jobs[job_id]["progress"] = 15
-        jobs[job_id]["message"] = "Running speaker diarization..."
-        
-        diarization = trans.run_diarization(file_path)
-        
-        # Step 3: Transcription
-        jobs[job_id]["progress"] = 30
-        jobs[job_id]["message"] = "Transcribing audio segments..."
-        
-        def update_transcription_progress(p):
-            jobs[job_id]["progress"] = 30 + int(p * 30)
-            jobs[job_id]["message"] = f"Transcribing... {int(p * 100)}%"
-        
-        transcript = trans.transcribe_segments(
-            file_path,
-            diarization,
-            progress_callback=update_transcription_progress
-        )
-        
-        # Step 4: Summarization
-        jobs[job_id]["progress"] = 65
-        jobs[job_id]["message"] = "Generating summary..."
-        
-        summary, formatted = trans.summarize(transcript)
-        
-        # Step 5: Question Evaluation - Use only ENABLED questions
-        jobs[job_id]["progress"] = 75
-        jobs[job_id]["message"] = "Evaluating call quality..."
-        
-        # Get enabled questions only
-        questions_data = load_custom_questions()
-        enabled_questions = [q for q in questions_data['questions'] if q.get('enabled', True)]
-        
-        eval_instance = get_evaluator()
-        evaluation = eval_instance.evaluate_questions(formatted, summary, enabled_questions)
-        
-        # Step 6: Get stats
-        jobs[job_id]["progress"] = 95
-        jobs[job_id]["message"] = "Finalizing..."
-        
-        speaker_stats = trans.get_speaker_stats(transcript)
-        
-        # Complete
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["message"] = "Processing complete!"
-        jobs[job_id]["result"] = {
-            "job_id": job_id,
-            "transcript": transcript,
-            "formatted_transcript": formatted,
-            "summary": summary,
-            "speaker_stats": speaker_stats,
-            "filename": jobs[job_id]["filename"],
-            "evaluation": evaluation,
-            "audio_url": f"/audio/{job_id}"
-        }
-        
-    except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["message"] = f"Error: {str(e)}"
-        import traceback
-        traceback.print_exc()
-        print(f"Error processing {job_id}: {e}")
-    finally:
-        # After each job, aggressively clear inference-time memory while keeping
-        # the heavy models (ASR, diarization, LLM backend) resident.
-        if hasattr(trans, "_clear_inference_memory"):
-            trans._clear_inference_memory()
+        status = job_scheduler.submit(job_id, priority, stage)
+    except QueueFullError as e:
+        headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+        raise HTTPException(status_code=429, detail="Processing queue is full, try again later", headers=headers)
+    
+    message = "Queued for processing..." if status == "queued" else "Queue full, deferred until a slot frees up"
+    job_store.update(job_id, message=message)
+    return status
 
 
 @app.get("/status/{job_id}")
-async def get_status(job_id: str):
-    """Get job status"""
-    if job_id not in jobs:
+def get_status(job_id: str):
+    """Get job status (the result itself is served by /result/{job_id})"""
+    # Plain def (like /result and /audio): runs in the threadpool, keeping
+    # the SQLite reads off the event loop
+    job = job_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
     return {
         "job_id": job_id,
         "status": job["status"],
         "progress": job["progress"],
         "message": job["message"],
-        "result": job.get("result")
+        **job_scheduler.queue_info(job_id),
+        "deduplicated_from": job.get("deduplicated_from")
     }
 
 
+@app.get("/result/{job_id}")
+def get_result(
+    job_id: str,
+    request: Request,
+    view: str = Query("full"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """
+    Get a completed job's result, or a partial view of it.
+    
+    Views: full, summary, evaluation, analytics, transcript (paged with
+    offset/limit). Responses carry an ETag and are gzip/brotli compressed.
+    """
+    if view != "full" and view not in RESULT_VIEWS:
+        raise HTTPException(status_code=400, detail=f"Invalid view. Allowed: full, {', '.join(RESULT_VIEWS)}")
+    
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    payload = job_store.get_result_payload(job_id) if job["status"] == "completed" else None
+    if payload is None:
+        raise HTTPException(status_code=400, detail="Result available after processing completes")
+    
+    job_store.touch(job_id)
+    if view == "full":
+        etag = f'"{payload["etag"]}"'
+    elif view == "transcript":
+        etag = f'"{payload["etag"]}-transcript-{offset}-{limit}"'
+    else:
+        etag = f'"{payload["etag"]}-{view}"'
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified_response(etag)
+    
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if view == "full":
+        # Already serialized (and gzipped) when the job completed
+        return cached_json_response(payload["result"].encode("utf-8"), etag, accept_encoding,
+                                    gzipped=payload["result_gzip"])
+    
+    body = dumps(result_view(decode_result(payload), view, offset, limit))
+    return cached_json_response(body, etag, accept_encoding)
+
+
+@app.get("/events/{job_id}")
+async def stream_events(job_id: str, request: Request):
+    """Server-Sent Events: live progress and transcript segments until the job finishes"""
+    if not await asyncio.to_thread(job_store.exists, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    last_event_id = request.headers.get("last-event-id", "")
+    return StreamingResponse(
+        job_event_stream(
+            job_store,
+            job_id,
+            job_scheduler.queue_info,
+            request.is_disconnected,
+            last_event_id=int(last_event_id) if last_event_id.isdigit() else 0
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.delete("/job/{job_id}")
 async def delete_job(job_id: str):
-    """Delete job and associated files"""
-    if job_id not in jobs:
+    """Delete job and associated files, and take the call out of the QA analytics"""
+    if not await asyncio.to_thread(remove_job, job_store, job_id, forget_analytics=True):
         raise HTTPException(status_code=404, detail="Job not found")
     
-    if "file_path" in jobs[job_id]:
-        try:
-            os.remove(jobs[job_id]["file_path"])
-        except:
-            pass
-    
-    del jobs[job_id]
     return {"message": "Job deleted"}
 
 
-@app.get("/audio/{job_id}")
-async def get_audio(job_id: str, download: bool = Query(False)):
-    """Stream or download the original uploaded audio for a completed job."""
-    if job_id not in jobs:
+# Job ids are never reused and renditions never change, so clients may cache them
+AUDIO_CACHE_CONTROL = "private, max-age=86400"
+
+
+def _completed_job(job_id: str) -> dict:
+    job = job_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
     if job.get("status") != "completed":
         raise HTTPException(status_code=400, detail="Audio available after processing completes")
+    return job
+
+
+def _rendition(job: dict, key: str) -> Optional[str]:
+    """Path of a prepare-stage rendition, falling back to the job this one was deduplicated from."""
+    for source_id in (job["job_id"], job.get("deduplicated_from")):
+        if source_id:
+            path = existing(prepared_files(job_store, source_id).get(key))
+            if path:
+                return path
+    return None
+
+
+@app.get("/audio/{job_id}")
+def get_audio(job_id: str, download: bool = Query(False)):
+    """
+    Stream the compressed playback rendition (range requests supported), or
+    download the original upload with `?download=true`.
+    """
+    job = _completed_job(job_id)
+    job_store.touch(job_id)
+    
+    playback_path = None if download else _rendition(job, "playback_path")
+    if playback_path:
+        return FileResponse(playback_path, media_type=PLAYBACK_MEDIA_TYPE,
+                            headers={"Cache-Control": AUDIO_CACHE_CONTROL})
     
     file_path = job.get("file_path")
     if not file_path or not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Audio file not found")
     
     media_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
-    response = FileResponse(file_path, media_type=media_type)
+    response = FileResponse(file_path, media_type=media_type,
+                            headers={"Cache-Control": AUDIO_CACHE_CONTROL})
     
     if download:
         filename = job.get("filename") or Path(file_path).name
@@ -463,9 +665,66 @@ async def get_audio(job_id: str, download: bool = Query(False)):
     return response
 
 
+@app.get("/audio/{job_id}/peaks")
+def get_audio_peaks(job_id: str):
+    """Precomputed waveform peaks (max amplitude per bucket, 0-1) for the UI timeline."""
+    job = _completed_job(job_id)
+    
+    peaks_path = _rendition(job, "peaks_path")
+    if not peaks_path:
+        raise HTTPException(status_code=404, detail="Waveform not available")
+    
+    return FileResponse(peaks_path, media_type="application/json",
+                        headers={"Cache-Control": AUDIO_CACHE_CONTROL})
+
+
+# Bounded queue + fixed worker slots per stage (STAGE_WORKERS / MAX_QUEUE_SIZE)
+job_scheduler = scheduler_from_env(
+    job_store, partial(run_stage, job_store), STAGES, DEFAULT_STAGE_WORKERS, MODEL_STAGES
+)
+
+# Retention: TTLs, disk quota and orphaned/scratch file cleanup (see janitor.py)
+janitor = janitor_from_env(job_store, UPLOAD_DIR)
+
+# "thread": run jobs inside this process. "process": only queue jobs and leave
+# execution (and model loading) to `python worker.py`.
+WORKER_MODE = os.getenv("WORKER_MODE", "thread")
+
+# Profiler for jobs that do not request one (JOB_PROFILER, unset = off)
+DEFAULT_PROFILER = profiler_from_env()
+
+
+@app.on_event("startup")
+def start_scheduler():
+    if WORKER_MODE == "thread":
+        job_scheduler.start()
+    janitor.start()
+
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    app.state.loop_monitor = asyncio.create_task(monitor_event_loop_lag())
+
+
+@app.on_event("shutdown")
+def flush_job_store():
+    app.state.loop_monitor.cancel()
+    job_scheduler.stop()
+    janitor.stop()
+    job_store.close()
+
+
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+def health_check():
+    # Plain def: usage() walks the upload directory and queries the job
+    # store, so it runs in the threadpool rather than on the event loop
+    return {"status": "healthy", "usage": janitor.usage()}
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint (stages run by `worker.py` are exported by the workers)"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
 
 if __name__ == "__main__":
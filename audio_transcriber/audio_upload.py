@@ -0,0 +1,136 @@
+"""
+Streaming audio upload handling.
+
+Request bodies are written to disk chunk by chunk while a SHA-256 digest is
+computed, so an upload is never held in memory in full. The container format
+is sniffed from the first bytes and the stream is aborted as soon as it grows
+past the configured limit.
+"""
+
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+ALLOWED_EXTENSIONS = ['.wav', '.mp3', '.m4a', '.flac', '.ogg', '.webm']
+
+# Maximum upload size (MAX_UPLOAD_MB, default 500 MB)
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "500")) * 1024 * 1024)
+
+CHUNK_SIZE = 1024 * 1024
+
+# Bytes needed to recognise every supported container
+SNIFF_BYTES = 12
+
+
+class UploadError(Exception):
+    """Raised when an upload is rejected; carries the HTTP status to return."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sniff_audio_format(header: bytes) -> Optional[str]:
+    """Guess the file extension from the leading bytes, or None if not a supported audio format."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return ".wav"
+    if header[:4] == b"fLaC":
+        return ".flac"
+    if header[:4] == b"OggS":
+        return ".ogg"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return ".webm"
+    if header[4:8] == b"ftyp":
+        return ".m4a"
+    if header[:3] == b"ID3" or (len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return ".mp3"
+    return None
+
+
+def check_extension(filename: str) -> str:
+    """Lower-cased extension of `filename`; raises UploadError if it is not allowed."""
+    file_ext = os.path.splitext(filename or "")[1].lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise UploadError(f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}")
+    return file_ext
+
+
+def check_content_length(content_length: Optional[str], max_bytes: int = MAX_UPLOAD_BYTES,
+                         overhead: int = 0):
+    """Reject early when the declared body size already exceeds the limit."""
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + overhead:
+        raise UploadError(_too_large_message(max_bytes), status_code=413)
+
+
+async def save_stream(chunks: AsyncIterator[bytes], dest: Path,
+                      max_bytes: int = MAX_UPLOAD_BYTES) -> dict:
+    """
+    Write an audio byte stream to `dest`.
+
+    Args:
+        chunks: Async iterator over the raw file bytes
+        dest: Final path; data is written to a `.part` file and renamed on success
+        max_bytes: Abort with 413 once the stream exceeds this size
+
+    Returns:
+        Dictionary with `size`, `sha256` and the sniffed `format` extension
+    """
+    part_path = dest.with_name(dest.name + ".part")
+    digest = hashlib.sha256()
+    size = 0
+    header = b""
+    audio_format = None
+
+    try:
+        with open(part_path, "wb") as f:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadError(_too_large_message(max_bytes), status_code=413)
+
+                if audio_format is None:
+                    header += chunk[:SNIFF_BYTES]
+                    if len(header) >= SNIFF_BYTES:
+                        audio_format = _require_audio(header)
+
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+
+        if size == 0:
+            raise UploadError("Empty upload")
+        if audio_format is None:
+            audio_format = _require_audio(header)
+
+        os.replace(part_path, dest)
+    except BaseException:
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+        raise
+
+    return {"size": size, "sha256": digest.hexdigest(), "format": audio_format}
+
+
+async def iter_upload_file(upload, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read a Starlette UploadFile in fixed-size chunks."""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _require_audio(header: bytes) -> str:
+    audio_format = sniff_audio_format(header)
+    if audio_format is None:
+        raise UploadError("File content is not a supported audio format")
+    return audio_format
+
+
+def _too_large_message(max_bytes: int) -> str:
+    return f"File too large. Maximum size is {max_bytes // (1024 * 1024)} MB"
@@ -0,0 +1,344 @@
+"""
+Offline bulk processing for backfills.
+
+Runs the full pipeline (`AudioTranscriber` + `CallEvaluator`, the same
+stages as the API) over a directory or manifest of recordings on a pool of
+worker processes, each loading the models once:
+
+    python batch.py /data/calls --output runs/2025-01 --workers 2
+    python batch.py manifest.csv --output runs/nightly --job-db data/jobs.db
+
+The batch keeps its own job store (`<output>/batch.db`, or the app's database
+with --job-db so results show up in the UI, search and analytics). Every
+stage's output is committed as it finishes, so an interrupted run picks up
+where it stopped: completed files are skipped and unfinished ones resume at
+their first incomplete stage. Identical recordings are processed once.
+
+When the run ends, `<output>/results.jsonl` (one full result per file) and
+`<output>/results.csv` (one summary row per file) are written for every
+input file, including those finished by earlier runs.
+
+Manifests are text files with one path per line, CSV files with a `path`
+column, or JSONL with a "path" key; relative paths are resolved against the
+manifest's directory.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import shutil
+import signal
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+from audio_upload import ALLOWED_EXTENSIONS
+from worker import default_worker_count
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_QUESTIONS_FILE = BASE_DIR / "data" / "custom_questions.json"
+
+CSV_FIELDS = ["source", "job_id", "status", "duration", "overall_score", "grade", "segments", "message"]
+
+
+# ------------------------------------------------------------------ inputs
+
+def find_recordings(directory: Path) -> List[Path]:
+    """Audio files under `directory` (recursively), in a stable order."""
+    return sorted(
+        path for path in directory.rglob("*")
+        if path.is_file() and path.suffix.lower() in ALLOWED_EXTENSIONS
+    )
+
+
+def read_manifest(manifest: Path) -> List[Path]:
+    """Paths listed in a .txt, .csv (`path` column) or .jsonl (`path` key) manifest."""
+    base = manifest.parent
+    with open(manifest, encoding="utf-8", newline="") as f:
+        if manifest.suffix.lower() == ".csv":
+            entries = [row["path"] for row in csv.DictReader(f)]
+        elif manifest.suffix.lower() == ".jsonl":
+            entries = [json.loads(line)["path"] for line in f if line.strip()]
+        else:
+            entries = [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    return [(base / entry).resolve() for entry in entries]
+
+
+def batch_job_id(path: Path) -> str:
+    """Stable job id per recording, so reruns find earlier progress."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"batch:{path.resolve()}"))
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ----------------------------------------------------------------- workers
+
+# Per worker process (set by _init_worker)
+_store = None
+_options = None
+_claim = None
+
+
+def _init_worker(db_path: str, threads: int, options: dict):
+    # Keep N workers x M intra-op threads within the machine's cores
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    os.environ.setdefault("MKL_NUM_THREADS", str(threads))
+    # Ctrl-C is handled by the parent, which terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    global _store, _options, _claim
+    from job_store import JobStore
+    from pipeline import get_evaluator, get_transcriber
+    from scheduler import InstanceRegistration
+
+    _store = JobStore(db_path)
+    _options = options
+    # Registered like a scheduler, so an API sharing the database does not
+    # mistake this worker's jobs for orphans
+    registration = InstanceRegistration(_store)
+    registration.start()
+    _claim = f"{registration.id}-batch"
+    print(f"[batch {os.getpid()}] loading models...")
+    get_transcriber()
+    get_evaluator()
+
+
+def _process_file(source: str) -> dict:
+    """Run (or resume) one recording through every stage. Returns its status."""
+    from pipeline import (STAGES, pipeline_version, prepared_files, questions_hash,
+                          resume_stage, reuse_previous_run, run_stage)
+    from scheduler import PRIORITIES
+
+    source = Path(source)
+    job_id = batch_job_id(source)
+    started = time.perf_counter()
+    claim = _claim
+
+    try:
+        job = _store.get(job_id)
+        if job is None or job["status"] == "pending":
+            # The stages write next to the job's file, so point it at the work directory
+            work_file = Path(_options["work_dir"]) / f"{job_id}{source.suffix.lower()}"
+            if not work_file.exists():
+                try:
+                    os.symlink(source, work_file)
+                except OSError:
+                    shutil.copy2(source, work_file)
+            if job is None:
+                _store.create(job_id, file_path=str(work_file), filename=source.name,
+                              file_size=source.stat().st_size)
+            questions = _options["questions"]
+            _store.update(
+                job_id,
+                status="processing",
+                claimed_by=claim,
+                priority=PRIORITIES["backfill"],
+                enqueued_at=time.time(),
+                started_at=time.time(),
+                content_hash=_sha256(source),
+                questions=json.dumps(questions),
+                questions_version=_options["questions_version"],
+                questions_hash=questions_hash(questions),
+                pipeline_version=pipeline_version(),
+                message="Processing (batch)"
+            )
+            first = None if _options["force"] else reuse_previous_run(_store, job_id)
+            if first == "completed":
+                return {"source": str(source), "job_id": job_id, "status": "completed",
+                        "reused": True, "seconds": round(time.perf_counter() - started, 3)}
+            first = first or STAGES[0]
+        else:
+            # Interrupted or failed earlier: continue at the first stage without output
+            first = resume_stage(_store, job_id)
+            _store.update(job_id, status="processing", claimed_by=claim, attempts=0,
+                          message="Resuming (batch)")
+
+        for stage in STAGES[STAGES.index(first):]:
+            # Keep the claim between stages so an API or worker.py sharing the
+            # database never picks the job up halfway
+            run_stage(_store, job_id, stage, hold_claim=True)
+            job = _store.get(job_id)
+            if job["status"] == "failed":
+                return {"source": str(source), "job_id": job_id, "status": "failed",
+                        "stage": stage, "message": job["message"],
+                        "seconds": round(time.perf_counter() - started, 3)}
+
+        if not _options["keep_audio"]:
+            # The 16 kHz working copy is only needed while stages run
+            audio_path = prepared_files(_store, job_id).get("audio_path")
+            if audio_path and os.path.exists(audio_path):
+                os.remove(audio_path)
+        return {"source": str(source), "job_id": job_id, "status": "completed",
+                "seconds": round(time.perf_counter() - started, 3)}
+    except Exception as e:
+        _store.update(job_id, status="failed", claimed_by=None, message=f"Error: {e}")
+        return {"source": str(source), "job_id": job_id, "status": "failed", "message": str(e),
+                "seconds": round(time.perf_counter() - started, 3)}
+
+
+# ----------------------------------------------------------------- results
+
+def write_results(store, sources: List[Path], output_dir: Path) -> dict:
+    """Write results.jsonl and results.csv for every input file. Returns counts by status."""
+    counts = {}
+    jsonl_path, csv_path = output_dir / "results.jsonl", output_dir / "results.csv"
+    with open(f"{jsonl_path}.tmp", "w", encoding="utf-8") as jsonl, \
+            open(f"{csv_path}.tmp", "w", encoding="utf-8", newline="") as summary:
+        writer = csv.DictWriter(summary, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for source in sources:
+            job_id = batch_job_id(source)
+            job = store.get(job_id) or {"status": "not_started", "message": ""}
+            status = job["status"] if job["status"] in ("completed", "failed") else "incomplete"
+            counts[status] = counts.get(status, 0) + 1
+            result = store.get_result(job_id) if status == "completed" else None
+
+            jsonl.write(json.dumps({"source": str(source), "job_id": job_id, "status": status,
+                                    "message": job["message"], "result": result}, ensure_ascii=False))
+            jsonl.write("\n")
+            scores = ((result or {}).get("evaluation") or {}).get("scores") or {}
+            writer.writerow({
+                "source": str(source),
+                "job_id": job_id,
+                "status": status,
+                "duration": ((result or {}).get("timing") or {}).get("audio_duration"),
+                "overall_score": scores.get("overall_score"),
+                "grade": scores.get("grade"),
+                "segments": len((result or {}).get("transcript") or []),
+                "message": job["message"],
+            })
+    os.replace(f"{jsonl_path}.tmp", jsonl_path)
+    os.replace(f"{csv_path}.tmp", csv_path)
+    return counts
+
+
+def _load_questions(path: Path):
+    from question_store import QuestionStore, default_questions
+
+    return QuestionStore(path, default_questions).snapshot()
+
+
+def run_batch(sources: List[Path], output_dir: Path, workers: int, db_path: Optional[str] = None,
+              questions_file: Path = DEFAULT_QUESTIONS_FILE, force: bool = False,
+              retry_failed: bool = True, keep_audio: bool = False) -> dict:
+    """
+    Process `sources` with a pool of `workers` processes, skipping finished files.
+
+    Returns:
+        Counts by final status and the paths of the consolidated results
+    """
+    from job_store import JobStore
+
+    # A recording listed twice maps to one job; two workers must not run it at once
+    unique, seen = [], set()
+    for source in sources:
+        if source.resolve() not in seen:
+            seen.add(source.resolve())
+            unique.append(source)
+    if len(unique) < len(sources):
+        print(f"[batch] Ignoring {len(sources) - len(unique)} duplicate path(s)")
+    sources = unique
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    work_dir = output_dir / "work"
+    work_dir.mkdir(exist_ok=True)
+    db_path = db_path or str(output_dir / "batch.db")
+    store = JobStore(db_path)
+
+    pending = []
+    for source in sources:
+        job = store.get(batch_job_id(source))
+        if job is not None and not force:
+            if job["status"] == "completed" or (job["status"] == "failed" and not retry_failed):
+                continue
+        if force and job is not None:
+            store.clear_stages(batch_job_id(source))
+            store.update(batch_job_id(source), status="pending")
+        pending.append(str(source))
+    print(f"[batch] {len(sources)} file(s), {len(sources) - len(pending)} already done, "
+          f"{len(pending)} to process with {workers} worker(s)")
+
+    questions, questions_version = _load_questions(questions_file)
+    options = {"work_dir": str(work_dir), "questions": questions, "questions_version": questions_version,
+               "force": force, "keep_audio": keep_audio}
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    if pending:
+        started = time.time()
+        ctx = mp.get_context("spawn")
+        pool = ctx.Pool(min(workers, len(pending)), initializer=_init_worker,
+                        initargs=(db_path, threads, options))
+        try:
+            for done, outcome in enumerate(pool.imap_unordered(_process_file, pending), 1):
+                detail = "reused" if outcome.get("reused") else f"{outcome['seconds']:.1f}s"
+                if outcome["status"] == "failed":
+                    detail += f", {outcome.get('message', '')}"
+                print(f"[batch] {done}/{len(pending)} {outcome['status']:<9} {outcome['source']} ({detail})")
+            pool.close()
+        except KeyboardInterrupt:
+            print("[batch] interrupted; rerun the same command to resume")
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        print(f"[batch] processed {len(pending)} file(s) in {time.time() - started:.0f}s")
+
+    counts = write_results(store, sources, output_dir)
+    store.close()
+    return {"counts": counts, "results": str(output_dir / "results.jsonl"),
+            "summary": str(output_dir / "results.csv")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process a directory or manifest of recordings")
+    parser.add_argument("input", help="Directory of recordings, or a .txt/.csv/.jsonl manifest")
+    parser.add_argument("--output", required=True, help="Directory for checkpoints and results")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: fit cores and memory)")
+    parser.add_argument("--memory-per-worker-gb", type=float, default=6.0,
+                        help="Approximate RAM one worker needs with all models loaded")
+    parser.add_argument("--job-db", help="Job store to record into (default: <output>/batch.db); "
+                                         "use the app's database to make results visible in the UI")
+    parser.add_argument("--questions", default=str(DEFAULT_QUESTIONS_FILE),
+                        help="Question configuration (defaults to the app's)")
+    parser.add_argument("--force", action="store_true", help="Reprocess files that already completed")
+    parser.add_argument("--skip-failed", action="store_true", help="Do not retry files that failed before")
+    parser.add_argument("--keep-audio", action="store_true", help="Keep the prepared 16 kHz WAV files")
+    args = parser.parse_args()
+
+    source = Path(args.input)
+    if source.is_dir():
+        sources = find_recordings(source)
+    elif source.is_file():
+        sources = read_manifest(source)
+    else:
+        sys.exit(f"Input not found: {source}")
+    missing = [path for path in sources if not path.is_file()]
+    if missing:
+        sys.exit(f"{len(missing)} listed file(s) do not exist, e.g. {missing[0]}")
+    if not sources:
+        sys.exit("No recordings found")
+
+    workers = args.workers or default_worker_count(args.memory_per_worker_gb)
+    try:
+        outcome = run_batch(sources, Path(args.output), workers, args.job_db, Path(args.questions),
+                            force=args.force, retry_failed=not args.skip_failed, keep_audio=args.keep_audio)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    counts = ", ".join(f"{n} {status}" for status, n in sorted(outcome["counts"].items()))
+    print(f"[batch] {counts}\n[batch] results: {outcome['results']}\n[batch] summary: {outcome['summary']}")
+
+
+if __name__ == "__main__":
+    main()
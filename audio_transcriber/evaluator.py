@@ -8,7 +8,12 @@ from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import json
+from collections import Counter
 from questions_config import PREDEFINED_QUESTIONS, QUESTION_CATEGORIES
+from retriever import TranscriptRetriever
+from rules import apply_rules, infer_roles
+from alignment import EvidenceAligner
+from metrics import llm_callbacks
 
 
 class QuestionEvaluation(BaseModel):
@@ -21,16 +26,25 @@ class QuestionEvaluation(BaseModel):
 
 
 class CallEvaluator:
-    def __init__(self, model_name: str = "gpt-oss:20b-cloud"):
-        self.llm = ChatOllama(
+    def __init__(self, model_name: str = "gpt-oss:20b-cloud",
+                 retrieval_top_k: int = 3, retrieval_context: int = 1, llm=None):
+        # `llm` replaces the Ollama model (e.g. a stub from stubs.py for benchmarks)
+        self.llm = llm or ChatOllama(
             model=model_name,
-            temperature=0.1
+            temperature=0.1,
+            callbacks=llm_callbacks("evaluate")
         )
         self.questions = PREDEFINED_QUESTIONS
         self.categories = QUESTION_CATEGORIES
+        # Evidence selection: best matching turns per question and neighbours
+        # kept around each hit. Set retrieval_top_k to 0 to always send the
+        # full transcript.
+        self.retrieval_top_k = retrieval_top_k
+        self.retrieval_context = retrieval_context
         
     def evaluate_questions(self, transcript: str, summary: str, 
-                          questions: List[dict] = None) -> dict:
+                          questions: List[dict] = None,
+                          segments: Optional[List[dict]] = None) -> dict:
         """
         Evaluate all questions against the transcript and summary.
         
@@ -38,6 +52,9 @@ class CallEvaluator:
             transcript: The full transcript text
             summary: The call summary
             questions: Optional custom questions, uses predefined if None
+            segments: Optional transcript segments; when given, questions with
+                decisive rules skip the LLM and each batch only receives the
+                turns retrieved for its questions
             
         Returns:
             Dictionary containing evaluations and scores
@@ -45,14 +62,51 @@ class CallEvaluator:
         if questions is None:
             questions = self.questions
             
-        evaluations = []
+        # Tier 1: deterministic rules. Only undecided questions go to the LLM.
+        decided = {}
+        if segments:
+            roles = infer_roles(segments)
+            for q in questions:
+                result = apply_rules(q, segments, roles)
+                if result is not None:
+                    decided[q['id']] = result
+        pending = [q for q in questions if q['id'] not in decided]
+        
+        llm_results = []
+        
+        retriever = None
+        if segments and self.retrieval_top_k > 0:
+            retriever = TranscriptRetriever(segments)
         
         # Process questions in batches for efficiency
         batch_size = 5
-        for i in range(0, len(questions), batch_size):
-            batch = questions[i:i + batch_size]
-            batch_results = self._evaluate_batch(transcript, summary, batch)
-            evaluations.extend(batch_results)
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            batch_transcript, excerpted = transcript, False
+            if retriever is not None:
+                excerpt, turns = retriever.excerpt(
+                    batch,
+                    top_k=self.retrieval_top_k,
+                    context=self.retrieval_context
+                )
+                # Only worth it when the excerpt is actually smaller than the call
+                if turns < len(segments):
+                    batch_transcript, excerpted = excerpt, True
+            batch_results = self._evaluate_batch(batch_transcript, summary, batch, excerpted)
+            llm_results.extend(batch_results)
+        
+        # Keep the configured question order regardless of which tier answered
+        by_id = {r.get('question_id'): r for r in llm_results}
+        by_id.update(decided)
+        evaluations = [by_id[q['id']] for q in questions if q['id'] in by_id]
+        known_ids = {q['id'] for q in questions}
+        evaluations.extend(r for r in llm_results if r.get('question_id') not in known_ids)
+        
+        # Link each evidence quote back to a transcript segment and timestamp
+        if segments:
+            aligner = EvidenceAligner(segments)
+            for e in evaluations:
+                aligner.annotate(e)
             
         # Calculate scores
         scores = self._calculate_scores(evaluations)
@@ -64,11 +118,12 @@ class CallEvaluator:
             "evaluations": evaluations,
             "scores": scores,
             "by_category": categorized,
-            "total_questions": len(questions)
+            "total_questions": len(questions),
+            "decided_by": dict(Counter(e.get('decided_by', 'llm') for e in evaluations))
         }
     
     def _evaluate_batch(self, transcript: str, summary: str, 
-                        questions: List[dict]) -> List[dict]:
+                        questions: List[dict], excerpted: bool = False) -> List[dict]:
         """Evaluate a batch of questions"""
         
         questions_text = "\n".join([
@@ -91,7 +146,7 @@ Respond in valid JSON format as an array of evaluations."""),
             ("human", """## Call Summary:
 {summary}
 
-## Full Transcript:
+## {transcript_heading}:
 {transcript}
 
 ## Questions to Evaluate:
@@ -114,6 +169,10 @@ Evaluate each question and respond with a JSON array:
             chain = prompt | self.llm
             response = chain.invoke({
                 "summary": summary,
+                "transcript_heading": (
+                    "Relevant Transcript Excerpts (omitted turns are marked '...')"
+                    if excerpted else "Full Transcript"
+                ),
                 "transcript": transcript,
                 "questions": questions_text
             })
@@ -130,12 +189,14 @@ Evaluate each question and respond with a JSON array:
                 results = json.loads(json_str)
                 
                 # Add category info to each result
+                by_id = {q['id']: q for q in questions}
                 for result in results:
-                    q = next((q for q in questions if q['id'] == result['question_id']), None)
+                    q = by_id.get(result['question_id'])
                     if q:
                         result['category'] = q.get('category', 'General')
                         result['question'] = q['question']
                         result['weight'] = q.get('weight', 1)
+                    result['decided_by'] = "llm"
                         
                 return results
             else:
@@ -157,7 +218,8 @@ Evaluate each question and respond with a JSON array:
                 "confidence": 0,
                 "evidence": "Evaluation failed",
                 "reasoning": "Could not evaluate due to an error",
-                "weight": q.get('weight', 1)
+                "weight": q.get('weight', 1),
+                "decided_by": "fallback"
             }
             for q in questions
         ]
@@ -0,0 +1,348 @@
+"""
+Columnar export of processed calls for analytics.
+
+Writes four tables as Hive-partitioned Parquet (or Arrow IPC) files,
+partitioned by the UTC day the job completed:
+
+    calls/day=YYYY-MM-DD/part-<run>.parquet          one row per call
+    segments/day=.../part-<run>.parquet              one row per transcript segment
+    evaluations/day=.../part-<run>.parquet           one row per evaluated question
+    speaker_stats/day=.../part-<run>.parquet         one row per call and speaker
+
+Jobs are read from the job store in pages of `batch_size` and appended to
+the open writers as record batches, so memory stays bounded regardless of
+how many jobs are exported. Each run only exports jobs completed after the
+watermark saved by the previous run (`_export_state.json` in the output
+directory) unless `full` is set; a full export re-exports every job and
+replaces the files of earlier runs. A reprocessed job is exported again by
+the next incremental run with its new `completed_at`; keep the latest row
+per job_id when reading.
+
+    python export.py --output exports/            # incremental
+    python export.py --output exports/ --full --format arrow
+
+Requires pyarrow.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from qa_rollups import day_of
+
+BASE_DIR = Path(__file__).resolve().parent
+STATE_FILE = "_export_state.json"
+FORMATS = ("parquet", "arrow")
+
+# Jobs finishing right now may commit slightly out of completed_at order;
+# leave them to the next run rather than risk skipping one.
+SETTLE_SECONDS = 5.0
+
+if pa is not None:
+    SCHEMAS = {
+        "calls": pa.schema([
+            ("job_id", pa.string()), ("filename", pa.string()), ("completed_at", pa.float64()),
+            ("audio_duration", pa.float64()), ("segments", pa.int32()), ("overall_score", pa.float64()),
+            ("grade", pa.string()), ("average_confidence", pa.float64()), ("summary", pa.string()),
+            ("questions_version", pa.int64()), ("deduplicated", pa.bool_()),
+        ]),
+        "segments": pa.schema([
+            ("job_id", pa.string()), ("completed_at", pa.float64()), ("segment", pa.int32()),
+            ("speaker", pa.string()), ("start_ms", pa.int64()), ("end_ms", pa.int64()), ("text", pa.string()),
+        ]),
+        "evaluations": pa.schema([
+            ("job_id", pa.string()), ("completed_at", pa.float64()), ("question_id", pa.string()),
+            ("question", pa.string()), ("category", pa.string()), ("status", pa.string()),
+            ("confidence", pa.float64()), ("weight", pa.float64()), ("decided_by", pa.string()),
+            ("evidence", pa.string()), ("reasoning", pa.string()),
+        ]),
+        "speaker_stats": pa.schema([
+            ("job_id", pa.string()), ("completed_at", pa.float64()), ("speaker", pa.string()),
+            ("segments", pa.int32()), ("duration", pa.float64()), ("words", pa.int64()),
+        ]),
+    }
+
+
+class ExportInProgress(RuntimeError):
+    """Another export into the same directory is running in this process."""
+
+
+# One lock per export directory
+_running: Dict[Path, threading.Lock] = {}
+_running_guard = threading.Lock()
+
+
+def _directory_lock(output_dir: Path) -> threading.Lock:
+    with _running_guard:
+        return _running.setdefault(output_dir.resolve(), threading.Lock())
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required for exports (pip install pyarrow)")
+
+
+def _ms(seconds) -> Optional[int]:
+    try:
+        return int(round(float(seconds) * 1000))
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value) -> Optional[str]:
+    """LLM answers occasionally give a list or object where text was asked for."""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def job_rows(job: dict) -> Dict[str, list]:
+    """Flatten one completed job into rows for each table."""
+    result = job["result"]
+    job_id, completed_at = job["job_id"], job["completed_at"]
+    transcript = result.get("transcript") or []
+    evaluation = result.get("evaluation") or {}
+    scores = evaluation.get("scores") or {}
+
+    return {
+        "calls": [{
+            "job_id": job_id,
+            "filename": result.get("filename") or job.get("filename"),
+            "completed_at": completed_at,
+            "audio_duration": _float((result.get("timing") or {}).get("audio_duration")),
+            "segments": len(transcript),
+            "overall_score": _float(scores.get("overall_score")),
+            "grade": scores.get("grade"),
+            "average_confidence": _float(scores.get("average_confidence")),
+            "summary": result.get("summary"),
+            "questions_version": result.get("questions_version"),
+            "deduplicated": bool(job.get("deduplicated_from")),
+        }],
+        "segments": [{
+            "job_id": job_id,
+            "completed_at": completed_at,
+            "segment": i,
+            "speaker": segment.get("speaker"),
+            "start_ms": _ms(segment.get("start")),
+            "end_ms": _ms(segment.get("end")),
+            "text": segment.get("text"),
+        } for i, segment in enumerate(transcript)],
+        "evaluations": [{
+            "job_id": job_id,
+            "completed_at": completed_at,
+            "question_id": str(e.get("question_id")),
+            "question": e.get("question"),
+            "category": e.get("category"),
+            "status": e.get("status"),
+            "confidence": _float(e.get("confidence")),
+            "weight": _float(e.get("weight")),
+            "decided_by": e.get("decided_by"),
+            "evidence": _text(e.get("evidence")),
+            "reasoning": e.get("reasoning"),
+        } for e in evaluation.get("evaluations") or [] if e.get("question_id") is not None],
+        "speaker_stats": [{
+            "job_id": job_id,
+            "completed_at": completed_at,
+            "speaker": stats.get("speaker"),
+            "segments": stats.get("segments"),
+            "duration": _float(stats.get("duration")),
+            "words": stats.get("words"),
+        } for stats in result.get("speaker_stats") or []],
+    }
+
+
+class _PartitionWriters:
+    """One open file per (table, day) for the current run, appended to batch by batch."""
+
+    def __init__(self, output_dir: Path, run_id: str, fmt: str):
+        self.output_dir = output_dir
+        self.run_id = run_id
+        self.fmt = fmt
+        self._writers = {}
+        self.files = []
+        self.rows = {table: 0 for table in SCHEMAS}
+
+    def write(self, table: str, day: str, rows: list):
+        if not rows:
+            return
+        key = (table, day)
+        writer = self._writers.get(key)
+        if writer is None:
+            directory = self.output_dir / table / f"day={day}"
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"part-{self.run_id}.{self.fmt}"
+            # Written under a temporary name and renamed on close, so readers never see partial files
+            tmp = path.with_name(f".{path.name}.tmp")
+            if self.fmt == "parquet":
+                writer = pq.ParquetWriter(str(tmp), SCHEMAS[table], compression="zstd")
+            else:
+                writer = pa.ipc.new_file(str(tmp), SCHEMAS[table])
+            self._writers[key] = writer
+            self.files.append((tmp, path))
+        batch = pa.RecordBatch.from_pylist(rows, schema=SCHEMAS[table])
+        if self.fmt == "parquet":
+            writer.write_batch(batch)
+        else:
+            writer.write(batch)
+        self.rows[table] += len(rows)
+
+    def close(self, commit: bool = True):
+        for writer in self._writers.values():
+            writer.close()
+        for tmp, path in self.files:
+            if commit:
+                os.replace(tmp, path)
+            else:
+                tmp.unlink(missing_ok=True)
+
+    def remove_previous(self):
+        """Delete the files of earlier runs (after a full export replaced them)."""
+        current = {path for _, path in self.files}
+        for table in SCHEMAS:
+            for path in (self.output_dir / table).glob("day=*/part-*"):
+                if path not in current:
+                    path.unlink()
+            for directory in (self.output_dir / table).glob("day=*"):
+                if not any(directory.iterdir()):
+                    directory.rmdir()
+
+
+def load_state(output_dir: Path) -> dict:
+    path = output_dir / STATE_FILE
+    if not path.exists():
+        return {"watermark": 0.0, "job_id": "", "runs": []}
+    return json.loads(path.read_text())
+
+
+def _save_state(output_dir: Path, state: dict):
+    path = output_dir / STATE_FILE
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(state, indent=2))
+    os.replace(tmp, path)
+
+
+def export_results(store, output_dir, fmt: str = "parquet", full: bool = False,
+                   batch_size: int = 200) -> dict:
+    """
+    Export completed jobs to partitioned columnar files.
+
+    Args:
+        store: JobStore to read from
+        output_dir: Export root (tables are subdirectories)
+        fmt: "parquet" or "arrow" (Arrow IPC file)
+        full: Export every completed job, ignoring the saved watermark, and
+            replace the files of earlier runs
+        batch_size: Jobs read and converted per batch
+
+    Returns:
+        Summary of the run: jobs and rows per table exported, files written,
+        and the new watermark
+    """
+    _require_pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    lock = _directory_lock(output_dir)
+    if not lock.acquire(blocking=False):
+        raise ExportInProgress(f"An export into {output_dir} is already running")
+    try:
+        state = load_state(output_dir)
+        after, after_job_id = (0.0, "") if full else (state["watermark"], state["job_id"])
+        until = time.time() - SETTLE_SECONDS
+
+        started = time.time()
+        run_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(started))}-{uuid.uuid4().hex[:6]}"
+        writers = _PartitionWriters(output_dir, run_id, fmt)
+        jobs = 0
+        try:
+            while True:
+                page = store.completed_results(after, after_job_id, until, batch_size)
+                if not page:
+                    break
+                # Group the page's rows per table and day, then append one batch each
+                grouped: Dict[tuple, list] = {}
+                for job in page:
+                    day = day_of(job["completed_at"])
+                    for table, rows in job_rows(job).items():
+                        grouped.setdefault((table, day), []).extend(rows)
+                for (table, day), rows in grouped.items():
+                    writers.write(table, day, rows)
+                jobs += len(page)
+                after, after_job_id = page[-1]["completed_at"], page[-1]["job_id"]
+        except BaseException:
+            writers.close(commit=False)
+            raise
+        writers.close()
+        if full:
+            writers.remove_previous()
+
+        summary = {
+            "run_id": run_id,
+            "format": fmt,
+            "full": full,
+            "jobs": jobs,
+            "rows": writers.rows,
+            "files": [str(path.relative_to(output_dir)) for _, path in writers.files],
+            "watermark": after,
+            "seconds": round(time.time() - started, 3),
+        }
+        if jobs or full:
+            state.update(watermark=after, job_id=after_job_id)
+        state["runs"] = (state.get("runs", []) + [{key: summary[key] for key in
+                                                   ("run_id", "format", "full", "jobs", "rows", "watermark")}])[-50:]
+        _save_state(output_dir, state)
+        return summary
+    finally:
+        lock.release()
+
+
+def export_dir_from_env() -> Path:
+    return Path(os.getenv("EXPORT_DIR", str(BASE_DIR / "data" / "export")))
+
+
+def main():
+    from job_store import JobStore
+    from worker import DEFAULT_DB_PATH
+
+    parser = argparse.ArgumentParser(description="Export transcripts and evaluations to Parquet/Arrow")
+    parser.add_argument("--output", default=str(export_dir_from_env()), help="Export directory")
+    parser.add_argument("--db", default=os.getenv("JOB_DB_PATH", str(DEFAULT_DB_PATH)),
+                        help="Path to the job store database")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--full", action="store_true",
+                        help="Export all jobs, replacing earlier exports, not just those since the last run")
+    parser.add_argument("--batch-size", type=int, default=200, help="Jobs per batch")
+    args = parser.parse_args()
+
+    store = JobStore(args.db)
+    try:
+        summary = export_results(store, args.output, args.format, args.full, args.batch_size)
+    finally:
+        store.close()
+    rows = ", ".join(f"{n} {table}" for table, n in summary["rows"].items())
+    print(f"Exported {summary['jobs']} job(s) ({rows}) to {args.output} in {summary['seconds']}s")
+    for path in summary["files"]:
+        print(f"  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Background retention and garbage collection.
+
+Periodically, and without touching queued or running jobs:
+
+- deletes finished jobs (record + upload + renditions) not accessed for
+  JOB_TTL_HOURS, and uploads never processed within PENDING_TTL_HOURS,
+- evicts least recently used finished jobs while the upload directory is over
+  DISK_QUOTA_MB,
+- removes orphaned files: abandoned `.part` uploads, files no job refers to,
+  and stale segment files under NEMO_TEMP_DIR (the NeMo embedder's scratch
+  directory, only when configured),
+- prunes progress events of finished jobs and checkpoints the SQLite WAL,
+- adds completed jobs missing from the transcript search index or the QA
+  rollups (finished before they existed), a batch per sweep.
+
+The numbers from the last sweep are exposed through `/health`.
+"""
+
+import gc
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from job_store import JobStore
+from pipeline import job_files, remove_job
+
+HOUR = 3600.0
+MB = 1024 * 1024
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+class Janitor:
+    def __init__(self, store: JobStore, upload_dir: Path, temp_dirs: Iterable[Path] = (),
+                 job_ttl: float = 0, pending_ttl: float = 24 * HOUR,
+                 temp_ttl: float = HOUR, disk_quota: int = 0, interval: float = 300.0):
+        """
+        Args:
+            store: Job store to clean
+            upload_dir: Directory holding uploads and their derived files
+            temp_dirs: Scratch directories whose stale files are removed
+            job_ttl: Seconds since last access before a finished job is deleted (0 = keep)
+            pending_ttl: Seconds before an upload that was never processed is deleted (0 = keep)
+            temp_ttl: Age in seconds after which scratch and orphaned files are removed
+            disk_quota: Maximum bytes in `upload_dir` (0 = unlimited)
+            interval: Seconds between sweeps
+        """
+        self.store = store
+        self.upload_dir = Path(upload_dir)
+        self.temp_dirs = [Path(d) for d in temp_dirs]
+        self.job_ttl = job_ttl
+        self.pending_ttl = pending_ttl
+        self.temp_ttl = temp_ttl
+        self.disk_quota = disk_quota
+        self.interval = interval
+
+        self.last_sweep = {}
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._loop, name="janitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Janitor sweep failed: {e}")
+
+    def sweep(self) -> dict:
+        """Run one cleanup pass and return what it did."""
+        started = time.time()
+        expired = self._expire_jobs(started)
+        orphans = self._remove_orphans(started)
+        evicted, upload_bytes = self._enforce_quota()
+        self.store.prune_events(started - HOUR)
+        indexed = self.store.index_missing()
+        self.store.checkpoint()
+        gc.collect()
+
+        self.last_sweep = {
+            "at": started,
+            "duration": round(time.time() - started, 3),
+            "expired_jobs": expired,
+            "evicted_jobs": evicted,
+            "orphaned_files": orphans,
+            "upload_bytes": upload_bytes,
+            "indexed_jobs": indexed,
+        }
+        if expired or evicted or orphans or indexed:
+            print(f"Janitor: expired {expired} job(s), evicted {evicted}, removed {orphans} orphaned file(s), "
+                  f"indexed {indexed} for search/analytics")
+        return self.last_sweep
+
+    def usage(self) -> dict:
+        """Current disk and memory usage for /health."""
+        disk = shutil.disk_usage(self.upload_dir)
+        usage = {
+            "upload_bytes": _dir_size(self.upload_dir),
+            "disk_quota_bytes": self.disk_quota or None,
+            "database_bytes": self.store.database_size(),
+            "disk_free_bytes": disk.free,
+            "jobs": self.store.count_by_status(),
+            "search_index": self.store.search_stats() if self.store.search_enabled else None,
+            "last_sweep": self.last_sweep or None,
+        }
+        try:
+            import psutil
+            usage["rss_bytes"] = psutil.Process().memory_info().rss
+        except ImportError:
+            pass
+        return usage
+
+    # ---------------------------------------------------------------- passes
+
+    def _expire_jobs(self, now: float) -> int:
+        expired = []
+        if self.pending_ttl > 0:
+            expired += self.store.stale_uploads(now - self.pending_ttl)
+        if self.job_ttl > 0:
+            for job in self.store.eviction_candidates(limit=500):
+                if job["last_used"] is None or job["last_used"] >= now - self.job_ttl:
+                    break
+                expired.append(job["job_id"])
+        return sum(remove_job(self.store, job_id) for job_id in expired)
+
+    def _enforce_quota(self):
+        """
+        Evict least recently used finished jobs until the uploads fit the quota.
+
+        Files of queued or running jobs cannot be evicted; if they alone keep
+        the uploads over the quota, nothing is evicted and a warning is logged.
+        """
+        used = _dir_size(self.upload_dir)
+        if not self.disk_quota or used <= self.disk_quota:
+            return 0, used
+
+        candidates = [(job, job_files(self.store, job)) for job in self.store.eviction_candidates(limit=-1)]
+        reclaimable = sum(_job_bytes(paths) for _, paths in candidates)
+        if used - reclaimable > self.disk_quota:
+            print(f"Janitor: uploads use {used / MB:.0f} MB, over the {self.disk_quota / MB:.0f} MB quota, "
+                  f"but finished jobs own only {reclaimable / MB:.0f} MB; not evicting")
+            return 0, used
+
+        evicted = 0
+        for job, paths in candidates:
+            owned = _job_bytes(paths)
+            if not owned:
+                continue
+            remove_job(self.store, job["job_id"])
+            evicted += 1
+            freed = owned - _job_bytes(paths)
+            used -= freed
+            if freed <= 0:
+                print(f"Janitor: evicting {job['job_id']} freed no space; stopping quota enforcement")
+                break
+            if used <= self.disk_quota:
+                break
+        return evicted, used
+
+    def _remove_orphans(self, now: float) -> int:
+        cutoff = now - self.temp_ttl
+        removed = 0
+        for path in _files(self.upload_dir):
+            # Upload files are named "<job_id><suffix>"; job ids are 36-char UUIDs
+            if _mtime(path) < cutoff and not self.store.exists(path.name[:36]):
+                removed += _remove(path)
+        for temp_dir in self.temp_dirs:
+            for path in _files(temp_dir, recursive=True):
+                if _mtime(path) < cutoff:
+                    removed += _remove(path)
+            _remove_empty_dirs(temp_dir)
+        return removed
+
+
+def _files(directory: Path, recursive: bool = False) -> List[Path]:
+    if not directory.is_dir():
+        return []
+    pattern = directory.rglob("*") if recursive else directory.iterdir()
+    return [path for path in pattern if path.is_file()]
+
+
+def _job_bytes(paths: List[str]) -> int:
+    return sum(_size(Path(path)) for path in paths)
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _dir_size(directory: Path) -> int:
+    return sum(_size(path) for path in _files(directory))
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return float("inf")
+
+
+def _remove(path: Path) -> int:
+    try:
+        path.unlink()
+        return 1
+    except OSError:
+        return 0
+
+
+def _remove_empty_dirs(directory: Path):
+    if not directory.is_dir():
+        return
+    for path in sorted(directory.rglob("*"), key=lambda p: len(p.parts), reverse=True):
+        if path.is_dir():
+            try:
+                path.rmdir()
+            except OSError:
+                pass
+
+
+def janitor_from_env(store: JobStore, upload_dir: Path) -> Janitor:
+    """Build a janitor configured by JOB_TTL_HOURS, PENDING_TTL_HOURS, TEMP_TTL_HOURS,
+    DISK_QUOTA_MB, NEMO_TEMP_DIR and JANITOR_INTERVAL (seconds, 0 disables the
+    background thread). Job TTL and disk quota are off (0) unless set."""
+    temp_dir = os.getenv("NEMO_TEMP_DIR")
+    return Janitor(
+        store,
+        upload_dir,
+        [Path(temp_dir)] if temp_dir else [],
+        job_ttl=_env_float("JOB_TTL_HOURS", 0) * HOUR,
+        pending_ttl=_env_float("PENDING_TTL_HOURS", 24) * HOUR,
+        temp_ttl=_env_float("TEMP_TTL_HOURS", 1) * HOUR,
+        disk_quota=int(_env_float("DISK_QUOTA_MB", 0) * MB),
+        interval=_env_float("JANITOR_INTERVAL", 300),
+    )
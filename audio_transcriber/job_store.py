@@ -0,0 +1,713 @@
+"""
+Persistent job store backed by SQLite.
+
+Replaces the in-memory `jobs` dict in app.py so job state survives restarts
+and is shared by every uvicorn worker process. Job metadata lives in the
+`jobs` table; the (large) result payload lives in `job_results`, serialized
+and gzip-compressed once when the job completes, and is only loaded when
+asked for. Progress updates are coalesced in memory and flushed
+in a single transaction every `flush_interval` seconds, while status changes
+are written through immediately. Each pipeline stage's output is kept in
+`job_stages` so the next stage (possibly in another process) can pick it up.
+Completed transcripts are added to the full-text index (`search_index.py`)
+and evaluations to the QA rollups (`qa_rollups.py`) in the same transaction
+as their result. Jobs that reused an identical earlier upload's outputs
+(`deduplicated_from`) are left out of both, so a call is only counted once.
+"""
+
+import gzip
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import qa_rollups
+import search_index
+
+# Metadata columns of the `jobs` table. New columns are added to existing
+# databases automatically on startup.
+JOB_COLUMNS = {
+    "status": "TEXT NOT NULL DEFAULT 'pending'",
+    "progress": "INTEGER NOT NULL DEFAULT 0",
+    "message": "TEXT NOT NULL DEFAULT ''",
+    "file_path": "TEXT",
+    "filename": "TEXT",
+    "created_at": "REAL",
+    "updated_at": "REAL",
+    "completed_at": "REAL",
+    "priority": "INTEGER NOT NULL DEFAULT 0",
+    "enqueued_at": "REAL",
+    "started_at": "REAL",
+    "claimed_by": "TEXT",
+    "questions": "TEXT",
+    "questions_version": "INTEGER",
+    "profiler": "TEXT",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "stage": "TEXT",
+    "file_size": "INTEGER",
+    "content_hash": "TEXT",
+    "questions_hash": "TEXT",
+    "pipeline_version": "TEXT",
+    "deduplicated_from": "TEXT",
+    "last_accessed_at": "REAL",
+}
+
+JOB_INDEXES = {
+    "idx_jobs_status": "jobs(status, updated_at)",
+    "idx_jobs_created": "jobs(created_at)",
+    "idx_jobs_queue": "jobs(status, stage, priority, enqueued_at)",
+    "idx_jobs_completed": "jobs(completed_at)",
+    "idx_jobs_content": "jobs(content_hash, pipeline_version, status)",
+}
+
+# Fields that are safe to coalesce; anything else is written through.
+BUFFERED_FIELDS = {"progress", "message"}
+
+
+class JobStore:
+    def __init__(self, db_path, flush_interval: float = 0.5):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, dict] = {}
+        self._closed = threading.Event()
+
+        self._init_schema()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="job-store-flush", daemon=True)
+        self._flusher.start()
+
+    # ------------------------------------------------------------------ setup
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers and a writer work concurrently."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_results ("
+            "job_id TEXT PRIMARY KEY, "
+            "result TEXT NOT NULL)"
+        )
+        result_columns = {row["name"] for row in conn.execute("PRAGMA table_info(job_results)")}
+        for name, decl in (("result_gzip", "BLOB"), ("etag", "TEXT")):
+            if name not in result_columns:
+                conn.execute(f"ALTER TABLE job_results ADD COLUMN {name} {decl}")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_stages ("
+            "job_id TEXT NOT NULL, stage TEXT NOT NULL, output TEXT NOT NULL, "
+            "completed_at REAL, PRIMARY KEY (job_id, stage))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, "
+            "type TEXT NOT NULL, data TEXT NOT NULL, created_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events(job_id, id)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS instances ("
+            "instance_id TEXT PRIMARY KEY, pid INTEGER, host TEXT, "
+            "started_at REAL, heartbeat_at REAL)"
+        )
+        # The queue index gained the stage column; rebuild older versions of it
+        queue_index = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_jobs_queue'"
+        ).fetchone()
+        if queue_index and "stage" not in queue_index["sql"]:
+            conn.execute("DROP INDEX idx_jobs_queue")
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for name, decl in JOB_COLUMNS.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {decl}")
+        for name, target in JOB_INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+        self.search_enabled = search_index.init_schema(conn)
+        qa_rollups.init_schema(conn)
+
+    # ----------------------------------------------------------------- writes
+
+    def create(self, job_id: str, **fields) -> dict:
+        """Insert a new job row."""
+        now = time.time()
+        row = {"status": "pending", "progress": 0, "message": "", **fields,
+               "created_at": now, "updated_at": now}
+        self._check_columns(row)
+        columns = ", ".join(["job_id", *row])
+        placeholders = ", ".join("?" * (len(row) + 1))
+        self._connect().execute(
+            f"INSERT INTO jobs ({columns}) VALUES ({placeholders})",
+            [job_id, *row.values()],
+        )
+        return {"job_id": job_id, **row}
+
+    def update(self, job_id: str, **fields):
+        """
+        Update job metadata.
+
+        Progress/message-only updates are buffered and flushed in batches;
+        any other field (e.g. status) forces an immediate write of everything
+        pending for the job so ordering is preserved.
+        """
+        self._check_columns(fields)
+        with self._lock:
+            pending = self._pending.setdefault(job_id, {})
+            pending.update(fields)
+            pending["updated_at"] = time.time()
+        if not set(fields) <= BUFFERED_FIELDS:
+            self.flush()
+
+    def touch(self, job_id: str):
+        """Record that a job's result or audio was accessed (buffered, for LRU eviction)."""
+        with self._lock:
+            self._pending.setdefault(job_id, {})["last_accessed_at"] = time.time()
+
+    def set_result(self, job_id: str, result: dict, **fields):
+        """Store the result payload and mark the job completed in one transaction."""
+        self._check_columns(fields)
+        payload = json.dumps(result, ensure_ascii=False)
+        # Serialize and compress once here rather than on every request
+        encoded = payload.encode("utf-8")
+        compressed = gzip.compress(encoded, compresslevel=6)
+        etag = hashlib.sha256(encoded).hexdigest()[:20]
+        now = time.time()
+        row = {"status": "completed", "progress": 100, "claimed_by": None, **fields,
+               "completed_at": now, "updated_at": now}
+        with self._write_job(job_id, row) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_results (job_id, result, result_gzip, etag) "
+                "VALUES (?, ?, ?, ?)",
+                (job_id, payload, compressed, etag),
+            )
+            if "deduplicated_from" in fields:
+                deduplicated = fields["deduplicated_from"]
+            else:
+                deduplicated = conn.execute(
+                    "SELECT deduplicated_from FROM jobs WHERE job_id = ?", (job_id,)
+                ).fetchone()["deduplicated_from"]
+            if deduplicated:
+                # The original call is already counted; drop anything an earlier run of this job added
+                if self.search_enabled:
+                    search_index.remove(conn, job_id)
+                qa_rollups.remove(conn, job_id)
+            else:
+                if self.search_enabled:
+                    search_index.index_result(conn, job_id, result, now)
+                qa_rollups.record_result(conn, job_id, result, now)
+
+    def complete_stage(self, job_id: str, stage: str, output: dict,
+                       next_stage: str, **fields):
+        """
+        Persist a stage's output and hand the job to the next stage's queue
+        in one transaction.
+        """
+        self._check_columns(fields)
+        payload = json.dumps(output, ensure_ascii=False)
+        now = time.time()
+        row = {"status": "queued", "stage": next_stage, "claimed_by": None,
+               "attempts": 0, **fields, "updated_at": now}
+        with self._write_job(job_id, row) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_stages (job_id, stage, output, completed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (job_id, stage, payload, now),
+            )
+
+    @contextmanager
+    def _write_job(self, job_id: str, row: dict):
+        """
+        Transaction that applies `row` (merged over any buffered updates for
+        the job) to the jobs table; extra statements can run inside it.
+        """
+        with self._flush_lock:
+            with self._lock:
+                row = {**self._pending.pop(job_id, {}), **row}
+            conn = self._connect()
+            with self._transaction(conn):
+                yield conn
+                conn.execute(
+                    f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in row)} WHERE job_id = ?",
+                    [*row.values(), job_id],
+                )
+
+    def delete(self, job_id: str, forget_analytics: bool = False) -> bool:
+        """
+        Remove a job and its result. Returns False if it did not exist.
+
+        The call stays in the QA rollups (retention keeps their history)
+        unless `forget_analytics` is set, as for an explicit delete.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._pending.pop(job_id, None)
+            conn = self._connect()
+            with self._transaction(conn):
+                conn.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM job_stages WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+                if self.search_enabled:
+                    search_index.remove(conn, job_id)
+                if forget_analytics:
+                    qa_rollups.remove(conn, job_id)
+                cursor = conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        return cursor.rowcount > 0
+
+    def flush(self):
+        """Write all buffered updates in a single transaction."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            conn = self._connect()
+            with self._transaction(conn):
+                for job_id, fields in pending.items():
+                    conn.execute(
+                        f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE job_id = ?",
+                        [*fields.values(), job_id],
+                    )
+
+    # ------------------------------------------------------------------ queue
+
+    def enqueue(self, job_id: str, priority: int, max_queue: int, defer: bool = False,
+                stage: Optional[str] = None) -> Optional[str]:
+        """
+        Admit a job to the queue.
+
+        Admission is checked and applied in one transaction so concurrent API
+        workers cannot overfill the queue. Only jobs that have not started
+        count towards `max_queue`; jobs in flight between stages do not.
+
+        Returns:
+            "queued", "deferred" (queue full, parked until space frees up) or
+            None when the queue is full and deferral was not allowed
+        """
+        self.flush()
+        conn = self._connect()
+        now = time.time()
+        with self._transaction(conn):
+            depth = self._waiting(conn)
+            if depth < max_queue:
+                status = "queued"
+            elif defer:
+                status = "deferred"
+            else:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, priority = ?, enqueued_at = ?, updated_at = ?, "
+                "progress = 0, attempts = 0, started_at = NULL, claimed_by = NULL WHERE job_id = ?",
+                (status, stage, priority, now, now, job_id),
+            )
+        return status
+
+    @staticmethod
+    def _waiting(conn: sqlite3.Connection) -> int:
+        """Queued jobs that have not started yet (new, or resumed at a later stage)."""
+        return conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND started_at IS NULL"
+        ).fetchone()[0]
+
+    def promote_deferred(self, max_queue: int) -> int:
+        """Move deferred jobs into the queue while there is room. Returns how many moved."""
+        conn = self._connect()
+        with self._transaction(conn):
+            depth = self._waiting(conn)
+            room = max_queue - depth
+            if room <= 0:
+                return 0
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE job_id IN ("
+                "SELECT job_id FROM jobs WHERE status = 'deferred' "
+                "ORDER BY priority, enqueued_at LIMIT ?)",
+                (time.time(), room),
+            )
+        return cursor.rowcount
+
+    def claim_next(self, worker_id: str, stage: Optional[str] = None) -> Optional[dict]:
+        """
+        Atomically take the highest-priority, oldest queued job (waiting at
+        `stage`, if given) and mark it processing.
+        """
+        conn = self._connect()
+        now = time.time()
+        stage_filter, params = ("AND stage = ? ", (stage,)) if stage else ("", ())
+        with self._transaction(conn):
+            row = conn.execute(
+                f"SELECT job_id FROM jobs WHERE status = 'queued' {stage_filter}"
+                "ORDER BY priority, enqueued_at LIMIT 1",
+                params,
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'processing', claimed_by = ?, "
+                "started_at = COALESCE(started_at, ?), updated_at = ?, "
+                "attempts = attempts + 1 WHERE job_id = ?",
+                (worker_id, now, now, row["job_id"]),
+            )
+        return self.get(row["job_id"])
+
+    def requeue_claimed(self, claimed_by: List[str], max_attempts: int = 3) -> int:
+        """
+        Put processing jobs claimed by the given (dead) workers back at the
+        front of their priority. Jobs that already used `max_attempts` are
+        failed instead, so a job that crashes its worker cannot loop forever.
+        """
+        if not claimed_by:
+            return 0
+        self.flush()
+        conn = self._connect()
+        placeholders = ", ".join("?" * len(claimed_by))
+        now = time.time()
+        with self._transaction(conn):
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', claimed_by = NULL, "
+                "message = 'Error: worker died while processing this job', updated_at = ? "
+                f"WHERE status = 'processing' AND attempts >= ? AND claimed_by IN ({placeholders})",
+                [now, max_attempts, *claimed_by],
+            )
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', claimed_by = NULL, "
+                "message = 'Re-queued after worker restart', updated_at = ? "
+                f"WHERE status = 'processing' AND claimed_by IN ({placeholders})",
+                [now, *claimed_by],
+            )
+        return cursor.rowcount
+
+    def claimants(self) -> List[str]:
+        """Distinct worker ids currently holding processing jobs."""
+        rows = self._connect().execute(
+            "SELECT DISTINCT claimed_by FROM jobs WHERE status = 'processing' AND claimed_by IS NOT NULL"
+        )
+        return [row["claimed_by"] for row in rows]
+
+    def register_instance(self, instance_id: str, pid: int, host: str):
+        """Record a live scheduler/worker instance whose id prefixes its claims."""
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO instances (instance_id, pid, host, started_at, heartbeat_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (instance_id, pid, host, now, now),
+        )
+
+    def heartbeat_instance(self, instance_id: str):
+        self._connect().execute(
+            "UPDATE instances SET heartbeat_at = ? WHERE instance_id = ?", (time.time(), instance_id)
+        )
+
+    def unregister_instance(self, instance_id: str):
+        self._connect().execute("DELETE FROM instances WHERE instance_id = ?", (instance_id,))
+
+    def live_instances(self, since: float) -> Dict[str, dict]:
+        """Instances that sent a heartbeat after `since`, by id. Older rows are dropped."""
+        conn = self._connect()
+        conn.execute("DELETE FROM instances WHERE heartbeat_at < ?", (since - 24 * 3600,))
+        rows = conn.execute("SELECT * FROM instances WHERE heartbeat_at >= ?", (since,))
+        return {row["instance_id"]: dict(row) for row in rows}
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """Number of jobs queued ahead of this one at its stage, or None if it is not queued."""
+        job = self.get(job_id)
+        if job is None or job["status"] != "queued":
+            return None
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND stage IS ? AND "
+            "(priority < ? OR (priority = ? AND enqueued_at < ?))",
+            (job["stage"], job["priority"], job["priority"], job["enqueued_at"]),
+        ).fetchone()[0]
+
+    def count_by_status(self) -> Dict[str, int]:
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {row["status"]: row["n"] for row in rows}
+
+    def queued_by_stage(self) -> Dict[str, int]:
+        """Number of queued jobs waiting at each stage."""
+        rows = self._connect().execute(
+            "SELECT stage, COUNT(*) AS n FROM jobs WHERE status = 'queued' GROUP BY stage"
+        )
+        return {row["stage"]: row["n"] for row in rows}
+
+    def average_duration(self, sample: int = 20) -> Optional[float]:
+        """Mean processing time (seconds) of the most recently completed jobs."""
+        row = self._connect().execute(
+            "SELECT AVG(completed_at - started_at) FROM ("
+            "SELECT completed_at, started_at FROM jobs WHERE status = 'completed' "
+            "AND started_at IS NOT NULL ORDER BY completed_at DESC LIMIT ?)",
+            (sample,),
+        ).fetchone()
+        return row[0]
+
+    # ------------------------------------------------------------------ reads
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Job metadata (without the result payload), including unflushed updates."""
+        row = self._connect().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        with self._lock:
+            job.update(self._pending.get(job_id, {}))
+        return job
+
+    def get_stage_output(self, job_id: str, stage: str) -> Optional[dict]:
+        """Output persisted by a completed pipeline stage."""
+        row = self._connect().execute(
+            "SELECT output FROM job_stages WHERE job_id = ? AND stage = ?", (job_id, stage)
+        ).fetchone()
+        return json.loads(row["output"]) if row else None
+
+    def completed_stages(self, job_id: str) -> List[str]:
+        """Names of the pipeline stages whose output is persisted for a job."""
+        rows = self._connect().execute(
+            "SELECT stage FROM job_stages WHERE job_id = ?", (job_id,)
+        ).fetchall()
+        return [row["stage"] for row in rows]
+
+    def copy_stages(self, source_job_id: str, job_id: str, stages: List[str]) -> List[str]:
+        """Copy persisted stage outputs from another job. Returns the stages copied."""
+        placeholders = ", ".join("?" * len(stages))
+        conn = self._connect()
+        with self._transaction(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO job_stages (job_id, stage, output, completed_at) "
+                f"SELECT ?, stage, output, completed_at FROM job_stages "
+                f"WHERE job_id = ? AND stage IN ({placeholders})",
+                (job_id, source_job_id, *stages),
+            )
+        return self.completed_stages(job_id)
+
+    def clear_stages(self, job_id: str):
+        """Drop persisted stage outputs so the next run starts from scratch."""
+        self._connect().execute("DELETE FROM job_stages WHERE job_id = ?", (job_id,))
+
+    def get_result(self, job_id: str) -> Optional[dict]:
+        """Load the stored result payload for a job."""
+        row = self._connect().execute(
+            "SELECT result FROM job_results WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def get_result_payload(self, job_id: str) -> Optional[dict]:
+        """
+        The serialized result as stored: `result` (JSON text), `result_gzip`
+        and `etag`. Results stored before compression was added get them
+        computed on the fly.
+        """
+        row = self._connect().execute(
+            "SELECT result, result_gzip, etag FROM job_results WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        payload = dict(row)
+        if payload["etag"] is None:
+            encoded = payload["result"].encode("utf-8")
+            payload["etag"] = hashlib.sha256(encoded).hexdigest()[:20]
+            payload["result_gzip"] = gzip.compress(encoded, compresslevel=6)
+        return payload
+
+    def find_duplicate(self, job_id: str, content_hash: str, pipeline_version: str,
+                       questions_hash: Optional[str] = None) -> Optional[dict]:
+        """
+        Most recent completed job with the same audio and pipeline version,
+        preferring one that was evaluated against the same question set.
+        Jobs whose evaluation fell back to N/A answers (the LLM failed) are
+        never reused, so a new upload gets a real evaluation.
+        """
+        row = self._connect().execute(
+            "SELECT * FROM jobs WHERE content_hash = ? AND pipeline_version = ? "
+            "AND status = 'completed' AND job_id != ? "
+            "AND NOT EXISTS (SELECT 1 FROM job_results r, "
+            "json_each(r.result, '$.evaluation.evaluations') e "
+            "WHERE r.job_id = jobs.job_id AND json_extract(e.value, '$.decided_by') = 'fallback') "
+            "ORDER BY questions_hash IS ? DESC, completed_at DESC LIMIT 1",
+            (content_hash, pipeline_version, job_id, questions_hash),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def completed_results(self, after: float = 0.0, after_job_id: str = "", until: Optional[float] = None,
+                          limit: int = 200) -> List[dict]:
+        """
+        Completed jobs with their results, in (completed_at, job_id) order,
+        starting after the given position. Used to page through results in
+        bounded batches (see export.py).
+        """
+        rows = self._connect().execute(
+            "SELECT j.job_id, j.filename, j.completed_at, j.deduplicated_from, r.result FROM jobs j "
+            "JOIN job_results r ON r.job_id = j.job_id "
+            "WHERE j.status = 'completed' AND (j.completed_at > ? OR (j.completed_at = ? AND j.job_id > ?)) "
+            "AND j.completed_at <= ? ORDER BY j.completed_at, j.job_id LIMIT ?",
+            (after, after, after_job_id, until if until is not None else float("inf"), limit),
+        ).fetchall()
+        return [{**dict(row), "result": json.loads(row["result"])} for row in rows]
+
+    def exists(self, job_id: str) -> bool:
+        return self._connect().execute(
+            "SELECT 1 FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone() is not None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 100) -> List[dict]:
+        """Most recent jobs first, optionally filtered by status."""
+        if status is None:
+            rows = self._connect().execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            )
+        else:
+            rows = self._connect().execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                (status, limit),
+            )
+        return [dict(row) for row in rows]
+
+    def eviction_candidates(self, limit: int = 100) -> List[dict]:
+        """Finished jobs, least recently used first."""
+        self.flush()
+        rows = self._connect().execute(
+            "SELECT job_id, status, file_path, "
+            "COALESCE(last_accessed_at, completed_at, updated_at) AS last_used "
+            "FROM jobs WHERE status IN ('completed', 'failed') ORDER BY last_used LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stale_uploads(self, older_than: float) -> List[str]:
+        """Jobs uploaded before `older_than` that were never processed."""
+        rows = self._connect().execute(
+            "SELECT job_id FROM jobs WHERE status = 'pending' AND created_at < ?", (older_than,)
+        ).fetchall()
+        return [row["job_id"] for row in rows]
+
+    def database_size(self) -> int:
+        """Bytes used by the database file and its WAL."""
+        return sum(
+            path.stat().st_size
+            for path in (Path(self.db_path), Path(f"{self.db_path}-wal"))
+            if path.exists()
+        )
+
+    def checkpoint(self):
+        """Fold the WAL back into the database so it does not grow unbounded."""
+        self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # ---------------------------------------------------------------- search
+
+    def search(self, query: str, **filters) -> List[dict]:
+        """Ranked transcript segments matching an FTS5 query (see `search_index.search`)."""
+        return search_index.search(self._connect(), query, **filters)
+
+    def search_stats(self) -> dict:
+        """Calls and segments in the search index."""
+        return search_index.stats(self._connect())
+
+    def index_missing(self, limit: int = 200) -> int:
+        """
+        Add completed jobs missing from the search index or the QA rollups
+        (finished before they existed). Returns how many jobs were indexed.
+        Deduplicated jobs are skipped, as in `set_result`.
+        """
+        missing = ["r.job_id NOT IN (SELECT job_id FROM qa_calls)"]
+        if self.search_enabled:
+            missing.append("r.job_id NOT IN (SELECT job_id FROM search_jobs)")
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT r.job_id, r.result, j.completed_at FROM job_results r "
+            "JOIN jobs j ON j.job_id = r.job_id WHERE j.status = 'completed' "
+            f"AND j.deduplicated_from IS NULL AND ({' OR '.join(missing)}) LIMIT ?",
+            (limit,),
+        ).fetchall()
+        for row in rows:
+            result = json.loads(row["result"])
+            with self._transaction(conn):
+                if self.search_enabled:
+                    search_index.index_result(conn, row["job_id"], result, row["completed_at"])
+                qa_rollups.record_result(conn, row["job_id"], result, row["completed_at"])
+        return len(rows)
+
+    # ------------------------------------------------------------- analytics
+
+    def qa_analytics(self, **filters) -> dict:
+        """QA pass rates, scores and grades across calls (see `qa_rollups.query`)."""
+        return qa_rollups.query(self._connect(), **filters)
+
+    # ---------------------------------------------------------------- events
+
+    def add_event(self, job_id: str, event_type: str, data: dict) -> int:
+        """Append an event (e.g. a transcribed segment) for live progress streams."""
+        cursor = self._connect().execute(
+            "INSERT INTO job_events (job_id, type, data, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, event_type, json.dumps(data, ensure_ascii=False), time.time()),
+        )
+        return cursor.lastrowid
+
+    def events_since(self, job_id: str, after_id: int = 0, limit: int = 500) -> List[dict]:
+        """Events for a job with id greater than `after_id`, oldest first."""
+        rows = self._connect().execute(
+            "SELECT id, type, data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (job_id, after_id, limit),
+        ).fetchall()
+        return [{"id": row["id"], "type": row["type"], "data": json.loads(row["data"])} for row in rows]
+
+    def clear_events(self, job_id: str):
+        self._connect().execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+
+    def prune_events(self, older_than: float) -> int:
+        """Drop events of finished jobs; they only matter while a job is running."""
+        cursor = self._connect().execute(
+            "DELETE FROM job_events WHERE created_at < ? AND job_id IN ("
+            "SELECT job_id FROM jobs WHERE status IN ('completed', 'failed'))",
+            (older_than,),
+        )
+        return cursor.rowcount
+
+    # ---------------------------------------------------------------- helpers
+
+    def _check_columns(self, fields: dict):
+        unknown = set(fields) - set(JOB_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+
+    def _transaction(self, conn: sqlite3.Connection):
+        return _Transaction(conn)
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"Job store flush failed: {e}")
+
+    def close(self):
+        """Stop the flusher and write anything still buffered."""
+        self._closed.set()
+        self.flush()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK around a block on an autocommit connection."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
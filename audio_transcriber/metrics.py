@@ -0,0 +1,363 @@
+"""
+Prometheus metrics in the text exposition format.
+
+A small in-process registry (counters, gauges, histograms) so instrumenting
+the hot paths costs a lock and a bisect per observation and no dependency.
+The API serves it at `/metrics`; worker processes (worker.py) serve their own
+registry on a separate port because their stages run outside the API process.
+Gauges that describe shared state (queue depth, jobs by status) are read from
+the job store when scraped.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "callanalysis_"
+
+# Seconds; long tail for model stages on CPU
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+SEGMENT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30)
+RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 4)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+
+    def _key(self, labels: dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = [(key, self._copy(value)) for key, value in self._values.items()]
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _copy(self, value):
+        return value
+
+    def _samples(self, key: Tuple, value) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self, key: Tuple, value) -> List[str]:
+        return [f"{self.name}_total{_labels(self.labelnames, key)} {_number(value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 collect: Optional[Callable[[], Dict[Tuple, float]]] = None):
+        """
+        Args:
+            collect: Called at scrape time; returns {label values: value} and
+                replaces whatever was set before
+        """
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        if self.collect is not None:
+            try:
+                values = self.collect()
+            except Exception as e:
+                print(f"Metric {self.name} collection failed: {e}")
+                values = {}
+            with self._lock:
+                self._values = dict(values)
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (made cumulative when rendered), sum, count
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _copy(self, value):
+        return value[0][:], value[1], value[2]
+
+    def _samples(self, key: Tuple, value) -> List[str]:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            le = 'le="' + _number(bound) + '"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Re-registering (e.g. a module reloaded) keeps the existing series
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = (), collect=None) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames, collect))
+
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (),
+              buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# ----------------------------------------------------------------- metrics
+
+UPLOAD_SECONDS = histogram("upload_seconds", "Time to receive, hash and store an upload")
+UPLOAD_BYTES = counter("upload_bytes", "Bytes of audio accepted by the upload endpoints")
+
+STAGE_SECONDS = histogram("stage_seconds", "Pipeline stage run time (reused outputs excluded)", ["stage"])
+STAGE_FAILURES = counter("stage_failures", "Pipeline stages that raised", ["stage"])
+STAGES_RUNNING = gauge("stages_running", "Stages currently running in this process", ["stage"])
+REAL_TIME_FACTOR = histogram("real_time_factor", "Stage run time divided by audio duration",
+                             ["stage"], RATIO_BUCKETS)
+AUDIO_SECONDS = counter("audio_seconds", "Seconds of audio prepared for processing")
+
+ASR_SEGMENT_SECONDS = histogram("asr_segment_seconds", "ASR time per diarized segment",
+                                buckets=SEGMENT_BUCKETS)
+
+LLM_SECONDS = histogram("llm_request_seconds", "LLM request latency", ["call"])
+LLM_TOKENS = histogram("llm_request_tokens", "Tokens per LLM request", ["call", "kind"], TOKEN_BUCKETS)
+LLM_ERRORS = counter("llm_errors", "LLM requests that failed", ["call"])
+
+MODEL_LOAD_SECONDS = gauge("model_load_seconds", "Time taken to load each model", ["model"])
+
+EVENT_LOOP_LAG = histogram("event_loop_lag_seconds", "How late the API event loop wakes up from a timer",
+                           buckets=LAG_BUCKETS)
+
+
+def _resident_memory() -> Dict[Tuple, float]:
+    try:
+        import psutil
+        return {(): psutil.Process().memory_info().rss}
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return {(): int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")}
+    except (OSError, ValueError, IndexError):
+        return {}
+
+
+PROCESS_RSS = gauge("process_resident_memory_bytes", "Resident memory of this process",
+                    collect=_resident_memory)
+
+
+def register_job_store(store) -> None:
+    """Expose queue depth and jobs by status/stage, read from the shared job store at scrape time."""
+    gauge("jobs", "Jobs by status", ["status"],
+          collect=lambda: {(status,): n for status, n in store.count_by_status().items()})
+    gauge("queue_depth", "Queued jobs waiting for each stage", ["stage"],
+          collect=lambda: {(stage,): n for stage, n in store.queued_by_stage().items()})
+
+
+async def monitor_event_loop_lag(interval: float = 0.25):
+    """Sample event loop lag forever; sustained lag means blocking work on the loop."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - expected))
+
+
+# -------------------------------------------------------------- LLM calls
+
+# Usage of the LLM calls made by the current stage (see `track_llm_usage`)
+_llm_usage = contextvars.ContextVar("llm_usage", default=None)
+
+
+@contextmanager
+def track_llm_usage():
+    """Count the LLM calls, tokens and seconds spent in the body (on this thread)."""
+    usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "seconds": 0.0}
+    token = _llm_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _llm_usage.reset(token)
+        usage["seconds"] = round(usage["seconds"], 3)
+
+try:
+    from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:
+    BaseCallbackHandler = None
+
+if BaseCallbackHandler is not None:
+    class LLMMetricsCallback(BaseCallbackHandler):
+        """Records latency and token usage of LangChain LLM calls under a `call` label."""
+
+        def __init__(self, call: str):
+            super().__init__()
+            self.call = call
+            self._started = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._started[run_id] = time.perf_counter()
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._started[run_id] = time.perf_counter()
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            job_usage = _llm_usage.get()
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                seconds = time.perf_counter() - started
+                LLM_SECONDS.observe(seconds, call=self.call)
+                if job_usage is not None:
+                    job_usage["seconds"] += seconds
+            if job_usage is not None:
+                job_usage["calls"] += 1
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if not usage:
+                        continue
+                    prompt, completion = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+                    LLM_TOKENS.observe(prompt, call=self.call, kind="prompt")
+                    LLM_TOKENS.observe(completion, call=self.call, kind="completion")
+                    if job_usage is not None:
+                        job_usage["prompt_tokens"] += prompt
+                        job_usage["completion_tokens"] += completion
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._started.pop(run_id, None)
+            LLM_ERRORS.inc(call=self.call)
+            job_usage = _llm_usage.get()
+            if job_usage is not None:
+                job_usage["calls"] += 1
+
+
+def llm_callbacks(call: str) -> list:
+    """Callbacks to pass to a LangChain chat model so its calls are measured."""
+    return [LLMMetricsCallback(call)] if BaseCallbackHandler is not None else []
+
+
+# ---------------------------------------------------------- worker export
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve `/metrics` from a background thread (used by worker processes)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,418 @@
+"""
+Audio processing pipeline shared by the API process and model workers.
+
+Holds the lazily created model singletons and the job stages. It has no
+FastAPI dependency so worker processes (see worker.py) can import it without
+starting the web app.
+
+A job moves through STAGES one at a time. Each stage reads the outputs of
+earlier stages from the job store, persists its own output and hands the job
+to the next stage's queue, so different jobs can occupy different stages at
+once (job N+1 diarizes while job N transcribes and job N-1 waits on the LLM).
+Because every output is persisted, a failed or interrupted job can resume from
+its first incomplete stage instead of starting over.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from analytics import compute_conversation_analytics
+from job_store import JobStore
+from metrics import (AUDIO_SECONDS, MODEL_LOAD_SECONDS, REAL_TIME_FACTOR, STAGE_FAILURES,
+                     STAGE_SECONDS, STAGES_RUNNING, track_llm_usage)
+from profiling import profile_reports, profile_stage, report_base
+from renditions import create_renditions, rendition_paths
+
+STAGES = ["prepare", "diarize", "transcribe", "summarize", "evaluate"]
+
+# Stages that run the local models (CPU/GPU bound); the rest wait on the LLM
+MODEL_STAGES = {"diarize", "transcribe"}
+
+# Default worker slots per stage
+DEFAULT_STAGE_WORKERS = {
+    "prepare": 1,
+    "diarize": 1,
+    "transcribe": 1,
+    "summarize": 2,
+    "evaluate": 2,
+}
+
+# Progress (%) and message shown when a stage starts
+STAGE_START = {
+    "prepare": (5, "Preparing audio..."),
+    "diarize": (15, "Running speaker diarization..."),
+    "transcribe": (30, "Transcribing audio segments..."),
+    "summarize": (65, "Generating summary..."),
+    "evaluate": (75, "Evaluating call quality..."),
+}
+
+# Message shown while a job waits for the next stage
+STAGE_WAITING = {
+    "diarize": "Audio ready, waiting for diarization...",
+    "transcribe": "Diarization done, waiting for transcription...",
+    "summarize": "Transcription done, waiting for summary...",
+    "evaluate": "Summary done, waiting for evaluation...",
+}
+
+# Models behind each stage's output (keep in sync with transcriber.py and
+# evaluator.py). Results are only reused between jobs run with the same versions.
+MODEL_VERSIONS = {
+    "diarization": "nvidia/diar_sortformer_4spk-v1",
+    "asr": "Oriserve/Whisper-Hindi2Hinglish-Prime",
+    "llm": "gpt-oss:20b-cloud",
+}
+
+# Stages whose output depends only on the audio and the models, not the questions
+QUESTION_INDEPENDENT_STAGES = ["diarize", "transcribe", "summarize"]
+
+# STUB_MODELS=1 swaps diarization and ASR for the stubs in stubs.py (load
+# tests); LLM calls still go to the Ollama server at OLLAMA_HOST.
+STUB_MODELS = os.getenv("STUB_MODELS", "").lower() in ("1", "true", "yes")
+
+# Lazy loading. Several stage threads can ask for a model at once, so loads
+# are serialized; each process holds one copy, which model stages use from a
+# single worker slot (see stage_workers_from_env in scheduler.py).
+transcriber = None
+evaluator = None
+_model_lock = threading.Lock()
+
+def get_transcriber():
+    global transcriber
+    if transcriber is None:
+        with _model_lock:
+            if transcriber is None:
+                started = time.perf_counter()
+                if STUB_MODELS:
+                    from stubs import stub_transcriber_from_env
+                    transcriber = stub_transcriber_from_env()
+                else:
+                    from transcriber import AudioTranscriber
+                    transcriber = AudioTranscriber()
+                MODEL_LOAD_SECONDS.set(time.perf_counter() - started, model="transcriber")
+    return transcriber
+
+def get_evaluator():
+    global evaluator
+    if evaluator is None:
+        with _model_lock:
+            if evaluator is None:
+                from evaluator import CallEvaluator
+                started = time.perf_counter()
+                evaluator = CallEvaluator()
+                MODEL_LOAD_SECONDS.set(time.perf_counter() - started, model="evaluator")
+    return evaluator
+
+
+def _prepare(job_store: JobStore, job: dict) -> dict:
+    # Decode/resample once; diarization and ASR (and any retry) reuse the WAV
+    source = Path(job["file_path"])
+    canonical = source.with_name(f"{job['job_id']}_16k.wav")
+    paths = rendition_paths(str(source), job["job_id"])
+
+    # The playback rendition (FFmpeg subprocess) is encoded alongside
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        renditions = pool.submit(create_renditions, str(source), **paths)
+        audio_path = get_transcriber().prepare_audio(str(source), str(canonical))
+        try:
+            playback = renditions.result()
+        except Exception as e:
+            print(f"Playback rendition failed for {job['job_id']}: {e}")
+            playback = {}
+
+    duration = _audio_seconds(audio_path)
+    if duration:
+        AUDIO_SECONDS.inc(duration)
+    return {"audio_path": str(audio_path), "duration": duration, **playback}
+
+
+def _audio_seconds(path) -> Optional[float]:
+    """Duration of the prepared WAV, used for real-time factors (None if unreadable)."""
+    try:
+        import soundfile
+        return round(soundfile.info(str(path)).duration, 3)
+    except Exception:
+        return None
+
+
+def _audio_path(job_store: JobStore, job: dict) -> str:
+    return job_store.get_stage_output(job["job_id"], "prepare")["audio_path"]
+
+
+def _diarize(job_store: JobStore, job: dict) -> dict:
+    diarization = get_transcriber().run_diarization(_audio_path(job_store, job))
+    return {"segments": diarization}
+
+
+def _transcribe(job_store: JobStore, job: dict) -> dict:
+    job_id = job["job_id"]
+    diarization = job_store.get_stage_output(job_id, "diarize")["segments"]
+
+    def update_transcription_progress(p):
+        job_store.update(job_id, progress=30 + int(p * 30), message=f"Transcribing... {int(p * 100)}%")
+
+    def publish_segment(index, segment):
+        # Streamed to clients by /events/{job_id} as the transcript grows
+        job_store.add_event(job_id, "segment", {"index": index, **segment})
+
+    segment_seconds = []
+    transcript = get_transcriber().transcribe_segments(
+        _audio_path(job_store, job),
+        diarization,
+        progress_callback=update_transcription_progress,
+        segment_callback=publish_segment,
+        segment_timings=segment_seconds
+    )
+    return {"transcript": transcript, "timing": {"segment_seconds": segment_seconds}}
+
+
+def _summarize(job_store: JobStore, job: dict) -> dict:
+    transcript = job_store.get_stage_output(job["job_id"], "transcribe")["transcript"]
+    summary, formatted = get_transcriber().summarize(transcript)
+    return {"summary": summary, "formatted_transcript": formatted}
+
+
+def _evaluate(job_store: JobStore, job: dict) -> dict:
+    job_id = job["job_id"]
+    transcript = job_store.get_stage_output(job_id, "transcribe")["transcript"]
+    summarized = job_store.get_stage_output(job_id, "summarize")
+
+    # Enabled questions were snapshotted when the job was queued
+    enabled_questions = json.loads(job["questions"]) if job.get("questions") else None
+
+    evaluation = get_evaluator().evaluate_questions(
+        summarized["formatted_transcript"], summarized["summary"], enabled_questions,
+        segments=transcript
+    )
+    return {"evaluation": evaluation}
+
+
+STAGE_RUNNERS = {
+    "prepare": _prepare,
+    "diarize": _diarize,
+    "transcribe": _transcribe,
+    "summarize": _summarize,
+    "evaluate": _evaluate,
+}
+
+
+def _timing_trace(outputs: dict, transcript: list) -> dict:
+    """Where a job's time went, from the timing each stage recorded with its output."""
+    timings = {stage: outputs[stage].get("timing", {}) for stage in STAGES}
+    stage_seconds = {stage: timing.get("seconds") for stage, timing in timings.items()}
+    total = sum(seconds for seconds in stage_seconds.values() if seconds)
+    duration = outputs["prepare"].get("duration")
+
+    llm = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "seconds": 0.0}
+    for timing in timings.values():
+        for key, value in timing.get("llm", {}).items():
+            llm[key] += value
+    llm["seconds"] = round(llm["seconds"], 3)
+
+    return {
+        "stages": stage_seconds,
+        "total_seconds": round(total, 3),
+        "audio_duration": duration,
+        "real_time_factor": round(total / duration, 3) if duration else None,
+        "segment_count": len(transcript),
+        "segment_seconds": timings["transcribe"].get("segment_seconds", []),
+        "llm": llm,
+        "profiles": {
+            stage: Path(timing["profile"]).name for stage, timing in timings.items() if timing.get("profile")
+        },
+    }
+
+
+def _finalize(job_store: JobStore, job: dict, evaluated: dict):
+    """Assemble the result from all stage outputs and mark the job completed."""
+    job_id = job["job_id"]
+    job_store.update(job_id, progress=95, message="Finalizing...")
+
+    outputs = {stage: job_store.get_stage_output(job_id, stage) or {} for stage in STAGES}
+    transcript = outputs["transcribe"]["transcript"]
+    summarized = outputs["summarize"]
+
+    speaker_stats = get_transcriber().get_speaker_stats(transcript)
+    conversation_analytics = compute_conversation_analytics(transcript)
+
+    job_store.set_result(job_id, {
+        "job_id": job_id,
+        "transcript": transcript,
+        "formatted_transcript": summarized["formatted_transcript"],
+        "summary": summarized["summary"],
+        "speaker_stats": speaker_stats,
+        "analytics": conversation_analytics,
+        "filename": job["filename"],
+        "evaluation": evaluated["evaluation"],
+        "questions_version": job.get("questions_version"),
+        "timing": _timing_trace(outputs, transcript),
+        "audio_url": f"/audio/{job_id}"
+    }, message="Processing complete!")
+
+
+def resume_stage(job_store: JobStore, job_id: str) -> str:
+    """First stage without persisted output (the last stage if only finalizing is left)."""
+    completed = set(job_store.completed_stages(job_id))
+    for stage in STAGES:
+        if stage not in completed:
+            return stage
+    return STAGES[-1]
+
+
+def prepared_files(job_store: JobStore, job_id: str) -> dict:
+    """Files written by the prepare stage: `audio_path` and, if FFmpeg ran, `playback_path`/`peaks_path`."""
+    prepared = job_store.get_stage_output(job_id, "prepare") or {}
+    return {key: value for key, value in prepared.items() if key.endswith("_path")}
+
+
+def _observe_stage(job_store: JobStore, job_id: str, stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if stage in MODEL_STAGES:
+        duration = (job_store.get_stage_output(job_id, "prepare") or {}).get("duration")
+        if duration:
+            REAL_TIME_FACTOR.observe(seconds / duration, stage=stage)
+
+
+def job_files(job_store: JobStore, job: dict) -> List[str]:
+    """Every file a job owns: the upload, prepared WAV, renditions and profile reports."""
+    paths = [*prepared_files(job_store, job["job_id"]).values()]
+    if job.get("file_path"):
+        paths = [job["file_path"], *paths, *rendition_paths(job["file_path"], job["job_id"]).values(),
+                 *map(str, profile_reports(job["file_path"], job["job_id"]))]
+    return list(dict.fromkeys(paths))
+
+
+def remove_job(job_store: JobStore, job_id: str, forget_analytics: bool = False) -> bool:
+    """
+    Remove a job's record and every file it owns. Returns False if it did not exist.
+
+    `forget_analytics` also takes the call out of the QA rollups (see JobStore.delete).
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return False
+    for path in job_files(job_store, job):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return job_store.delete(job_id, forget_analytics)
+
+
+def _fingerprint(data) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def pipeline_version() -> str:
+    return _fingerprint(MODEL_VERSIONS)
+
+
+def questions_hash(questions: list) -> str:
+    return _fingerprint(questions)
+
+
+def reuse_previous_run(job_store: JobStore, job_id: str) -> Optional[str]:
+    """
+    Reuse the outputs of an earlier job that processed the same audio.
+
+    When the earlier job was evaluated against the same questions its result
+    is copied and the job is completed without running any model. Otherwise
+    the question-independent stage outputs are copied so only evaluation runs.
+
+    Returns:
+        "completed", the stage the job should be queued at, or None when
+        there is nothing to reuse
+    """
+    job = job_store.get(job_id)
+    if not job.get("content_hash"):
+        return None
+    source = job_store.find_duplicate(
+        job_id, job["content_hash"], job["pipeline_version"], job.get("questions_hash")
+    )
+    if source is None:
+        return None
+
+    if source.get("questions_hash") == job.get("questions_hash"):
+        result = job_store.get_result(source["job_id"])
+        if result is not None:
+            result.update(job_id=job_id, filename=job["filename"], audio_url=f"/audio/{job_id}")
+            job_store.set_result(job_id, result, deduplicated_from=source["job_id"],
+                                 message="Reused results from an identical earlier upload")
+            return "completed"
+
+    copied = job_store.copy_stages(source["job_id"], job_id, QUESTION_INDEPENDENT_STAGES)
+    if set(copied) != set(QUESTION_INDEPENDENT_STAGES):
+        job_store.clear_stages(job_id)
+        return None
+    job_store.update(job_id, deduplicated_from=source["job_id"])
+    return "evaluate"
+
+
+def _run_timed(job_store: JobStore, job: dict, stage: str) -> dict:
+    """Run a stage runner (under the job's profiler, if any) and record its timing in the output."""
+    job_id = job["job_id"]
+    base = report_base(job["file_path"], job_id, stage)
+    started = time.perf_counter()
+    STAGES_RUNNING.inc(stage=stage)
+    try:
+        with track_llm_usage() as llm, profile_stage(job.get("profiler"), base) as report:
+            output = STAGE_RUNNERS[stage](job_store, job)
+    finally:
+        STAGES_RUNNING.dec(stage=stage)
+    seconds = time.perf_counter() - started
+    _observe_stage(job_store, job_id, stage, seconds)
+
+    timing = output.setdefault("timing", {})
+    timing["seconds"] = round(seconds, 3)
+    if llm["calls"]:
+        timing["llm"] = llm
+    if report.get("path"):
+        timing["profile"] = report["path"]
+    return output
+
+
+def run_stage(job_store: JobStore, job_id: str, stage: str, hold_claim: bool = False):
+    """
+    Run one stage for a claimed job, then queue it for the next stage (or complete it).
+
+    With `hold_claim` the job stays processing under the same claim between
+    stages, for callers that run every stage themselves (batch.py).
+    """
+    try:
+        job = job_store.get(job_id)
+        progress, message = STAGE_START[stage]
+        job_store.update(job_id, progress=progress, message=message)
+
+        # Reuse the output of a stage that finished before the job was interrupted
+        output = job_store.get_stage_output(job_id, stage)
+        if output is None:
+            output = _run_timed(job_store, job, stage)
+
+        position = STAGES.index(stage)
+        if position + 1 < len(STAGES):
+            next_stage = STAGES[position + 1]
+            held = {"status": "processing", "claimed_by": job["claimed_by"]} if hold_claim else {}
+            job_store.complete_stage(job_id, stage, output, next_stage,
+                                     message=STAGE_WAITING[next_stage], **held)
+        else:
+            # Keep the claim while finalizing so a crash here is still re-queued
+            job_store.complete_stage(job_id, stage, output, stage, status="processing",
+                                     claimed_by=job["claimed_by"])
+            _finalize(job_store, job, output)
+
+    except Exception as e:
+        STAGE_FAILURES.inc(stage=stage)
+        job_store.update(job_id, status="failed", message=f"Error: {str(e)}")
+        traceback.print_exc()
+        print(f"Error processing {job_id} at stage {stage}: {e}")
+    finally:
+        # After each model stage, aggressively clear inference-time memory while
+        # keeping the heavy models (ASR, diarization) resident.
+        if stage in MODEL_STAGES and transcriber is not None:
+            transcriber._clear_inference_memory()
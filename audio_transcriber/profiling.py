@@ -0,0 +1,120 @@
+"""
+Opt-in profiling of pipeline stages.
+
+When a job is queued with `?profile=sampling|torch` (or JOB_PROFILER is set),
+every stage it runs is wrapped in the chosen profiler and the report is saved
+next to the upload as `<job_id>_profile_<stage>.<ext>`:
+
+- sampling: pyinstrument (low overhead) as HTML, falling back to cProfile
+  statistics as text when pyinstrument is not installed
+- torch: the PyTorch profiler's per-operator table (CPU, plus CUDA when
+  available), for looking inside diarization and ASR
+"""
+
+import cProfile
+import importlib.util
+import io
+import os
+import pstats
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+
+PROFILERS = ("sampling", "torch")
+
+# Rows kept in the text reports
+REPORT_ROWS = 60
+
+
+def profiler_from_env() -> Optional[str]:
+    """Profiler applied to jobs that do not ask for one (JOB_PROFILER, unset = off)."""
+    kind = os.getenv("JOB_PROFILER", "").strip().lower() or None
+    if kind is not None and kind not in PROFILERS:
+        raise ValueError(f"Unknown JOB_PROFILER '{kind}'. Use one of: {', '.join(PROFILERS)}")
+    return kind
+
+
+def report_base(file_path: str, job_id: str, stage: str) -> Path:
+    return Path(file_path).with_name(f"{job_id}_profile_{stage}")
+
+
+def profile_reports(file_path: str, job_id: str) -> List[Path]:
+    """Reports saved for a job, so they are deleted together with it."""
+    return list(Path(file_path).parent.glob(f"{job_id}_profile_*"))
+
+
+@contextmanager
+def profile_stage(kind: Optional[str], base: Path):
+    """
+    Run the body under a profiler and save its report.
+
+    Yields a dict that holds the report's `path` once the body has finished
+    (empty when profiling is off).
+    """
+    report = {}
+    if kind is None:
+        yield report
+        return
+
+    if kind == "torch":
+        runner = _torch_profile
+    elif importlib.util.find_spec("pyinstrument") is not None:
+        runner = _pyinstrument_profile
+    else:
+        runner = _cprofile_profile
+
+    with runner(base, report):
+        yield report
+
+
+@contextmanager
+def _pyinstrument_profile(base: Path, report: dict):
+    from pyinstrument import Profiler
+
+    profiler = Profiler(interval=0.005)
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        path = base.with_suffix(".html")
+        path.write_text(profiler.output_html())
+        report["path"] = str(path)
+
+
+@contextmanager
+def _cprofile_profile(base: Path, report: dict):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(REPORT_ROWS)
+        path = base.with_suffix(".txt")
+        path.write_text(stream.getvalue())
+        report["path"] = str(path)
+
+
+@contextmanager
+def _torch_profile(base: Path, report: dict):
+    import torch
+    from torch.profiler import ProfilerActivity, profile
+
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    sort_by = "cuda_time_total" if torch.cuda.is_available() else "cpu_time_total"
+
+    profiler = profile(activities=activities, record_shapes=True)
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        path = base.with_suffix(".txt")
+        path.write_text(profiler.key_averages(group_by_input_shape=True).table(
+            sort_by=sort_by, row_limit=REPORT_ROWS
+        ))
+        report["path"] = str(path)
@@ -0,0 +1,83 @@
+"""
+Server-Sent Events stream of job progress.
+
+Workers (possibly in other processes) only write to the job store, so the
+stream follows the store: each tick it reads the job row and any new events
+(e.g. transcribed segments) and pushes what changed. A connected client costs
+two small indexed queries per tick instead of a full status payload per poll;
+they run in a thread so the event loop never waits on SQLite.
+"""
+
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Callable, Optional
+
+from job_store import JobStore
+
+
+def format_sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def job_event_stream(store: JobStore, job_id: str,
+                           queue_info: Callable[[str], dict],
+                           is_disconnected: Callable,
+                           last_event_id: int = 0,
+                           interval: float = 0.5,
+                           keepalive: float = 15.0) -> AsyncIterator[str]:
+    """
+    Yield SSE messages for a job until it completes or fails.
+
+    Events:
+        progress: status, progress, message and queue position/ETA, sent when they change
+        segment: a transcript segment, as soon as the ASR produces it
+        completed / failed: final state; the stream ends afterwards
+    """
+    # Ask EventSource to reconnect quickly if the connection drops
+    yield "retry: 2000\n\n"
+
+    last_state = None
+    last_sent = time.monotonic()
+    while not await is_disconnected():
+        job = await asyncio.to_thread(store.get, job_id)
+        if job is None:
+            yield format_sse("failed", {"message": "Job not found"})
+            return
+
+        for event in await asyncio.to_thread(store.events_since, job_id, last_event_id):
+            last_event_id = event["id"]
+            yield format_sse(event["type"], event["data"], event_id=event["id"])
+            last_sent = time.monotonic()
+
+        state = (job["status"], job["progress"], job["message"])
+        if state != last_state:
+            last_state = state
+            yield format_sse("progress", {
+                "status": job["status"],
+                "progress": job["progress"],
+                "message": job["message"],
+                **await asyncio.to_thread(queue_info, job_id),
+            })
+            last_sent = time.monotonic()
+
+        if job["status"] == "completed":
+            yield format_sse("completed", {
+                "job_id": job_id,
+                "deduplicated_from": job.get("deduplicated_from"),
+            })
+            return
+        if job["status"] == "failed":
+            yield format_sse("failed", {"message": job["message"]})
+            return
+
+        if time.monotonic() - last_sent >= keepalive:
+            # Comment line keeps proxies from closing an idle connection
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(interval)
@@ -0,0 +1,289 @@
+"""
+QA analytics across calls, answered from precomputed rollups.
+
+When a job's result is stored, its evaluation is flattened into
+`qa_evaluations` (one row per call and question: status, confidence,
+weight, category, day) and `qa_calls` (one row per call: overall score,
+grade), and added to four rollup tables keyed by UTC day:
+
+    qa_rollup_day        calls, score and confidence sums
+    qa_rollup_grade      calls per grade
+    qa_rollup_question   YES/NO/PARTIAL/N/A counts and confidence per question
+    qa_rollup_category   applicable/passed counts, score points and per-call
+                         category scores per category
+
+Answers the evaluator filled in because the LLM failed (decided_by
+"fallback") are left out: they say nothing about the call.
+
+Rollups are maintained with signed upserts: reprocessing a job first
+subtracts its previous contribution. `/api/analytics` sums the rollups over
+the requested days, so a query costs O(days x questions) regardless of how
+many calls were processed. History is kept when the job itself is removed
+by retention, so trends outlive the stored results.
+"""
+
+import sqlite3
+import time
+from typing import Dict, Optional
+
+STATUSES = ("YES", "NO", "PARTIAL", "N/A")
+STATUS_SCORES = {"YES": 1.0, "PARTIAL": 0.5, "NO": 0.0}
+GRADES = ("A", "B", "C", "D", "F")
+
+ROLLUP_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS qa_calls ("
+    "job_id TEXT PRIMARY KEY, day TEXT NOT NULL, completed_at REAL, "
+    "overall_score REAL, grade TEXT, average_confidence REAL)",
+    "CREATE INDEX IF NOT EXISTS idx_qa_calls_day ON qa_calls(day)",
+    "CREATE TABLE IF NOT EXISTS qa_evaluations ("
+    "job_id TEXT NOT NULL, question_id TEXT NOT NULL, question TEXT, category TEXT, "
+    "status TEXT NOT NULL, confidence REAL, weight REAL, decided_by TEXT, day TEXT NOT NULL, "
+    "PRIMARY KEY (job_id, question_id))",
+    "CREATE INDEX IF NOT EXISTS idx_qa_evaluations_day ON qa_evaluations(day, question_id)",
+    "CREATE TABLE IF NOT EXISTS qa_rollup_day ("
+    "day TEXT PRIMARY KEY, calls INTEGER NOT NULL DEFAULT 0, scored_calls INTEGER NOT NULL DEFAULT 0, "
+    "score_sum REAL NOT NULL DEFAULT 0, confidence_sum REAL NOT NULL DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS qa_rollup_grade ("
+    "day TEXT NOT NULL, grade TEXT NOT NULL, calls INTEGER NOT NULL DEFAULT 0, "
+    "PRIMARY KEY (day, grade))",
+    "CREATE TABLE IF NOT EXISTS qa_rollup_question ("
+    "day TEXT NOT NULL, question_id TEXT NOT NULL, question TEXT, category TEXT, "
+    "yes INTEGER NOT NULL DEFAULT 0, no INTEGER NOT NULL DEFAULT 0, "
+    "partial INTEGER NOT NULL DEFAULT 0, na INTEGER NOT NULL DEFAULT 0, "
+    "confidence_sum REAL NOT NULL DEFAULT 0, PRIMARY KEY (day, question_id))",
+    "CREATE TABLE IF NOT EXISTS qa_rollup_category ("
+    "day TEXT NOT NULL, category TEXT NOT NULL, calls INTEGER NOT NULL DEFAULT 0, "
+    "total INTEGER NOT NULL DEFAULT 0, applicable INTEGER NOT NULL DEFAULT 0, "
+    "passed INTEGER NOT NULL DEFAULT 0, score_points REAL NOT NULL DEFAULT 0, "
+    "scored_calls INTEGER NOT NULL DEFAULT 0, call_score_sum REAL NOT NULL DEFAULT 0, "
+    "PRIMARY KEY (day, category))",
+]
+
+
+def init_schema(conn: sqlite3.Connection):
+    for statement in ROLLUP_SCHEMA:
+        conn.execute(statement)
+
+
+def day_of(timestamp: float) -> str:
+    """UTC calendar day (YYYY-MM-DD) a job is counted under."""
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+def _status(evaluation: dict) -> str:
+    status = str(evaluation.get("status") or "N/A").upper()
+    return status if status in STATUSES else "N/A"
+
+
+def _number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# ------------------------------------------------------------------ writes
+
+def record_result(conn: sqlite3.Connection, job_id: str, result: dict, completed_at: float):
+    """Store a job's evaluation facts and add them to the rollups (replacing any earlier run)."""
+    remove(conn, job_id)
+    evaluation = result.get("evaluation") or {}
+    scores = evaluation.get("scores") or {}
+    day = day_of(completed_at)
+
+    rows = []
+    for e in evaluation.get("evaluations") or []:
+        if not e.get("question_id") or e.get("decided_by") == "fallback":
+            continue
+        rows.append((
+            job_id, str(e["question_id"]), e.get("question"), e.get("category", "General"),
+            _status(e), _number(e.get("confidence")), _number(e.get("weight", 1)),
+            e.get("decided_by"), day,
+        ))
+    conn.executemany(
+        "INSERT OR REPLACE INTO qa_evaluations (job_id, question_id, question, category, status, "
+        "confidence, weight, decided_by, day) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.execute(
+        "INSERT INTO qa_calls (job_id, day, completed_at, overall_score, grade, average_confidence) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (job_id, day, completed_at, scores.get("overall_score") if rows else None,
+         scores.get("grade") if rows else None, scores.get("average_confidence") if rows else None),
+    )
+    _apply(conn, job_id, +1)
+
+
+def remove(conn: sqlite3.Connection, job_id: str):
+    """Subtract a job from the rollups and drop its facts."""
+    if conn.execute("SELECT 1 FROM qa_calls WHERE job_id = ?", (job_id,)).fetchone() is None:
+        return
+    _apply(conn, job_id, -1)
+    conn.execute("DELETE FROM qa_evaluations WHERE job_id = ?", (job_id,))
+    conn.execute("DELETE FROM qa_calls WHERE job_id = ?", (job_id,))
+
+
+def _apply(conn: sqlite3.Connection, job_id: str, sign: int):
+    """Add (sign=1) or subtract (sign=-1) a job's stored facts to/from every rollup."""
+    call = conn.execute("SELECT * FROM qa_calls WHERE job_id = ?", (job_id,)).fetchone()
+    facts = conn.execute("SELECT * FROM qa_evaluations WHERE job_id = ?", (job_id,)).fetchall()
+    day = call["day"]
+    scored = call["overall_score"] is not None
+
+    conn.execute(
+        "INSERT INTO qa_rollup_day (day, calls, scored_calls, score_sum, confidence_sum) "
+        "VALUES (?, ?, ?, ?, ?) ON CONFLICT(day) DO UPDATE SET "
+        "calls = calls + excluded.calls, scored_calls = scored_calls + excluded.scored_calls, "
+        "score_sum = score_sum + excluded.score_sum, confidence_sum = confidence_sum + excluded.confidence_sum",
+        (day, sign, sign * scored, sign * (call["overall_score"] or 0),
+         sign * (call["average_confidence"] or 0)),
+    )
+    if call["grade"]:
+        conn.execute(
+            "INSERT INTO qa_rollup_grade (day, grade, calls) VALUES (?, ?, ?) "
+            "ON CONFLICT(day, grade) DO UPDATE SET calls = calls + excluded.calls",
+            (day, call["grade"], sign),
+        )
+
+    categories: Dict[str, dict] = {}
+    for fact in facts:
+        status = fact["status"]
+        conn.execute(
+            "INSERT INTO qa_rollup_question (day, question_id, question, category, yes, no, partial, na, "
+            "confidence_sum) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(day, question_id) DO UPDATE SET "
+            "question = COALESCE(excluded.question, question), category = excluded.category, "
+            "yes = yes + excluded.yes, no = no + excluded.no, partial = partial + excluded.partial, "
+            "na = na + excluded.na, confidence_sum = confidence_sum + excluded.confidence_sum",
+            (day, fact["question_id"], fact["question"], fact["category"],
+             sign * (status == "YES"), sign * (status == "NO"), sign * (status == "PARTIAL"),
+             sign * (status == "N/A"), sign * fact["confidence"]),
+        )
+        cat = categories.setdefault(fact["category"], {"total": 0, "applicable": 0, "passed": 0, "points": 0.0})
+        cat["total"] += 1
+        if status in STATUS_SCORES:
+            cat["applicable"] += 1
+            cat["points"] += STATUS_SCORES[status]
+        cat["passed"] += status == "YES"
+
+    for category, cat in categories.items():
+        # Per-call category score, as _group_by_category computes it
+        call_score = cat["points"] / cat["applicable"] * 100 if cat["applicable"] else None
+        conn.execute(
+            "INSERT INTO qa_rollup_category (day, category, calls, total, applicable, passed, score_points, "
+            "scored_calls, call_score_sum) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(day, category) DO UPDATE SET calls = calls + excluded.calls, "
+            "total = total + excluded.total, applicable = applicable + excluded.applicable, "
+            "passed = passed + excluded.passed, score_points = score_points + excluded.score_points, "
+            "scored_calls = scored_calls + excluded.scored_calls, "
+            "call_score_sum = call_score_sum + excluded.call_score_sum",
+            (day, category, sign, sign * cat["total"], sign * cat["applicable"], sign * cat["passed"],
+             sign * cat["points"], sign * (call_score is not None), sign * (call_score or 0)),
+        )
+
+
+# ------------------------------------------------------------------- reads
+
+def _pct(numerator: float, denominator: float) -> Optional[float]:
+    return round(numerator / denominator * 100, 1) if denominator else None
+
+
+def query(conn: sqlite3.Connection, since: Optional[str] = None, until: Optional[str] = None,
+          category: Optional[str] = None) -> dict:
+    """
+    Aggregate QA results over a range of days.
+
+    Args:
+        since, until: Inclusive UTC days (YYYY-MM-DD); None leaves the range open
+        category: Only this category's questions (call-level figures are unaffected)
+
+    Returns:
+        summary (calls, average score/confidence, grade distribution),
+        by_day, by_question and by_category
+    """
+    where, params = ["1 = 1"], []
+    if since:
+        where.append("day >= ?")
+        params.append(since)
+    if until:
+        where.append("day <= ?")
+        params.append(until)
+    days = " AND ".join(where)
+    cat_filter, cat_params = (" AND category = ?", [category]) if category else ("", [])
+
+    by_day = [
+        {
+            "day": row["day"],
+            "calls": row["calls"],
+            "average_score": round(row["score_sum"] / row["scored_calls"], 1) if row["scored_calls"] else None,
+        }
+        for row in conn.execute(f"SELECT * FROM qa_rollup_day WHERE {days} AND calls > 0 ORDER BY day", params)
+    ]
+    totals = conn.execute(
+        "SELECT COALESCE(SUM(calls), 0) AS calls, COALESCE(SUM(scored_calls), 0) AS scored, "
+        f"COALESCE(SUM(score_sum), 0) AS score_sum, COALESCE(SUM(confidence_sum), 0) AS confidence_sum "
+        f"FROM qa_rollup_day WHERE {days}",
+        params,
+    ).fetchone()
+    grades = {grade: 0 for grade in GRADES}
+    for row in conn.execute(
+        f"SELECT grade, SUM(calls) AS calls FROM qa_rollup_grade WHERE {days} GROUP BY grade", params
+    ):
+        grades[row["grade"]] = row["calls"]
+
+    by_question = []
+    for row in conn.execute(
+        "SELECT question_id, MAX(question) AS question, MAX(category) AS category, SUM(yes) AS yes, "
+        "SUM(no) AS no, SUM(partial) AS partial, SUM(na) AS na, SUM(confidence_sum) AS confidence_sum "
+        f"FROM qa_rollup_question WHERE {days}{cat_filter} GROUP BY question_id ORDER BY question_id",
+        params + cat_params,
+    ):
+        evaluated = row["yes"] + row["no"] + row["partial"] + row["na"]
+        if not evaluated:
+            continue
+        applicable = row["yes"] + row["no"] + row["partial"]
+        by_question.append({
+            "question_id": row["question_id"],
+            "question": row["question"],
+            "category": row["category"],
+            "evaluated": evaluated,
+            "status_counts": {"YES": row["yes"], "NO": row["no"], "PARTIAL": row["partial"], "N/A": row["na"]},
+            "pass_rate": _pct(row["yes"], applicable),
+            "score": _pct(row["yes"] + 0.5 * row["partial"], applicable),
+            "average_confidence": round(row["confidence_sum"] / evaluated, 1),
+        })
+
+    by_category = []
+    for row in conn.execute(
+        "SELECT category, SUM(calls) AS calls, SUM(total) AS total, SUM(applicable) AS applicable, "
+        "SUM(passed) AS passed, SUM(score_points) AS score_points, SUM(scored_calls) AS scored_calls, "
+        f"SUM(call_score_sum) AS call_score_sum FROM qa_rollup_category WHERE {days}{cat_filter} "
+        "GROUP BY category ORDER BY category",
+        params + cat_params,
+    ):
+        if not row["calls"]:
+            continue
+        by_category.append({
+            "category": row["category"],
+            "calls": row["calls"],
+            "questions_evaluated": row["total"],
+            "passed": row["passed"],
+            "score": _pct(row["score_points"], row["applicable"]),
+            "average_call_score": (round(row["call_score_sum"] / row["scored_calls"], 1)
+                                   if row["scored_calls"] else None),
+        })
+
+    return {
+        "since": since,
+        "until": until,
+        "summary": {
+            "calls": totals["calls"],
+            "average_score": round(totals["score_sum"] / totals["scored"], 1) if totals["scored"] else None,
+            "average_confidence": (round(totals["confidence_sum"] / totals["scored"], 1)
+                                   if totals["scored"] else None),
+            "grade_distribution": grades,
+        },
+        "by_day": by_day,
+        "by_question": by_question,
+        "by_category": by_category,
+    }
+
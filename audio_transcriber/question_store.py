@@ -0,0 +1,157 @@
+"""
+Cached, lock-protected store for the QA question configuration.
+
+The configuration is kept in memory and only re-read when the JSON file's
+mtime/size changes (e.g. another worker process saved it). Mutations run
+under a lock (plus an advisory file lock across processes where available),
+are applied to a fresh copy of the data and persisted with an atomic
+write-then-rename, so readers never see a half-written file. Every save bumps
+a `version` number that jobs record alongside their question snapshot.
+"""
+
+import asyncio
+import copy
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def default_questions():
+    """Built-in questions from questions_config.py"""
+    from questions_config import PREDEFINED_QUESTIONS, QUESTION_CATEGORIES
+    return {
+        "questions": [
+            {**q, "enabled": True} for q in PREDEFINED_QUESTIONS
+        ],
+        "categories": QUESTION_CATEGORIES
+    }
+
+
+class QuestionStore:
+    def __init__(self, path: Path, defaults: Callable[[], dict]):
+        """
+        Args:
+            path: JSON file holding the custom configuration
+            defaults: Returns the built-in configuration, used while no file exists
+        """
+        self.path = Path(path)
+        self.defaults = defaults
+        self._lock = threading.RLock()
+        self._data: Optional[dict] = None
+        self._signature = None
+
+    # ----------------------------------------------------------------- reads
+
+    def get(self) -> dict:
+        """A copy of the current configuration (including its `version`)."""
+        with self._lock:
+            return copy.deepcopy(self._current())
+
+    def snapshot(self) -> Tuple[list, int]:
+        """Enabled questions and the configuration version, for a job to record."""
+        with self._lock:
+            data = self._current()
+            enabled = [q for q in data["questions"] if q.get("enabled", True)]
+            return copy.deepcopy(enabled), data.get("version", 0)
+
+    # ---------------------------------------------------------------- writes
+
+    def update(self, mutate: Callable[[dict], object]):
+        """
+        Apply `mutate` to a copy of the configuration and persist it.
+
+        Nothing is written if `mutate` raises. Returns whatever `mutate` returns.
+        """
+        with self._lock, self._file_lock():
+            data = copy.deepcopy(self._current())
+            result = mutate(data)
+            data["version"] = data.get("version", 0) + 1
+            self._write(data)
+            return result
+
+    def reset(self) -> dict:
+        """Replace the configuration with the built-in defaults (as a new version)."""
+        def restore(data):
+            version = data.get("version", 0)
+            data.clear()
+            data.update(self.defaults(), version=version)
+        self.update(restore)
+        return self.get()
+
+    # Async variants for the FastAPI endpoints: file I/O stays off the event loop
+
+    async def aget(self) -> dict:
+        return await asyncio.to_thread(self.get)
+
+    async def asnapshot(self) -> Tuple[list, int]:
+        return await asyncio.to_thread(self.snapshot)
+
+    async def aupdate(self, mutate: Callable[[dict], object]):
+        return await asyncio.to_thread(self.update, mutate)
+
+    async def areset(self) -> dict:
+        return await asyncio.to_thread(self.reset)
+
+    # --------------------------------------------------------------- helpers
+
+    def _current(self) -> dict:
+        """Cached data, reloaded if the file changed on disk. Call with the lock held."""
+        signature = self._stat()
+        if self._data is None or signature != self._signature:
+            if signature is None:
+                self._data = {**self.defaults(), "version": 0}
+            else:
+                with open(self.path, "r") as f:
+                    self._data = json.load(f)
+            self._signature = signature
+        return self._data
+
+    def _stat(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _write(self, data: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._data = data
+        self._signature = self._stat()
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialise writers across processes (no-op where fcntl is unavailable)."""
+        if fcntl is None:
+            yield
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Another process may have saved while we waited
+                self._signature = None
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
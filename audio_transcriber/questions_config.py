@@ -6,6 +6,8 @@ Each question has:
 - question: The question text
 - description: Additional context for the LLM
 - weight: Importance weight (1-5)
+- keywords: Optional Hinglish/English terms used to retrieve relevant transcript turns
+- rules: Optional deterministic checks (see rules.py) that answer the question without the LLM
 """
 
 PREDEFINED_QUESTIONS = [
@@ -15,14 +17,30 @@ PREDEFINED_QUESTIONS = [
         "category": "Opening",
         "question": "Did the agent greet the customer properly?",
         "description": "Check if the agent used a professional greeting, introduced themselves, and/or mentioned the company name.",
-        "weight": 3
+        "weight": 3,
+        "keywords": ["hello", "namaste", "namaskar", "good morning", "good afternoon", "good evening", "welcome", "bol raha", "bol rahi", "speaking"],
+        "rules": {
+            "keywords": ["namaste", "namaskar", "hello", "good morning", "good afternoon", "good evening", "welcome"],
+            "regex": [r"\b(main|mera naam)\b.*\bbol (raha|rahi)\b"],
+            "position": "start",
+            "window": 3,
+            "match": "YES",
+            "speaker": "agent"
+        }
     },
     {
         "id": "customer_name",
         "category": "Opening",
         "question": "Did the agent ask for or use the customer's name?",
         "description": "Check if the agent personalized the conversation by asking for or using the customer's name.",
-        "weight": 2
+        "weight": 2,
+        "keywords": ["name", "naam", "sir", "madam", "ji", "aapka naam"],
+        "rules": {
+            "keywords": ["aapka naam", "apka naam", "your name", "may i know your name", "naam kya"],
+            "position": "any",
+            "speaker": "agent",
+            "match": "YES"
+        }
     },
     
     # Issue Handling
@@ -31,21 +49,24 @@ PREDEFINED_QUESTIONS = [
         "category": "Issue Handling",
         "question": "Did the agent understand the customer's issue/query?",
         "description": "Check if the agent correctly identified and acknowledged the customer's problem or request.",
-        "weight": 5
+        "weight": 5,
+        "keywords": ["problem", "issue", "samasya", "dikkat", "pareshani", "query", "samjha", "samajh", "understand"]
     },
     {
         "id": "issue_resolved",
         "category": "Issue Handling",
         "question": "Was the customer's issue resolved?",
         "description": "Determine if the issue was fully resolved, partially resolved, or left unresolved.",
-        "weight": 5
+        "weight": 5,
+        "keywords": ["resolve", "resolved", "solve", "ho gaya", "theek", "fix", "done", "complete", "solution"]
     },
     {
         "id": "correct_info",
         "category": "Issue Handling",
         "question": "Did the agent provide accurate and relevant information?",
         "description": "Check if the information provided by the agent was correct and helpful for the customer's query.",
-        "weight": 4
+        "weight": 4,
+        "keywords": ["information", "jankari", "details", "process", "policy", "charges", "days", "din"]
     },
     
     # Communication
@@ -54,21 +75,24 @@ PREDEFINED_QUESTIONS = [
         "category": "Communication",
         "question": "Was the agent's communication clear and professional?",
         "description": "Evaluate if the agent communicated clearly without jargon, was polite, and maintained professionalism.",
-        "weight": 4
+        "weight": 4,
+        "keywords": ["please", "kripya", "samjhaiye", "clear", "batata", "batati", "explain"]
     },
     {
         "id": "active_listening",
         "category": "Communication",
         "question": "Did the agent demonstrate active listening?",
         "description": "Check if the agent acknowledged customer concerns, didn't interrupt, and responded appropriately.",
-        "weight": 3
+        "weight": 3,
+        "keywords": ["haan", "ji haan", "okay", "achha", "samajh gaya", "samajh gayi", "right", "noted"]
     },
     {
         "id": "empathy",
         "category": "Communication",
         "question": "Did the agent show empathy towards the customer?",
         "description": "Look for empathetic statements, understanding of customer frustration, or supportive language.",
-        "weight": 3
+        "weight": 3,
+        "keywords": ["sorry", "maafi", "understand", "samajh sakta", "samajh sakti", "inconvenience", "takleef", "apologize"]
     },
     
     # Process & Compliance
@@ -77,14 +101,22 @@ PREDEFINED_QUESTIONS = [
         "category": "Compliance",
         "question": "Did the agent verify customer identity (if required)?",
         "description": "Check if the agent asked for verification details like account number, phone, or other identifiers.",
-        "weight": 4
+        "weight": 4,
+        "keywords": ["verify", "verification", "account number", "registered", "mobile number", "number", "otp", "date of birth", "confirm"]
     },
     {
         "id": "hold_procedure",
         "category": "Compliance",
         "question": "Did the agent follow proper hold/transfer procedures?",
         "description": "If the call had holds or transfers, check if the agent asked permission and explained the reason.",
-        "weight": 2
+        "weight": 2,
+        "keywords": ["hold", "wait", "ruko", "rukiye", "transfer", "connect", "line pe"],
+        "rules": {
+            "keywords": ["hold", "transfer", "ruko", "rukiye", "wait karein", "line pe rahiye"],
+            "position": "any",
+            "match": None,
+            "no_match": "N/A"
+        }
     },
     
     # Closing
@@ -93,21 +125,38 @@ PREDEFINED_QUESTIONS = [
         "category": "Closing",
         "question": "Did the agent explain next steps or follow-up actions?",
         "description": "Check if the agent clearly explained what will happen next or what the customer needs to do.",
-        "weight": 4
+        "weight": 4,
+        "keywords": ["next", "aage", "follow up", "callback", "email", "sms", "hours", "ghante", "days", "din"]
     },
     {
         "id": "additional_help",
         "category": "Closing",
         "question": "Did the agent ask if there's anything else to help with?",
         "description": "Check if the agent offered additional assistance before ending the call.",
-        "weight": 3
+        "weight": 3,
+        "keywords": ["anything else", "aur kuch", "koi aur", "help", "madad", "sahayata"],
+        "rules": {
+            "keywords": ["anything else", "aur kuch", "koi aur", "kuch aur madad", "any other"],
+            "position": "end",
+            "window": 6,
+            "match": "YES",
+            "speaker": "agent"
+        }
     },
     {
         "id": "proper_closing",
         "category": "Closing",
         "question": "Did the agent close the call professionally?",
         "description": "Check for proper closing statement, thank you, and professional goodbye.",
-        "weight": 3
+        "weight": 3,
+        "keywords": ["thank you", "thanks", "dhanyavaad", "shukriya", "bye", "have a nice day", "good day"],
+        "rules": {
+            "keywords": ["thank you", "thanks", "dhanyavaad", "dhanyawad", "shukriya", "have a nice day", "bye"],
+            "position": "end",
+            "window": 3,
+            "match": "YES",
+            "speaker": "agent"
+        }
     },
     
     # Customer Sentiment
@@ -116,14 +165,16 @@ PREDEFINED_QUESTIONS = [
         "category": "Outcome",
         "question": "Did the customer seem satisfied at the end of the call?",
         "description": "Based on the customer's tone and responses, determine if they seemed satisfied with the interaction.",
-        "weight": 5
+        "weight": 5,
+        "keywords": ["thank you", "thanks", "dhanyavaad", "shukriya", "great", "accha", "badhiya", "perfect", "happy"]
     },
     {
         "id": "customer_frustrated",
         "category": "Outcome",
         "question": "Did the customer express frustration or dissatisfaction?",
         "description": "Look for signs of customer frustration, complaints, or negative sentiment during the call.",
-        "weight": 4
+        "weight": 4,
+        "keywords": ["angry", "frustrated", "complaint", "bakwas", "bekar", "pareshan", "gussa", "worst", "again", "phir se"]
     },
 ]
 
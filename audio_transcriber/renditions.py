@@ -0,0 +1,116 @@
+"""
+Playback rendition and waveform peaks for the results player.
+
+A single FFmpeg pass decodes the upload once and produces both a low-bitrate
+Opus/WebM file for playback and a low-rate PCM stream that is reduced to
+waveform peaks on the fly, so neither the decoded audio nor the original file
+is ever held in memory.
+"""
+
+import json
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+PLAYBACK_BITRATE = "32k"
+PLAYBACK_MEDIA_TYPE = "audio/webm"
+
+# Decode rate used only for the peaks, and peaks kept per second of audio
+PEAKS_SAMPLE_RATE = 8000
+PEAKS_PER_SECOND = 20
+
+READ_SIZE = 64 * 1024
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def create_renditions(source: str, playback_path: str, peaks_path: str) -> dict:
+    """
+    Encode the playback rendition and write the peaks JSON.
+
+    Args:
+        source: Uploaded audio file
+        playback_path: Destination of the Opus/WebM rendition
+        peaks_path: Destination of the peaks JSON
+
+    Returns:
+        Dictionary with `playback_path` and `peaks_path`, or an empty dict if
+        FFmpeg is unavailable or fails (playback then uses the original)
+    """
+    if not ffmpeg_available():
+        print("FFmpeg not found, skipping playback rendition")
+        return {}
+
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y", "-i", str(source),
+        # Output 1: playback rendition
+        "-map", "0:a:0", "-vn", "-ac", "1", "-c:a", "libopus", "-b:a", PLAYBACK_BITRATE,
+        "-application", "voip", "-f", "webm", str(playback_path),
+        # Output 2: raw PCM for the peaks, streamed through stdout
+        "-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(PEAKS_SAMPLE_RATE), "-f", "s16le", "pipe:1",
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        peaks = _read_peaks(process.stdout)
+        _, stderr = process.communicate()
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+
+    if process.returncode != 0:
+        print(f"FFmpeg rendition failed: {stderr.decode(errors='replace').strip()}")
+        Path(playback_path).unlink(missing_ok=True)
+        return {}
+
+    with open(peaks_path, "w") as f:
+        json.dump({
+            "peaks_per_second": PEAKS_PER_SECOND,
+            "duration": round(len(peaks) / PEAKS_PER_SECOND, 2),
+            "peaks": peaks,
+        }, f, separators=(",", ":"))
+
+    return {"playback_path": str(playback_path), "peaks_path": str(peaks_path)}
+
+
+def _read_peaks(stream) -> list:
+    """Reduce a 16-bit mono PCM stream to the max absolute amplitude per bucket (0-1)."""
+    bucket = PEAKS_SAMPLE_RATE // PEAKS_PER_SECOND
+    peaks = []
+    leftover = np.empty(0, dtype=np.int16)
+    pending = b""
+    while True:
+        data = stream.read(READ_SIZE)
+        if not data:
+            break
+        data = pending + data
+        # Keep an odd trailing byte for the next read
+        usable = len(data) - len(data) % 2
+        pending = data[usable:]
+        samples = np.concatenate((leftover, np.frombuffer(data[:usable], dtype="<i2")))
+        full = len(samples) - len(samples) % bucket
+        if full:
+            frames = np.abs(samples[:full].reshape(-1, bucket).astype(np.int32))
+            peaks.extend(np.round(frames.max(axis=1) / 32768.0, 3).tolist())
+        leftover = samples[full:]
+    if leftover.size:
+        peaks.append(round(float(np.abs(leftover.astype(np.int32)).max()) / 32768.0, 3))
+    return peaks
+
+
+def rendition_paths(source: str, job_id: str) -> dict:
+    """Where a job's renditions live, next to the upload."""
+    source = Path(source)
+    return {
+        "playback_path": str(source.with_name(f"{job_id}_playback.webm")),
+        "peaks_path": str(source.with_name(f"{job_id}_peaks.json")),
+    }
+
+
+def existing(path: Optional[str]) -> Optional[str]:
+    return path if path and Path(path).exists() else None
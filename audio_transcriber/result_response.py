@@ -0,0 +1,150 @@
+"""
+Cacheable, compressed responses for job results.
+
+The full result is served straight from the serialized (and pre-gzipped)
+payload in the job store; brotli, if installed, is only used for the
+smaller partial views. Partial views are cut from the decoded result,
+which is cached per ETag, and re-encoded with orjson when it is installed.
+Every response carries an ETag so unchanged results cost a 304.
+"""
+
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Fields included in each partial view ("transcript" is paginated separately)
+RESULT_VIEWS = {
+    "summary": ["job_id", "filename", "summary", "speaker_stats", "analytics", "audio_url"],
+    "evaluation": ["job_id", "evaluation"],
+    "analytics": ["job_id", "speaker_stats", "analytics"],
+    "timing": ["job_id", "timing"],
+    "transcript": None,
+}
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+# Decoded results by ETag, so paging through a transcript decodes it once
+DECODED_CACHE_SIZE = 32
+_decoded = OrderedDict()
+_decoded_lock = threading.Lock()
+
+
+def decode_result(payload: dict) -> dict:
+    """Decode a stored result payload (treat the returned dict as read-only)."""
+    etag = payload["etag"]
+    with _decoded_lock:
+        if etag in _decoded:
+            _decoded.move_to_end(etag)
+            return _decoded[etag]
+    result = orjson.loads(payload["result"]) if orjson is not None else json.loads(payload["result"])
+    with _decoded_lock:
+        _decoded[etag] = result
+        while len(_decoded) > DECODED_CACHE_SIZE:
+            _decoded.popitem(last=False)
+    return result
+
+
+def result_view(result: dict, view: str, offset: int = 0, limit: Optional[int] = None) -> dict:
+    """Cut a partial view out of a full result."""
+    if view == "transcript":
+        transcript = result.get("transcript", [])
+        end = len(transcript) if limit is None else offset + limit
+        return {
+            "job_id": result.get("job_id"),
+            "total": len(transcript),
+            "offset": offset,
+            "limit": limit,
+            "transcript": transcript[offset:end],
+        }
+    return {key: result.get(key) for key in RESULT_VIEWS[view]}
+
+
+def negotiate_encoding(accept_encoding: str, precompressed: bool = False) -> Optional[str]:
+    """
+    Preferred supported content coding from an Accept-Encoding header.
+
+    With a `precompressed` gzip body at hand, gzip wins over brotli so the
+    body is not compressed again on every request.
+    """
+    offered = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        params = params.strip()
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            offered.add(name.strip().lower())
+    if precompressed and "gzip" in offered:
+        return "gzip"
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _cache_headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag))
+
+
+def cached_json_response(body: bytes, etag: str, accept_encoding: str,
+                         gzipped: Optional[bytes] = None) -> Response:
+    """
+    JSON response with an ETag, compressed according to Accept-Encoding.
+
+    Args:
+        body: Encoded JSON
+        etag: Quoted entity tag for this exact body
+        accept_encoding: Request Accept-Encoding header
+        gzipped: Precompressed gzip body, used instead of compressing again
+    """
+    headers = _cache_headers(etag)
+    encoding = (negotiate_encoding(accept_encoding, gzipped is not None)
+                if len(body) >= MIN_COMPRESS_BYTES else None)
+    if encoding == "br":
+        body = brotli.compress(body, quality=5)
+    elif encoding == "gzip":
+        body = gzipped if gzipped is not None else gzip.compress(body, compresslevel=6)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,2 +1,124 @@
-# retriever removed — file kept empty to preserve workspace state
+"""
+Transcript retriever used to select evidence for question evaluation.
 
+Segments produced by `AudioTranscriber.transcribe_segments` are indexed with
+Okapi BM25 so that each evaluation batch only carries the turns relevant to
+its questions (plus surrounding context) instead of the whole call.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Function words (English + common Hinglish) that carry no retrieval signal
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for",
+    "from", "has", "have", "if", "in", "is", "it", "of", "on", "or", "the",
+    "their", "them", "they", "this", "to", "was", "were", "with", "any", "check",
+    "agent", "customer", "call",
+    "hai", "hain", "ho", "ka", "ke", "ki", "ko", "se", "me", "mein", "toh",
+    "bhi", "na", "ne", "ye", "wo", "aur", "kya",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def format_segment(item: dict) -> str:
+    """Render a transcript segment the same way `AudioTranscriber.summarize` does."""
+    return f"[{item['start']:.2f}s - {item['end']:.2f}s] {item['speaker']}: {item['text']}"
+
+
+class TranscriptRetriever:
+    """BM25 index over the turns of a single call transcript."""
+
+    def __init__(self, segments: List[dict], k1: float = 1.5, b: float = 0.75):
+        self.segments = segments
+        self.k1 = k1
+        self.b = b
+
+        # Inverted index: term -> [(segment index, term frequency), ...]
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+
+        for idx, segment in enumerate(segments):
+            tokens = tokenize(segment.get("text", ""))
+            self.doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings[term].append((idx, tf))
+
+        total = len(self.doc_lengths)
+        self.avg_length = (sum(self.doc_lengths) / total) if total else 0.0
+        self.idf = {
+            term: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[int, float]]:
+        """Return up to `top_k` (segment index, score) pairs, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        avg_length = self.avg_length or 1.0
+
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for idx, tf in self.postings[term]:
+                norm = 1 - self.b + self.b * self.doc_lengths[idx] / avg_length
+                scores[idx] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+        return heapq.nsmallest(top_k, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def select(self, questions: Iterable[dict], top_k: int = 3, context: int = 1,
+               anchor_turns: int = 2) -> List[int]:
+        """
+        Pick the segment indices to send to the LLM for a batch of questions.
+
+        Args:
+            questions: Question dicts (uses `question`, `description` and optional `keywords`)
+            top_k: Best matching turns kept per question
+            context: Neighbouring turns added on each side of every hit
+            anchor_turns: Opening and closing turns that are always included
+
+        Returns:
+            Sorted list of segment indices
+        """
+        total = len(self.segments)
+        selected = set(range(min(anchor_turns, total)))
+        selected.update(range(max(total - anchor_turns, 0), total))
+
+        for q in questions:
+            query = " ".join([
+                q.get("question", ""),
+                q.get("description", ""),
+                " ".join(q.get("keywords", [])),
+            ])
+            for idx, _score in self.search(query, top_k=top_k):
+                selected.update(range(max(idx - context, 0), min(idx + context + 1, total)))
+
+        return sorted(selected)
+
+    def format(self, indices: List[int]) -> str:
+        """Render selected segments, marking skipped stretches of the call with '...'."""
+        lines = []
+        previous = None
+        for idx in indices:
+            item = self.segments[idx]
+            if previous is not None and idx != previous + 1:
+                lines.append("...")
+            previous = idx
+            if item.get("text", "").strip():
+                lines.append(format_segment(item))
+        return "\n".join(lines)
+
+    def excerpt(self, questions: List[dict], top_k: int = 3, context: int = 1,
+                anchor_turns: int = 2) -> Tuple[str, int]:
+        """Formatted evidence for a question batch and the number of turns it contains."""
+        indices = self.select(questions, top_k=top_k, context=context, anchor_turns=anchor_turns)
+        return self.format(indices), len(indices)
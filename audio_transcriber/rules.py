@@ -0,0 +1,176 @@
+"""
+Deterministic rule tier that can answer some questions without the LLM.
+
+A question may carry an optional `rules` dict:
+
+    "rules": {
+        "keywords": ["namaste", "good morning"],   # literal phrases, whole-word match
+        "regex": ["main .* se bol (raha|rahi)"],   # regular expressions
+        "position": "start",                      # "start", "end" or "any"
+        "window": 3,                              # turns searched from start/end
+        "speaker": "agent",                       # only count turns by the "agent" or "customer" (default any)
+        "match": "YES",                           # status when a pattern matches (null = ask the LLM)
+        "no_match": null,                         # status when nothing matches (null = ask the LLM)
+        "confidence": 90
+    }
+
+Patterns are compiled once per distinct rule definition and matched
+case-insensitively against the transcript segments.
+
+A rule restricted to a speaker role only decides on a match when the roles
+are known (see `infer_roles`); otherwise a match could have come from either
+side, so the question is left to the LLM.
+"""
+
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+VALID_STATUSES = {"YES", "NO", "PARTIAL", "N/A"}
+VALID_POSITIONS = {"start", "end", "any"}
+VALID_ROLES = {"agent", "customer", "any"}
+
+# Phrases from the agent's script: offering help, introducing the company,
+# putting on hold. Used to tell which diarized speaker is the agent.
+AGENT_CUES = re.compile(
+    r"\b(?:how (?:may|can) i (?:help|assist)|kaise madad|kya madad|madad kar sakta|madad kar sakti|"
+    r"thank you for calling|calling from|se bol (?:raha|rahi)|anything else|aur kuch madad|koi aur madad|"
+    r"please hold|hold (?:par|pe) rakh|line pe rahiye|ticket number|complaint number)\b",
+    re.IGNORECASE,
+)
+
+
+class CompiledRule:
+    """A question's rules with patterns compiled into a single regex."""
+
+    def __init__(self, spec: dict):
+        patterns = [r"\b" + re.escape(k.strip()) + r"\b" for k in spec.get("keywords", []) if k.strip()]
+        patterns.extend(spec.get("regex", []))
+        if not patterns:
+            raise ValueError("Rule needs at least one keyword or regex")
+        self.pattern = re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+        self.position = spec.get("position", "any")
+        if self.position not in VALID_POSITIONS:
+            raise ValueError(f"Invalid rule position: {self.position}")
+        self.window = int(spec.get("window", 3))
+        self.speaker = spec.get("speaker", "any")
+        if self.speaker not in VALID_ROLES:
+            raise ValueError(f"Invalid rule speaker: {self.speaker}")
+
+        self.match_status = spec.get("match", "YES")
+        self.no_match_status = spec.get("no_match")
+        for status in (self.match_status, self.no_match_status):
+            if status is not None and status not in VALID_STATUSES:
+                raise ValueError(f"Invalid rule status: {status}")
+        self.confidence = int(spec.get("confidence", 90))
+
+    def _candidates(self, segments: List[dict]) -> List[dict]:
+        """Segments inside the rule's position window."""
+        if self.position == "start":
+            return segments[:self.window]
+        if self.position == "end":
+            return segments[-self.window:] if self.window > 0 else []
+        return segments
+
+    def apply(self, segments: List[dict], roles: Optional[Dict[str, str]] = None) -> Optional[dict]:
+        """
+        Return a decided status with evidence, or None if the rule is undecided.
+
+        `roles` maps speaker labels to "agent"/"customer"; without it, a match
+        in a speaker-restricted rule is not decisive.
+        """
+        where = "in the call" if self.position == "any" else f"in the {self.position} {self.window} turns"
+        if self.speaker != "any":
+            where = f"by the {self.speaker} {where}"
+
+        for segment in self._candidates(segments):
+            if self.speaker != "any" and roles and roles.get(segment.get("speaker")) != self.speaker:
+                continue
+            found = self.pattern.search(segment.get("text", ""))
+            if found:
+                if self.match_status is None or (self.speaker != "any" and not roles):
+                    return None
+                return {
+                    "status": self.match_status,
+                    "confidence": self.confidence,
+                    "evidence": segment["text"].strip(),
+                    "reasoning": f"Rule matched '{found.group(0)}' {where}",
+                }
+
+        if self.no_match_status is None:
+            return None
+        return {
+            "status": self.no_match_status,
+            "confidence": self.confidence,
+            "evidence": "",
+            "reasoning": f"Rule found no matching phrase {where}",
+        }
+
+
+@lru_cache(maxsize=256)
+def _compile_cached(spec_json: str) -> CompiledRule:
+    return CompiledRule(json.loads(spec_json))
+
+
+def compile_rule(spec: dict) -> CompiledRule:
+    """Compile a rule definition, reusing the compiled form for identical definitions."""
+    return _compile_cached(json.dumps(spec, sort_keys=True))
+
+
+def infer_roles(segments: List[dict]) -> Optional[Dict[str, str]]:
+    """
+    Guess which speaker is the agent from agent-script phrases.
+
+    Returns speaker label -> "agent"/"customer", or None unless one speaker
+    says at least two such phrases and at least twice as many as anyone else.
+    """
+    cues = Counter()
+    for segment in segments:
+        cues[segment.get("speaker")] += len(AGENT_CUES.findall(segment.get("text", "")))
+    ranked = cues.most_common()
+    if not ranked or ranked[0][1] < 2:
+        return None
+    agent, count = ranked[0]
+    if len(ranked) > 1 and ranked[1][1] * 2 > count:
+        return None
+    return {speaker: "agent" if speaker == agent else "customer" for speaker in cues}
+
+
+def apply_rules(question: dict, segments: List[dict],
+                roles: Optional[Dict[str, str]] = None) -> Optional[dict]:
+    """
+    Pre-score a question with its rules.
+
+    Args:
+        question: Question dict, optionally carrying a `rules` definition
+        segments: Transcript segments of the call
+        roles: Speaker label -> "agent"/"customer", if known
+
+    Returns:
+        Evaluation dict in the same shape `CallEvaluator` produces, or None
+        when the question has no rules or the rules are not decisive
+    """
+    spec = question.get("rules")
+    if not spec or not segments:
+        return None
+
+    try:
+        decision = compile_rule(spec).apply(segments, roles)
+    except (ValueError, re.error) as e:
+        print(f"Ignoring invalid rules for question {question.get('id')}: {e}")
+        return None
+
+    if decision is None:
+        return None
+
+    return {
+        "question_id": question["id"],
+        "question": question["question"],
+        "category": question.get("category", "General"),
+        "weight": question.get("weight", 1),
+        **decision,
+        "decided_by": "rules",
+    }
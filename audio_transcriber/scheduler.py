@@ -0,0 +1,287 @@
+"""
+Bounded, prioritised job scheduler.
+
+Jobs are queued in the persistent job store (so the queue survives restarts
+and is shared by every API process) and executed stage by stage: each
+pipeline stage has its own fixed number of worker threads that only claim jobs
+waiting at that stage. Admission control keeps the queue bounded: when it is
+full, interactive jobs are rejected and backfill jobs are deferred until room
+frees up, so bursts cannot make every job compete for the models at once.
+"""
+
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from job_store import JobStore
+
+# Lower value runs first
+PRIORITIES = {
+    "interactive": 0,
+    "backfill": 10,
+}
+
+# Priorities that are parked instead of rejected when the queue is full
+DEFERRABLE = {"backfill"}
+
+# Instances refresh their registration this often; one that has been silent
+# for INSTANCE_TIMEOUT is treated as dead and its jobs are re-queued.
+HEARTBEAT_INTERVAL = 10.0
+INSTANCE_TIMEOUT = 60.0
+
+# Instances registered by this process (a restart can reuse the same pid)
+_own_instances = set()
+
+
+class QueueFullError(Exception):
+    """Raised when a job cannot be admitted because the queue is full."""
+
+    def __init__(self, retry_after: Optional[int] = None):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+class InstanceRegistration:
+    """
+    Keeps an instance id ("<pid>-<random>") registered as live in the job
+    store while it holds claims. Claims are made as "<instance id>-...".
+    """
+
+    def __init__(self, store: JobStore, interval: float = HEARTBEAT_INTERVAL):
+        self.store = store
+        self.interval = interval
+        self.id = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        _own_instances.add(self.id)
+        self.store.register_instance(self.id, os.getpid(), socket.gethostname())
+        self._thread = threading.Thread(target=self._beat, name="instance-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _beat(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.store.heartbeat_instance(self.id)
+            except Exception as e:
+                print(f"Instance heartbeat failed: {e}")
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(self.interval)
+            self._thread = None
+        self.store.unregister_instance(self.id)
+        _own_instances.discard(self.id)
+
+
+class JobScheduler:
+    def __init__(self, store: JobStore, run_stage: Callable[[str, str], None],
+                 stages: List[str], stage_workers: Dict[str, int],
+                 max_queue: int = 20, poll_interval: float = 1.0):
+        self.store = store
+        self.run_stage = run_stage
+        self.stages = stages
+        self.stage_workers = stage_workers
+        self.max_queue = max_queue
+        self.poll_interval = poll_interval
+
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._registration = InstanceRegistration(store)
+        self._instance = self._registration.id
+
+    def start(self):
+        """Start the worker threads (idempotent)."""
+        if self._threads:
+            return
+        requeue_orphaned(self.store)
+        self._registration.start()
+        for stage in self.stages:
+            for i in range(self.stage_workers.get(stage, 0)):
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    args=(f"{self._instance}-{stage}-{i}", stage),
+                    name=f"job-worker-{stage}-{i}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        if self._threads:
+            self._registration.stop()
+        self._threads = []
+
+    def submit(self, job_id: str, priority: str = "interactive", stage: Optional[str] = None) -> str:
+        """
+        Admit a job to the queue, starting at `stage` (default: the first stage).
+
+        Returns:
+            "queued" or "deferred"
+
+        Raises:
+            ValueError: Unknown priority
+            QueueFullError: Queue is full and the priority cannot be deferred
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'. Use one of: {', '.join(PRIORITIES)}")
+
+        status = self.store.enqueue(
+            job_id,
+            PRIORITIES[priority],
+            self.max_queue,
+            defer=priority in DEFERRABLE,
+            stage=stage or self.stages[0],
+        )
+        if status is None:
+            raise QueueFullError(retry_after=self._retry_after())
+
+        with self._wakeup:
+            self._wakeup.notify_all()
+        return status
+
+    def queue_info(self, job_id: str) -> dict:
+        """Queue position (0 = next) and estimated seconds until the job finishes."""
+        job = self.store.get(job_id)
+        if job is None:
+            return {}
+        avg = self.store.average_duration()
+
+        # Not started yet (a resumed job may enter the queue at a later stage)
+        if job["status"] == "queued" and not job.get("started_at"):
+            position = self.store.queue_position(job_id)
+            workers = max(1, self.stage_workers.get(job.get("stage"), 1))
+            eta = None
+            # position is None if a worker claimed the job since we read it
+            if avg is not None and position is not None:
+                # Full waves of jobs ahead of us, then our own run
+                eta = (math.floor(position / workers) + 1) * avg
+            return {"queue_position": position, "eta_seconds": _round_eta(eta)}
+
+        # Once started the job is in flight, even while waiting between stages
+        if job["status"] in ("queued", "processing") and avg is not None and job.get("started_at"):
+            remaining = max(avg - (time.time() - job["started_at"]), 0)
+            return {"queue_position": None, "eta_seconds": _round_eta(remaining)}
+
+        return {"queue_position": None, "eta_seconds": None}
+
+    def _retry_after(self) -> Optional[int]:
+        avg = self.store.average_duration()
+        return int(math.ceil(avg / self._entry_workers)) if avg else None
+
+    @property
+    def _entry_workers(self) -> int:
+        """Worker slots of the first stage, which sets the pace of the queue."""
+        return max(1, self.stage_workers.get(self.stages[0], 1))
+
+    def _worker_loop(self, worker_id: str, stage: str):
+        while not self._stopping.is_set():
+            if stage == self.stages[0]:
+                self.store.promote_deferred(self.max_queue)
+            job = self.store.claim_next(worker_id, stage=stage)
+            if job is None:
+                # Also poll, since other processes may enqueue into the same store
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            try:
+                self.run_stage(job["job_id"], stage)
+            except Exception as e:
+                print(f"Worker {worker_id} crashed on job {job['job_id']}: {e}")
+                self.store.update(job["job_id"], status="failed", message=f"Error: {e}")
+            # Wake the next stage's workers instead of waiting for their poll
+            with self._wakeup:
+                self._wakeup.notify_all()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def requeue_orphaned(store: JobStore, timeout: float = INSTANCE_TIMEOUT) -> int:
+    """
+    Re-queue processing jobs whose worker instance no longer exists.
+
+    Claims start with the claiming instance's id (see `InstanceRegistration`).
+    An instance is dead when it stopped sending heartbeats, when its process
+    on this host has exited, or when it carries this process's pid without
+    being one of its instances (a restart that got the same pid, as PID 1 in
+    a container does).
+    """
+    live = store.live_instances(time.time() - timeout)
+    host = socket.gethostname()
+    dead = []
+    for claimant in store.claimants():
+        instance = "-".join(claimant.split("-", 2)[:2])
+        if instance in _own_instances:
+            continue
+        info = live.get(instance)
+        if info is None or (info["host"] == host and
+                            (info["pid"] == os.getpid() or not _pid_alive(info["pid"]))):
+            dead.append(claimant)
+    count = store.requeue_claimed(dead)
+    if count:
+        print(f"Re-queued {count} job(s) left behind by dead workers")
+    return count
+
+
+def _round_eta(seconds: Optional[float]) -> Optional[int]:
+    return int(round(seconds)) if seconds is not None else None
+
+
+def stage_workers_from_env(stages: List[str], defaults: Dict[str, int],
+                           model_stages=()) -> Dict[str, int]:
+    """
+    Worker slots per stage.
+
+    STAGE_WORKERS (e.g. "diarize=1,transcribe=1,summarize=2,evaluate=2")
+    overrides individual stages. Model stages are capped at one slot: the
+    Whisper/NeMo models are loaded once per process and are not known to be
+    thread-safe, so parallel inference needs more worker processes
+    (`worker.py --workers N`) instead.
+    """
+    workers = dict(defaults)
+    for item in filter(None, os.getenv("STAGE_WORKERS", "").split(",")):
+        stage, _, count = item.partition("=")
+        stage = stage.strip()
+        if stage not in stages:
+            raise ValueError(f"Unknown stage '{stage}' in STAGE_WORKERS. Use one of: {', '.join(stages)}")
+        workers[stage] = int(count)
+
+    for stage in model_stages:
+        if workers.get(stage, 0) > 1:
+            print(f"Warning: {stage} shares one model per process; using 1 slot instead of {workers[stage]}. "
+                  f"Run more worker processes (worker.py --workers N) to process jobs in parallel.")
+            workers[stage] = 1
+    return workers
+
+
+def scheduler_from_env(store: JobStore, run_stage: Callable[[str, str], None],
+                       stages: List[str], default_workers: Dict[str, int],
+                       model_stages=()) -> JobScheduler:
+    """Build a scheduler configured by STAGE_WORKERS and MAX_QUEUE_SIZE."""
+    return JobScheduler(
+        store,
+        run_stage,
+        stages,
+        stage_workers_from_env(stages, default_workers, model_stages),
+        max_queue=int(os.getenv("MAX_QUEUE_SIZE", "20")),
+    )
@@ -0,0 +1,174 @@
+"""
+Full-text search over the transcripts of processed calls.
+
+Segments live in `search_segments` (one row per transcript turn, with job,
+speaker and millisecond timestamps) and are indexed by the SQLite FTS5 table
+`transcript_fts`, kept in sync by triggers; `search_jobs` holds per-call
+columns used for filtering (filename, overall score, completion time).
+
+`JobStore` calls `index_result` inside the transaction that stores a job's
+result, so the index is updated incrementally as each job finishes and never
+disagrees with the stored results. If the SQLite build lacks FTS5, search is
+disabled and everything else works as before.
+"""
+
+import re
+import sqlite3
+from typing import List, Optional
+
+SEARCH_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS search_jobs ("
+    "job_id TEXT PRIMARY KEY, filename TEXT, overall_score REAL, grade TEXT, "
+    "completed_at REAL, segments INTEGER NOT NULL DEFAULT 0)",
+    "CREATE INDEX IF NOT EXISTS idx_search_jobs_score ON search_jobs(overall_score)",
+    "CREATE INDEX IF NOT EXISTS idx_search_jobs_completed ON search_jobs(completed_at)",
+    "CREATE TABLE IF NOT EXISTS search_segments ("
+    "id INTEGER PRIMARY KEY, job_id TEXT NOT NULL, segment INTEGER NOT NULL, "
+    "speaker TEXT, start_ms INTEGER, end_ms INTEGER, text TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_search_segments_job ON search_segments(job_id)",
+    # External content table: the text is stored once, in search_segments
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5("
+    "text, content='search_segments', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS search_segments_ai AFTER INSERT ON search_segments BEGIN "
+    "INSERT INTO transcript_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS search_segments_ad AFTER DELETE ON search_segments BEGIN "
+    "INSERT INTO transcript_fts(transcript_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+]
+
+# Bare words, "quoted phrases", optionally ending in * for a prefix match
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+SNIPPET_TOKENS = 16
+
+
+class SearchQueryError(ValueError):
+    """The search text contains no searchable terms."""
+
+
+def init_schema(conn: sqlite3.Connection) -> bool:
+    """Create the search tables. Returns False if SQLite was built without FTS5."""
+    try:
+        for statement in SEARCH_SCHEMA:
+            conn.execute(statement)
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        print(f"Warning: transcript search disabled, SQLite lacks FTS5 ({e})")
+        return False
+    return True
+
+
+def fts_query(text: str, match_any: bool = False) -> str:
+    """
+    Turn user search text into an FTS5 query.
+
+    Every word or "quoted phrase" becomes a quoted FTS5 string, so operators
+    and punctuation in the input cannot break the query; a trailing `*` keeps
+    its prefix meaning. Terms are ANDed, or ORed with `match_any`.
+    """
+    terms = []
+    for phrase, word in _TERM.findall(text):
+        term = phrase if phrase else word
+        prefix = term.endswith("*")
+        term = term.rstrip("*").strip()
+        # Tokens are made of letters, marks and digits; skip pure punctuation
+        if not any(ch.isalnum() for ch in term):
+            continue
+        quoted = '"' + term.replace('"', '""') + '"'
+        terms.append(quoted + "*" if prefix else quoted)
+    if not terms:
+        raise SearchQueryError("Search text has no searchable words")
+    return (" OR " if match_any else " ").join(terms)
+
+
+def index_result(conn: sqlite3.Connection, job_id: str, result: dict, completed_at: float) -> int:
+    """(Re)index a job's transcript. Runs inside the caller's transaction. Returns segments indexed."""
+    remove(conn, job_id)
+    rows = []
+    for i, segment in enumerate(result.get("transcript") or []):
+        text = (segment.get("text") or "").strip()
+        if not text:
+            continue
+        rows.append((
+            job_id, i, segment.get("speaker"),
+            _ms(segment.get("start")), _ms(segment.get("end")), text,
+        ))
+    conn.executemany(
+        "INSERT INTO search_segments (job_id, segment, speaker, start_ms, end_ms, text) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    scores = (result.get("evaluation") or {}).get("scores") or {}
+    conn.execute(
+        "INSERT OR REPLACE INTO search_jobs (job_id, filename, overall_score, grade, completed_at, segments) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (job_id, result.get("filename"), scores.get("overall_score"), scores.get("grade"),
+         completed_at, len(rows)),
+    )
+    return len(rows)
+
+
+def remove(conn: sqlite3.Connection, job_id: str):
+    """Drop a job from the index (the trigger removes its FTS entries)."""
+    conn.execute("DELETE FROM search_segments WHERE job_id = ?", (job_id,))
+    conn.execute("DELETE FROM search_jobs WHERE job_id = ?", (job_id,))
+
+
+def search(conn: sqlite3.Connection, query: str, speaker: Optional[str] = None,
+           job_id: Optional[str] = None, min_score: Optional[float] = None,
+           max_score: Optional[float] = None, since: Optional[float] = None,
+           until: Optional[float] = None, limit: int = 20, offset: int = 0) -> List[dict]:
+    """
+    Matching segments, best (BM25) first.
+
+    Args:
+        query: FTS5 query (see `fts_query`)
+        speaker: Only segments by this speaker label
+        job_id: Only segments of this call
+        min_score, max_score: Bounds on the call's overall evaluation score
+        since, until: Bounds on when the call finished processing (epoch seconds)
+        limit, offset: Paging
+
+    Returns:
+        Hits with job, segment index, speaker, start_ms/end_ms, highlighted
+        snippet, rank, and the call's filename/score/completion time
+    """
+    filters, params = [], [query]
+    for clause, value in (
+        ("s.speaker = ?", speaker),
+        ("s.job_id = ?", job_id),
+        ("j.overall_score >= ?", min_score),
+        ("j.overall_score <= ?", max_score),
+        ("j.completed_at >= ?", since),
+        ("j.completed_at <= ?", until),
+    ):
+        if value is not None:
+            filters.append(clause)
+            params.append(value)
+    where = "".join(f" AND {clause}" for clause in filters)
+
+    rows = conn.execute(
+        "SELECT s.job_id, s.segment, s.speaker, s.start_ms, s.end_ms, "
+        f"snippet(transcript_fts, 0, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}) AS snippet, "
+        "bm25(transcript_fts) AS rank, j.filename, j.overall_score, j.grade, j.completed_at "
+        "FROM transcript_fts "
+        "JOIN search_segments s ON s.id = transcript_fts.rowid "
+        "JOIN search_jobs j ON j.job_id = s.job_id "
+        f"WHERE transcript_fts MATCH ?{where} "
+        "ORDER BY rank LIMIT ? OFFSET ?",
+        [*params, limit, offset],
+    ).fetchall()
+    return [{**dict(row), "rank": round(row["rank"], 4)} for row in rows]
+
+
+def stats(conn: sqlite3.Connection) -> dict:
+    row = conn.execute("SELECT COUNT(*) AS calls, COALESCE(SUM(segments), 0) AS segments FROM search_jobs").fetchone()
+    return {"calls": row["calls"], "segments": row["segments"]}
+
+
+def _ms(seconds) -> Optional[int]:
+    try:
+        return int(round(float(seconds) * 1000))
+    except (TypeError, ValueError):
+        return None
@@ -1,6 +1,7 @@
 // ============== STATE ==============
 let currentJobId = null;
 let pollingInterval = null;
+let eventSource = null;
 let resultData = null;
 let allExpanded = false;
 let questionsData = { questions: [], categories: {} };
@@ -22,10 +23,13 @@ const resultsSection = document.getElementById('resultsSection');
 const progressFill = document.getElementById('progressFill');
 const progressPercent = document.getElementById('progressPercent');
 const progressMessage = document.getElementById('progressMessage');
+const liveTranscript = document.getElementById('liveTranscript');
 const transcriptAudioContainer = document.getElementById('transcriptAudioContainer');
 const transcriptAudioPlayer = document.getElementById('transcriptAudioPlayer');
 const transcriptAudioFilename = document.getElementById('transcriptAudioFilename');
 const transcriptAudioDownloadBtn = document.getElementById('transcriptAudioDownloadBtn');
+const waveformCanvas = document.getElementById('waveformCanvas');
+let waveformPeaks = null;
 
 // ============== INITIALIZATION ==============
 document.addEventListener('DOMContentLoaded', () => {
@@ -514,12 +518,11 @@ async function startProcessing() {
     setStepActive(1);
 
     try {
-        const formData = new FormData();
-        formData.append('file', file);
-
-        const uploadResponse = await fetch('/upload', {
+        // Send the file as the raw body so the server can stream it to disk
+        const uploadResponse = await fetch(`/upload/stream?filename=${encodeURIComponent(file.name)}`, {
             method: 'POST',
-            body: formData
+            headers: { 'Content-Type': file.type || 'application/octet-stream' },
+            body: file
         });
 
         if (!uploadResponse.ok) {
@@ -538,10 +541,11 @@ async function startProcessing() {
         });
 
         if (!processResponse.ok) {
-            throw new Error('Failed to start processing');
+            const error = await processResponse.json().catch(() => ({}));
+            throw new Error(error.detail || 'Failed to start processing');
         }
 
-        startPolling();
+        startProgressStream();
 
     } catch (error) {
         console.error('Error:', error);
@@ -550,37 +554,128 @@ async function startProcessing() {
     }
 }
 
+// Live progress over Server-Sent Events; falls back to polling without EventSource
+function startProgressStream() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    clearLiveTranscript();
+    eventSource = new EventSource(`/events/${currentJobId}`);
+
+    eventSource.addEventListener('progress', (event) => {
+        const data = JSON.parse(event.data);
+        updateProgress(data.progress, describeQueueState(data));
+        updateSteps(data.progress);
+    });
+    eventSource.addEventListener('segment', (event) => {
+        appendLiveSegment(JSON.parse(event.data));
+    });
+    eventSource.addEventListener('completed', () => {
+        handleJobStatus({ status: 'completed', progress: 100, job_id: currentJobId });
+    });
+    eventSource.addEventListener('failed', (event) => {
+        const data = JSON.parse(event.data);
+        handleJobStatus({ status: 'failed', progress: 0, message: data.message });
+    });
+}
+
 function startPolling() {
     pollingInterval = setInterval(async () => {
         try {
             const response = await fetch(`/status/${currentJobId}`);
             const data = await response.json();
 
-            updateProgress(data.progress, data.message);
+            updateProgress(data.progress, describeQueueState(data));
             updateSteps(data.progress);
-
-            if (data.status === 'completed') {
-                stopPolling();
-                resultData = data.result || {};
-                resultData.job_id = resultData.job_id || data.job_id || currentJobId;
-                resultData.audio_url = resolveAudioUrl(resultData);
-                showResults(resultData);
-            } else if (data.status === 'failed') {
-                stopPolling();
-                showToast('Processing failed: ' + data.message, 'error');
-                resetApp();
-            }
+            handleJobStatus(data);
         } catch (error) {
             console.error('Polling error:', error);
         }
     }, 1000);
 }
 
+async function handleJobStatus(data) {
+    if (data.status === 'completed') {
+        stopPolling();
+        try {
+            // Fetch the full result once; status updates stay small
+            const response = await fetch(`/result/${currentJobId}`);
+            if (!response.ok) throw new Error('Failed to load result');
+            resultData = await response.json();
+        } catch (error) {
+            showToast('Error: ' + error.message, 'error');
+            return;
+        }
+        clearLiveTranscript();
+        resultData.job_id = resultData.job_id || data.job_id || currentJobId;
+        resultData.audio_url = resolveAudioUrl(resultData);
+        showResults(resultData);
+    } else if (data.status === 'failed') {
+        stopPolling();
+        showToast('Processing failed: ' + data.message, 'error');
+        // Keep the job so finished stages can be reused by a retry
+        document.getElementById('retryActions').classList.remove('hidden');
+    }
+}
+
+function appendLiveSegment(segment) {
+    // A retried transcription re-sends segments; replace rather than duplicate
+    let row = document.getElementById(`live-segment-${segment.index}`);
+    if (!row) {
+        row = document.createElement('div');
+        row.className = 'transcript-segment';
+        row.id = `live-segment-${segment.index}`;
+        liveTranscript.appendChild(row);
+    }
+    const speakerIndex = parseInt(segment.speaker.replace('SPEAKER_', '')) || 0;
+    row.innerHTML = `
+        <span class="segment-time">${formatTime(segment.start)} - ${formatTime(segment.end)}</span>
+        <span class="segment-speaker speaker-${speakerIndex % 3}">${segment.speaker}</span>
+        <span class="segment-text">${segment.text || '<em>No speech detected</em>'}</span>
+    `;
+    liveTranscript.classList.remove('hidden');
+    liveTranscript.scrollTop = liveTranscript.scrollHeight;
+}
+
+function clearLiveTranscript() {
+    liveTranscript.innerHTML = '';
+    liveTranscript.classList.add('hidden');
+}
+
+async function retryProcessing() {
+    document.getElementById('retryActions').classList.add('hidden');
+    try {
+        const response = await fetch(`/retry/${currentJobId}`, { method: 'POST' });
+        if (!response.ok) {
+            const error = await response.json().catch(() => ({}));
+            throw new Error(error.detail || 'Failed to retry');
+        }
+        const data = await response.json();
+        progressMessage.textContent = data.message;
+        startProgressStream();
+    } catch (error) {
+        showToast('Error: ' + error.message, 'error');
+        document.getElementById('retryActions').classList.remove('hidden');
+    }
+}
+
+function describeQueueState(data) {
+    if (data.status !== 'queued' || data.queue_position == null) return data.message;
+    const ahead = data.queue_position === 0 ? 'next in line' : `${data.queue_position} ahead`;
+    const eta = data.eta_seconds != null ? `, ~${formatDuration(data.eta_seconds)}` : '';
+    return `Waiting in queue (${ahead}${eta})`;
+}
+
 function stopPolling() {
     if (pollingInterval) {
         clearInterval(pollingInterval);
         pollingInterval = null;
     }
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
 }
 
 function updateProgress(percent, message) {
@@ -631,7 +726,9 @@ function showResults(result) {
     document.getElementById('summaryContent').textContent = result.summary;
 
     const speakerStats = document.getElementById('speakerStats');
-    speakerStats.innerHTML = result.speaker_stats.map((stat, index) => `
+    const analytics = result.analytics || { call: {}, speakers: [] };
+    const speakerAnalytics = Object.fromEntries((analytics.speakers || []).map(s => [s.speaker, s]));
+    speakerStats.innerHTML = renderCallAnalytics(analytics.call) + result.speaker_stats.map((stat, index) => `
         <div class="speaker-stat-item">
             <div class="speaker-name">
                 <div class="speaker-avatar speaker-${index % 3}">
@@ -654,15 +751,28 @@ function showResults(result) {
                     <div class="stat-value">${stat.words}</div>
                     <div class="stat-label">Words</div>
                 </div>
+                ${speakerAnalytics[stat.speaker] ? `
+                <div class="stat-item">
+                    <div class="stat-value">${Math.round(speakerAnalytics[stat.speaker].talk_ratio * 100)}%</div>
+                    <div class="stat-label">Talk Share</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-value">${Math.round(speakerAnalytics[stat.speaker].words_per_minute)}</div>
+                    <div class="stat-label">WPM</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-value">${speakerAnalytics[stat.speaker].interruptions}</div>
+                    <div class="stat-label">Interruptions</div>
+                </div>` : ''}
             </div>
         </div>
     `).join('');
 
     const transcriptContent = document.getElementById('transcriptContent');
-    transcriptContent.innerHTML = result.transcript.map((segment) => {
+    transcriptContent.innerHTML = result.transcript.map((segment, index) => {
         const speakerIndex = parseInt(segment.speaker.replace('SPEAKER_', '')) || 0;
         return `
-            <div class="transcript-segment">
+            <div class="transcript-segment" id="segment-${index}">
                 <span class="segment-time">${formatTime(segment.start)} - ${formatTime(segment.end)}</span>
                 <span class="segment-speaker speaker-${speakerIndex % 3}">${segment.speaker}</span>
                 <span class="segment-text">${segment.text || '<em>No speech detected</em>'}</span>
@@ -673,6 +783,43 @@ function showResults(result) {
     showToast('Processing complete!', 'success');
 }
 
+function renderCallAnalytics(call) {
+    if (!call || call.duration === undefined) return '';
+    const latency = call.response_latency && call.response_latency.mean !== null
+        ? `${call.response_latency.mean.toFixed(1)}s` : '-';
+    return `
+        <div class="speaker-stat-item">
+            <div class="speaker-name"><span>Conversation</span></div>
+            <div class="speaker-stats-grid">
+                <div class="stat-item">
+                    <div class="stat-value">${Math.round(call.silence_ratio * 100)}%</div>
+                    <div class="stat-label">Silence</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-value">${call.dead_air.length}</div>
+                    <div class="stat-label">Dead Air</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-value">${call.interruption_count}</div>
+                    <div class="stat-label">Interruptions</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-value">${formatDuration(call.longest_monologue.duration)}</div>
+                    <div class="stat-label">Longest Monologue</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-value">${latency}</div>
+                    <div class="stat-label">Avg Response</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-value">${Math.round(call.words_per_minute)}</div>
+                    <div class="stat-label">WPM</div>
+                </div>
+            </div>
+        </div>
+    `;
+}
+
 function deleteJobData() {
     console.log('Deleting job data for job ID:', currentJobId);
     (async () => {
@@ -690,8 +837,9 @@ function updateTranscriptAudio(audioUrl, filename) {
     if (!transcriptAudioContainer) return;
     if (audioUrl && transcriptAudioPlayer) {
         transcriptAudioContainer.classList.remove('hidden');
-        transcriptAudioPlayer.src = `${audioUrl}?v=${Date.now()}`;
+        transcriptAudioPlayer.src = audioUrl;
         transcriptAudioPlayer.load();
+        loadWaveform(`${audioUrl}/peaks`);
         if (transcriptAudioFilename) {
             transcriptAudioFilename.textContent = filename || 'Processed audio';
         }
@@ -700,6 +848,8 @@ function updateTranscriptAudio(audioUrl, filename) {
         }
     } else {
         transcriptAudioContainer.classList.add('hidden');
+        waveformPeaks = null;
+        waveformCanvas.classList.add('hidden');
         if (transcriptAudioPlayer) {
             transcriptAudioPlayer.pause();
             transcriptAudioPlayer.removeAttribute('src');
@@ -802,14 +952,78 @@ function renderQuestion(q) {
                 <div class="eval-question-meta">
                     <span><i class="fas fa-tag"></i> ${status}</span>
                     <span><i class="fas fa-percentage"></i> ${q.confidence || 0}% confidence</span>
+                    ${q.decided_by === 'rules' ? '<span><i class="fas fa-bolt"></i> Rule-based</span>' : ''}
                 </div>
-                ${q.evidence ? `<div class="eval-question-evidence">"${q.evidence}"</div>` : ''}
+                ${q.evidence ? `<div class="eval-question-evidence">"${q.evidence}"${q.evidence_start != null ? `
+                    <button class="evidence-jump" onclick="seekToSegment(${q.evidence_segment}, ${q.evidence_start})">
+                        <i class="fas fa-play"></i> ${formatTime(q.evidence_start)}
+                    </button>` : ''}</div>` : ''}
                 ${q.reasoning ? `<div class="eval-question-reasoning">${q.reasoning}</div>` : ''}
             </div>
         </div>
     `;
 }
 
+// ============== WAVEFORM ==============
+async function loadWaveform(peaksUrl) {
+    waveformPeaks = null;
+    waveformCanvas.classList.add('hidden');
+    try {
+        const response = await fetch(peaksUrl);
+        if (!response.ok) return;
+        waveformPeaks = await response.json();
+    } catch (error) {
+        return;
+    }
+    waveformCanvas.classList.remove('hidden');
+    drawWaveform();
+}
+
+function drawWaveform() {
+    if (!waveformPeaks) return;
+    const width = waveformCanvas.clientWidth;
+    const height = waveformCanvas.height;
+    waveformCanvas.width = width;
+    const ctx = waveformCanvas.getContext('2d');
+    const peaks = waveformPeaks.peaks;
+    const duration = waveformPeaks.duration || 1;
+    const played = transcriptAudioPlayer.currentTime / duration;
+
+    ctx.clearRect(0, 0, width, height);
+    // One bar per 2px: the loudest peak in that slice of the call
+    for (let x = 0; x < width; x += 2) {
+        const from = Math.floor((x / width) * peaks.length);
+        const to = Math.max(from + 1, Math.floor(((x + 2) / width) * peaks.length));
+        let peak = 0;
+        for (let i = from; i < to && i < peaks.length; i++) peak = Math.max(peak, peaks[i]);
+        const barHeight = Math.max(1, peak * height);
+        ctx.fillStyle = x / width <= played ? '#6366f1' : '#475569';
+        ctx.fillRect(x, (height - barHeight) / 2, 1, barHeight);
+    }
+}
+
+waveformCanvas.addEventListener('click', (event) => {
+    if (!waveformPeaks) return;
+    const rect = waveformCanvas.getBoundingClientRect();
+    transcriptAudioPlayer.currentTime = ((event.clientX - rect.left) / rect.width) * waveformPeaks.duration;
+    drawWaveform();
+});
+transcriptAudioPlayer.addEventListener('timeupdate', drawWaveform);
+window.addEventListener('resize', drawWaveform);
+
+function seekToSegment(segmentIndex, start) {
+    if (transcriptAudioPlayer && transcriptAudioPlayer.src) {
+        transcriptAudioPlayer.currentTime = start;
+        transcriptAudioPlayer.play().catch(() => {});
+    }
+    const segmentEl = document.getElementById(`segment-${segmentIndex}`);
+    if (segmentEl) {
+        segmentEl.scrollIntoView({ behavior: 'smooth', block: 'center' });
+        segmentEl.classList.add('highlighted');
+        setTimeout(() => segmentEl.classList.remove('highlighted'), 2000);
+    }
+}
+
 function getStatusIcon(status) {
     switch (status) {
         case 'YES': return 'fa-check';
@@ -955,6 +1169,7 @@ function resetApp() {
     
     resultsSection.classList.add('hidden');
     progressSection.classList.add('hidden');
+    document.getElementById('retryActions').classList.add('hidden');
     uploadSection.classList.remove('hidden');
     
     resetUpload();
@@ -0,0 +1,241 @@
+"""
+Stand-in model backends for benchmarks and load tests.
+
+They plug into the real `AudioTranscriber` and `CallEvaluator` (see their
+constructor arguments), so audio loading, segmentation, prompt building and
+response parsing all run as in production, offline, without a GPU, NeMo or an
+Ollama server. Every stub can simulate model compute time so the pipeline's
+own overhead can be told apart from (modelled) inference cost.
+"""
+
+import json
+import os
+import random
+import re
+import time
+from typing import List, Optional
+
+import numpy as np
+
+# Words the stub ASR "hears"; includes the keywords the default questions and
+# rules look for, so the retrieval and rule tiers get exercised too.
+VOCABULARY = [
+    "namaste", "hello", "ji", "haan", "sir", "madam", "aapka", "naam", "kya", "hai",
+    "mera", "order", "refund", "problem", "issue", "samasya", "details", "process",
+    "policy", "charges", "din", "please", "kripya", "achha", "okay", "theek", "ho",
+    "gaya", "resolve", "done", "thank", "you", "dhanyavaad", "account", "number",
+    "payment", "delivery", "status", "check", "karke", "batata", "hoon", "aur",
+    "kuch", "help", "chahiye", "nahi", "bilkul", "samajh", "gaya",
+]
+
+
+SUMMARY_REPLY = ("**Call Summary**: The customer called about an order and the agent "
+                 "explained the process.\n- Key point: refund status checked\n"
+                 "**Sentiment**: Neutral")
+
+
+def _simulate(seconds: float):
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def stub_reply(prompt: str, seed: int = 0) -> str:
+    """
+    LLM answer for a pipeline prompt: a well-formed JSON array for every
+    `[question_id]` listed under "Questions to Evaluate", otherwise a short summary.
+    """
+    if "## Questions to Evaluate:" not in prompt:
+        return SUMMARY_REPLY
+    questions = prompt.split("## Questions to Evaluate:", 1)[1]
+    ids = re.findall(r"^\d+\. \[([^\]]+)\]", questions, re.MULTILINE)
+    rng = random.Random(f"{seed}-{','.join(ids)}")
+    return json.dumps([{
+        "question_id": question_id,
+        "status": rng.choice(["YES", "YES", "NO", "PARTIAL", "N/A"]),
+        "confidence": rng.randint(50, 99),
+        "evidence": "haan ji",
+        "reasoning": "Stub evaluation",
+    } for question_id in ids])
+
+
+class EnergyDiarizer:
+    """
+    Diarizer stand-in: voice activity from frame energy, with the speaker
+    changing (round robin) at every pause of at least `turn_gap` seconds.
+
+    Matches the turn structure written by benchmarks/synthetic_audio.py.
+    """
+
+    def __init__(self, speakers: int = 2, frame: float = 0.03, threshold_db: float = -35.0,
+                 min_pause: float = 0.2, turn_gap: float = 0.5,
+                 seconds_per_audio_second: float = 0.0):
+        self.speakers = speakers
+        self.frame = frame
+        self.threshold_db = threshold_db
+        self.min_pause = min_pause
+        self.turn_gap = turn_gap
+        self.seconds_per_audio_second = seconds_per_audio_second
+
+    def __call__(self, audio_path: str) -> List[str]:
+        import torchaudio
+
+        waveform, sr = torchaudio.load(audio_path)
+        samples = waveform.mean(dim=0).numpy()
+        _simulate(len(samples) / sr * self.seconds_per_audio_second)
+
+        frame_len = max(1, int(sr * self.frame))
+        count = len(samples) // frame_len
+        if count == 0:
+            return []
+        frames = samples[:count * frame_len].reshape(count, frame_len)
+        rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+        peak = rms.max()
+        if peak <= 0:
+            return []
+        voiced = 20 * np.log10(rms / peak + 1e-12) > self.threshold_db
+
+        # Start/end frame of each voiced run
+        edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1) * self.frame
+        ends = np.flatnonzero(edges == -1) * self.frame
+
+        lines = []
+        speaker = 0
+        utterance = None
+        for start, end in zip(starts, ends):
+            if utterance is not None and start - utterance[1] < self.min_pause:
+                utterance[1] = end
+                continue
+            if utterance is not None:
+                lines.append(f"{utterance[0]:.2f} {utterance[1]:.2f} speaker_{speaker}")
+                if start - utterance[1] >= self.turn_gap:
+                    speaker = (speaker + 1) % self.speakers
+            utterance = [start, end]
+        if utterance is not None:
+            lines.append(f"{utterance[0]:.2f} {utterance[1]:.2f} speaker_{speaker}")
+        return lines
+
+
+class _Features(dict):
+    """Processor output; `.to(device)` is a no-op."""
+
+    def to(self, device):
+        return self
+
+
+class StubASRProcessor:
+    """Feature extractor/tokenizer stand-in with the transformers call signature."""
+
+    def __call__(self, audio, sampling_rate: int = 16000, return_tensors: Optional[str] = None):
+        return _Features(input_features=np.asarray(audio), sampling_rate=sampling_rate)
+
+    def batch_decode(self, sequences, skip_special_tokens: bool = True) -> List[str]:
+        return [" ".join(VOCABULARY[token % len(VOCABULARY)] for token in tokens) for tokens in sequences]
+
+
+class StubASRModel:
+    """Seq2seq stand-in: emits `words_per_second` deterministic words per second of audio."""
+
+    def __init__(self, words_per_second: float = 2.5, seconds_per_audio_second: float = 0.0,
+                 sample_rate: int = 16000):
+        self.words_per_second = words_per_second
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.sample_rate = sample_rate
+
+    def generate(self, input_features, **kwargs):
+        duration = len(input_features) / self.sample_rate
+        _simulate(duration * self.seconds_per_audio_second)
+        rng = random.Random(len(input_features))
+        words = max(1, int(round(duration * self.words_per_second)))
+        return [[rng.randrange(len(VOCABULARY)) for _ in range(words)]]
+
+
+try:
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+except ImportError:
+    BaseChatModel = None
+
+if BaseChatModel is not None:
+    class StubChatModel(BaseChatModel):
+        """
+        Chat model stand-in for summaries and evaluations (answers via `stub_reply`).
+
+        Latency is `latency + tokens / tokens_per_second` and usage metadata
+        is reported like ChatOllama does.
+        """
+
+        latency: float = 0.0
+        tokens_per_second: float = 0.0
+        seed: int = 0
+
+        @property
+        def _llm_type(self) -> str:
+            return "stub-chat"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            prompt = "\n".join(str(message.content) for message in messages)
+            content = stub_reply(prompt, self.seed)
+
+            prompt_tokens = len(prompt) // 4
+            completion_tokens = len(content) // 4
+            _simulate(self.latency + (completion_tokens / self.tokens_per_second
+                                      if self.tokens_per_second > 0 else 0))
+            message = AIMessage(content=content, usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            })
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def stub_transcriber(speakers: int = 2, asr_rtf: float = 0.0, diarization_rtf: float = 0.0, llm=None):
+    """`AudioTranscriber` with stub diarization and ASR; `llm` None keeps the real ChatOllama."""
+    from transcriber import AudioTranscriber
+
+    return AudioTranscriber(
+        diarizer=EnergyDiarizer(speakers=speakers, seconds_per_audio_second=diarization_rtf),
+        asr_model=StubASRModel(seconds_per_audio_second=asr_rtf),
+        asr_processor=StubASRProcessor(),
+        llm=llm,
+    )
+
+
+def stub_transcriber_from_env():
+    """Stub transcriber configured by STUB_SPEAKERS, STUB_ASR_RTF and STUB_DIARIZATION_RTF."""
+    return stub_transcriber(
+        speakers=int(os.getenv("STUB_SPEAKERS", "2")),
+        asr_rtf=float(os.getenv("STUB_ASR_RTF", "0")),
+        diarization_rtf=float(os.getenv("STUB_DIARIZATION_RTF", "0")),
+    )
+
+
+def stub_models(speakers: int = 2, asr_rtf: float = 0.0, diarization_rtf: float = 0.0,
+                llm_latency: float = 0.0, llm_tokens_per_second: float = 0.0):
+    """
+    Build an `AudioTranscriber` and a `CallEvaluator` running on the stubs.
+
+    Args:
+        speakers: Speakers the diarizer alternates between
+        asr_rtf: Simulated ASR seconds per second of audio
+        diarization_rtf: Simulated diarization seconds per second of audio
+        llm_latency: Simulated seconds per LLM request
+        llm_tokens_per_second: Simulated generation speed (0 = instant)
+
+    Returns:
+        (transcriber, evaluator)
+    """
+    from evaluator import CallEvaluator
+    from metrics import llm_callbacks
+
+    if BaseChatModel is None:
+        raise ImportError("langchain_core is required for the stub LLM")
+
+    def llm(call):
+        return StubChatModel(latency=llm_latency, tokens_per_second=llm_tokens_per_second,
+                             callbacks=llm_callbacks(call))
+
+    transcriber = stub_transcriber(speakers, asr_rtf, diarization_rtf, llm=llm("summarize"))
+    evaluator = CallEvaluator(llm=llm("evaluate"))
+    return transcriber, evaluator
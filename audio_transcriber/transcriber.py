@@ -1,6 +1,7 @@
 import os
 import sys
 import gc
+import time
 from pathlib import Path
 
 import torch
@@ -9,30 +10,46 @@ from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor
 from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from collections import defaultdict
+
+from metrics import ASR_SEGMENT_SECONDS, MODEL_LOAD_SECONDS, llm_callbacks
 
 # Add parent directory to path to import from audio_processing
 sys.path.append(str(Path(__file__).parent.parent))
 
+from audio_processing.segments import merge_segments, parse_segments, speaker_stats
+
 # Lazy import for NeMo diarization to avoid import errors at startup
 _diarizer = None
-_parse_segments = None
-_merge_segments = None
 
 def _lazy_import_nemo():
-    """Lazy import NeMo diarization functions to avoid import errors at startup"""
-    global _diarizer, _parse_segments, _merge_segments
+    """Lazy import the NeMo diarizer (the model loads on first import)"""
+    global _diarizer
     if _diarizer is None:
-        from audio_processing.nemo_diarize import diarizer, parse_segments, merge_segments
+        from audio_processing.nemo_diarize import diarizer
         _diarizer = diarizer
-        _parse_segments = parse_segments
-        _merge_segments = merge_segments
-    return _diarizer, _parse_segments, _merge_segments
+    return _diarizer
 
 
 class AudioTranscriber:
-    def __init__(self, hf_token=None):
+    def __init__(self, hf_token=None, diarizer=None, asr_model=None, asr_processor=None, llm=None):
+        """
+        Args:
+            hf_token: Hugging Face token for the ASR checkpoint
+            diarizer: Callable(audio_path) returning RTTM-style "start end speaker"
+                lines; defaults to NeMo Sortformer
+            asr_model: Seq2seq model with the transformers `generate` interface;
+                defaults to the Whisper checkpoint (pass with `asr_processor`)
+            asr_processor: Matching feature extractor/tokenizer
+            llm: LangChain chat model for summaries; defaults to ChatOllama
+
+        The backends are injectable so benchmarks and load tests can run the
+        real pipeline code offline with the stubs in stubs.py.
+        """
         self.device = "mps" if torch.backends.mps.is_available() else "cpu"
+        self.diarizer = diarizer
+        self.asr_model = asr_model
+        self.asr_processor = asr_processor
+        self.llm = llm
         env_token = os.getenv("HF_TOKEN") 
         token = hf_token or env_token
         self.hf_token = token.strip() if token else None
@@ -41,14 +58,20 @@ class AudioTranscriber:
         
         print(f"Initializing on device: {self.device}")
         
+        started = time.perf_counter()
         self._load_diarization()
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - started, model="diarization")
+        started = time.perf_counter()
         self._load_asr()
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - started, model="asr")
         
     def _load_diarization(self):
+        if self.diarizer is not None:
+            return
         print("Loading NeMo diarization model...")
         # Lazy load the diarization functions (model loads on first import)
         try:
-            _lazy_import_nemo()
+            self.diarizer = _lazy_import_nemo()
             print("NeMo diarization model ready")
         except ImportError as e:
             print(f"Warning: Could not load NeMo diarization model: {e}")
@@ -56,6 +79,8 @@ class AudioTranscriber:
             raise
         
     def _load_asr(self):
+        if self.asr_model is not None:
+            return
         print("Loading Whisper model...")
         auth_kwargs = {"use_auth_token": self.hf_token} if self.hf_token else {}
         self.asr_model = AutoModelForSpeechSeq2Seq.from_pretrained(
@@ -73,22 +98,23 @@ class AudioTranscriber:
             "Oriserve/Whisper-Hindi2Hinglish-Prime", **auth_kwargs
         )
         
+    def prepare_audio(self, audio_path, output_path):
+        """Write the canonical 16 kHz mono WAV that diarization and ASR both read."""
+        from audio_processing.utils_resample import resample_audio
+        return str(resample_audio(audio_path, output_path))
+
     def run_diarization(self, audio_path):
-        print("Running NeMo diarization...")
-        # Lazy import diarization functions
-        diarizer_func, parse_segments_func, merge_segments_func = _lazy_import_nemo()
-        
-        # Run diarization
-        predicted_segments = diarizer_func(str(audio_path))
+        print("Running diarization...")
+        predicted_segments = self.diarizer(str(audio_path))
         
         # Parse segments
-        parsed_segments = parse_segments_func(predicted_segments)
+        parsed_segments = parse_segments(predicted_segments)
         
         # Sort by start time
         sorted_segments = sorted(parsed_segments, key=lambda x: float(x['start']))
         
         # Merge segments with small gaps
-        merged_segments = merge_segments_func(sorted_segments, max_gap=3.0)
+        merged_segments = merge_segments(sorted_segments, max_gap=3.0)
         
         # Convert to format expected by transcribe_segments
         # Convert string values to float for start/end
@@ -140,7 +166,12 @@ class AudioTranscriber:
             del waveform
             self._clear_inference_memory()
         
-    def transcribe_segments(self, audio_path, diarization_segments, progress_callback=None):
+    def transcribe_segments(self, audio_path, diarization_segments, progress_callback=None,
+                            segment_callback=None, segment_timings=None):
+        """
+        Transcribe each diarized segment. If `segment_timings` is a list, the ASR
+        seconds spent on each segment are appended to it.
+        """
         results = []
         total = len(diarization_segments)
         
@@ -153,7 +184,12 @@ class AudioTranscriber:
                 end = segment['end']
                 speaker = segment['speaker']
                 
+                segment_started = time.perf_counter()
                 text = self._transcribe_segment_from_waveform(waveform, sr, start, end)
+                segment_seconds = time.perf_counter() - segment_started
+                ASR_SEGMENT_SECONDS.observe(segment_seconds)
+                if segment_timings is not None:
+                    segment_timings.append(round(segment_seconds, 3))
                 
                 results.append({
                     "speaker": speaker,
@@ -162,6 +198,9 @@ class AudioTranscriber:
                     "text": text
                 })
                 
+                if segment_callback:
+                    segment_callback(i, results[-1])
+                
                 if progress_callback:
                     progress_callback((i + 1) / total)
                     
@@ -179,9 +218,10 @@ class AudioTranscriber:
             for item in transcript_data if item['text'].strip()
         ])
         
-        llm = ChatOllama(
+        llm = self.llm or ChatOllama(
             model="gpt-oss:20b-cloud",
-            temperature=0.3
+            temperature=0.3,
+            callbacks=llm_callbacks("summarize")
         )
         
         prompt = ChatPromptTemplate.from_messages([
@@ -217,24 +257,4 @@ Be concise and professional."""),
                 pass
         
     def get_speaker_stats(self, transcript):
-        stats = defaultdict(lambda: {"segments": 0, "duration": 0, "words": 0})
-        
-        for item in transcript:
-            speaker = item["speaker"]
-            duration = item["end"] - item["start"]
-            words = len(item["text"].split())
-            
-            stats[speaker]["segments"] += 1
-            stats[speaker]["duration"] += duration
-            stats[speaker]["words"] += words
-            
-        result = []
-        for speaker, data in stats.items():
-            result.append({
-                "speaker": speaker,
-                "segments": data["segments"],
-                "duration": round(data["duration"], 2),
-                "words": data["words"]
-            })
-            
-        return result
\ No newline at end of file
+        return speaker_stats(transcript)
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+Out-of-process model worker pool.
+
+Run alongside the API when it is started with WORKER_MODE=process:
+
+    python worker.py --workers 2
+
+Each worker process loads `AudioTranscriber` and `CallEvaluator` once, then
+runs the pipeline stages (with STAGE_WORKERS slots per stage) against the
+shared SQLite queue and reports progress through the job store. With
+--metrics-port N, worker i serves its Prometheus metrics on port N + i.
+The supervisor restarts any worker that dies; jobs it was holding are put
+back on the queue, and queued jobs are never lost because the queue lives
+on disk.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_DB_PATH = BASE_DIR / "data" / "jobs.db"
+
+
+def default_worker_count(memory_per_worker_gb: float) -> int:
+    """One worker per core, capped by how many model copies fit in available memory."""
+    cores = os.cpu_count() or 1
+    try:
+        import psutil
+        available_gb = psutil.virtual_memory().available / 1024 ** 3
+    except ImportError:
+        return max(1, cores // 2)
+    return max(1, min(cores, int(available_gb // memory_per_worker_gb)))
+
+
+def _worker_main(db_path: str, threads_per_worker: int, metrics_port: int = 0):
+    """Entry point of a model-hosting worker process."""
+    # Keep N workers x M intra-op threads within the machine's cores
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads_per_worker))
+    os.environ.setdefault("MKL_NUM_THREADS", str(threads_per_worker))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from job_store import JobStore
+    from pipeline import (DEFAULT_STAGE_WORKERS, MODEL_STAGES, STAGES, get_evaluator,
+                          get_transcriber, run_stage)
+    from scheduler import scheduler_from_env
+    from metrics import register_job_store, start_metrics_server
+
+    if metrics_port:
+        start_metrics_server(metrics_port)
+        print(f"[worker {os.getpid()}] metrics on :{metrics_port}/metrics")
+
+    print(f"[worker {os.getpid()}] loading models...")
+    started = time.time()
+    get_transcriber()
+    get_evaluator()
+    print(f"[worker {os.getpid()}] models ready in {time.time() - started:.1f}s")
+
+    store = JobStore(db_path)
+    register_job_store(store)
+    scheduler = scheduler_from_env(
+        store, partial(run_stage, store), STAGES, DEFAULT_STAGE_WORKERS, MODEL_STAGES
+    )
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+
+    scheduler.start()
+    try:
+        while not stopping.wait(1):
+            pass
+    finally:
+        scheduler.stop()
+        store.close()
+
+
+class WorkerPool:
+    """Supervises model worker processes and restarts them when they exit."""
+
+    def __init__(self, db_path: str, workers: int, check_interval: float = 2.0,
+                 metrics_port: int = 0):
+        self.db_path = db_path
+        self.workers = workers
+        self.metrics_port = metrics_port
+        self.check_interval = check_interval
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+        self._ctx = mp.get_context("spawn")
+        self._procs = []
+        self._stopping = False
+
+    def _spawn(self, index: int):
+        # A restarted worker reuses its slot's metrics port
+        metrics_port = self.metrics_port + index if self.metrics_port else 0
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(self.db_path, self.threads_per_worker, metrics_port),
+            daemon=False,
+        )
+        proc.start()
+        print(f"[pool] started worker {proc.pid}")
+        return proc
+
+    def run(self):
+        from job_store import JobStore
+        from scheduler import requeue_orphaned
+
+        store = JobStore(self.db_path)
+        requeue_orphaned(store)
+
+        self._procs = [self._spawn(i) for i in range(self.workers)]
+        started = [time.time()] * self.workers
+        died_at = [None] * self.workers
+        backoff = [0.0] * self.workers
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        try:
+            while not self._stopping:
+                time.sleep(self.check_interval)
+                now = time.time()
+                for i, proc in enumerate(self._procs):
+                    if proc.is_alive() or self._stopping:
+                        continue
+                    if died_at[i] is None:
+                        print(f"[pool] worker {proc.pid} exited with code {proc.exitcode}")
+                        requeue_orphaned(store)
+                        died_at[i] = now
+                        # Back off when a worker keeps dying right after start (e.g. model load failure)
+                        quick_death = now - started[i] < 60
+                        backoff[i] = min(max(backoff[i] * 2, self.check_interval), 60.0) if quick_death else 0.0
+                    if now - died_at[i] < backoff[i]:
+                        continue
+                    self._procs[i] = self._spawn(i)
+                    started[i], died_at[i] = now, None
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            store.close()
+
+    def stop(self):
+        self._stopping = True
+        for proc in self._procs:
+            if proc.is_alive():
+                proc.terminate()
+        for proc in self._procs:
+            proc.join(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run model worker processes for the job queue")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes (default: fit cores and memory)")
+    parser.add_argument("--memory-per-worker-gb", type=float, default=6.0,
+                        help="Approximate RAM one worker needs with all models loaded")
+    parser.add_argument("--db", default=os.getenv("JOB_DB_PATH", str(DEFAULT_DB_PATH)),
+                        help="Path to the job store database")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("WORKER_METRICS_PORT", "0")),
+                        help="Serve Prometheus metrics of worker i on this port + i (0 = off)")
+    args = parser.parse_args()
+
+    workers = args.workers or default_worker_count(args.memory_per_worker_gb)
+    print(f"[pool] starting {workers} worker(s) on {args.db}")
+    WorkerPool(args.db, workers, metrics_port=args.metrics_port).run()
+
+
+if __name__ == "__main__":
+    main()
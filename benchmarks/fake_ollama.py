@@ -0,0 +1,161 @@
+"""
+Local fake of the Ollama HTTP API for load tests.
+
+Implements `/api/chat` (streamed NDJSON or a single JSON body, as ChatOllama
+expects) plus `/api/tags` and `/api/version`. Replies come from
+`stubs.stub_reply`, so evaluation prompts get valid JSON. Latency is
+configurable: a fixed time to first token plus a generation speed.
+
+    python benchmarks/fake_ollama.py --port 11434 --latency 1.5 --tokens-per-second 40
+    OLLAMA_HOST=http://127.0.0.1:11434 STUB_MODELS=1 uvicorn app:app
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "audio_transcriber"))
+
+from stubs import stub_reply  # noqa: E402
+
+# Characters per token, for usage counts and streaming
+CHARS_PER_TOKEN = 4
+# Tokens per streamed chunk
+CHUNK_TOKENS = 8
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, tokens_per_second: float = 0.0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Close-delimited bodies, so streamed responses need no chunked encoding
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._json({"models": [{"name": "gpt-oss:20b-cloud", "model": "gpt-oss:20b-cloud"}]})
+        elif self.path == "/api/version":
+            self._json({"version": "0.0.0-fake"})
+        elif self.path == "/":
+            self._json("Ollama is running")
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.count_request()
+
+        prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+        content = stub_reply(prompt)
+        model = request.get("model", "fake")
+        prompt_tokens = len(prompt) // CHARS_PER_TOKEN
+        completion_tokens = len(content) // CHARS_PER_TOKEN
+
+        started = time.perf_counter()
+        time.sleep(self.server.latency)
+        final = {
+            "model": model,
+            "created_at": _now(),
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": completion_tokens,
+        }
+
+        if not request.get("stream", True):
+            self._sleep_for_tokens(completion_tokens)
+            final["message"]["content"] = content
+            final["total_duration"] = int((time.perf_counter() - started) * 1e9)
+            self._json(final)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        step = CHUNK_TOKENS * CHARS_PER_TOKEN
+        for offset in range(0, len(content), step):
+            piece = content[offset:offset + step]
+            self._sleep_for_tokens(len(piece) // CHARS_PER_TOKEN)
+            self._line({"model": model, "created_at": _now(),
+                        "message": {"role": "assistant", "content": piece}, "done": False})
+        final["total_duration"] = int((time.perf_counter() - started) * 1e9)
+        self._line(final)
+
+    def _sleep_for_tokens(self, tokens: int):
+        if self.server.tokens_per_second > 0:
+            time.sleep(tokens / self.server.tokens_per_second)
+
+    def _line(self, data: dict):
+        self.wfile.write(json.dumps(data).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def _json(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def start_fake_ollama(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                      tokens_per_second: float = 0.0) -> FakeOllamaServer:
+    """Start the fake server on a background thread (port 0 picks a free port)."""
+    server = FakeOllamaServer((host, port), latency, tokens_per_second)
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Generation speed (0 = instant)")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer((args.host, args.port), args.latency, args.tokens_per_second)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
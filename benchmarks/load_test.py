@@ -0,0 +1,360 @@
+"""
+HTTP load test for the FastAPI app.
+
+Starts a fake Ollama server (fake_ollama.py) and `app.py` under uvicorn with
+STUB_MODELS=1 (stub diarization/ASR, real LLM client against the fake
+server), then runs `--users` concurrent clients that each repeatedly upload a
+synthetic call, queue it with `/process` and poll `/status` until it finishes.
+
+Reported: latency percentiles and error rates per endpoint, jobs completed
+per minute and job turnaround, and the app's event loop lag (from the
+`callanalysis_event_loop_lag_seconds` histogram on /metrics), so worker counts
+can be sized and blocking code on the loop spotted. Results are also written
+as JSON.
+
+    python benchmarks/load_test.py --users 20 --duration 120 --llm-latency 2
+    python benchmarks/load_test.py --env STAGE_WORKERS=summarize=4,evaluate=4 --asr-rtf 0.2
+    python benchmarks/load_test.py --url http://localhost:8000   # an app that is already running
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCHMARK_DIR.parent / "audio_transcriber"
+RESULTS_DIR = BENCHMARK_DIR / "results"
+
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from fake_ollama import start_fake_ollama  # noqa: E402
+from synthetic_audio import synthetic_call  # noqa: E402
+
+LAG_METRIC = "callanalysis_event_loop_lag_seconds"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _latency_summary(values: List[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50": _ms(percentile(values, 50)),
+        "p90": _ms(percentile(values, 90)),
+        "p99": _ms(percentile(values, 99)),
+        "max": _ms(max(values) if values else None),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.jobs = defaultdict(int)
+        self.turnaround: List[float] = []
+
+    def record(self, endpoint: str, seconds: float, status: str):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+
+    def endpoints(self) -> dict:
+        report = {}
+        for endpoint, values in self.latencies.items():
+            statuses = dict(self.statuses[endpoint])
+            total = sum(statuses.values())
+            errors = sum(n for status, n in statuses.items() if status not in ("200", "429"))
+            report[endpoint] = {
+                **_latency_summary(values),
+                "statuses": statuses,
+                "error_rate": round(errors / total, 4) if total else 0.0,
+                "rejected_rate": round(statuses.get("429", 0) / total, 4) if total else 0.0,
+            }
+        return report
+
+
+async def _call(client: httpx.AsyncClient, stats: LoadStats, endpoint: str, method: str,
+                url: str, **kwargs) -> Optional[httpx.Response]:
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError as e:
+        stats.record(endpoint, time.perf_counter() - started, type(e).__name__)
+        return None
+    stats.record(endpoint, time.perf_counter() - started, str(response.status_code))
+    return response
+
+
+async def _user(client: httpx.AsyncClient, stats: LoadStats, audio: List[bytes], user: int,
+                deadline: float, options: dict):
+    """One virtual user: upload, process, poll until done; repeat until the deadline."""
+    iteration = 0
+    while time.monotonic() < deadline:
+        body = audio[(user + iteration) % len(audio)]
+        iteration += 1
+
+        response = await _call(client, stats, "upload", "POST", "/upload",
+                               files={"file": (f"load-{user}-{iteration}.wav", body, "audio/wav")})
+        if response is None or response.status_code != 200:
+            await asyncio.sleep(options["poll_interval"])
+            continue
+        job_id = response.json()["job_id"]
+
+        params = {} if options["allow_dedup"] else {"force": "true"}
+        response = await _call(client, stats, "process", "POST", f"/process/{job_id}", params=params)
+        if response is None or response.status_code != 200:
+            stats.jobs["not_started"] += 1
+            if response is not None and response.status_code == 429:
+                # Queue full: back off as the server asks
+                await asyncio.sleep(float(response.headers.get("Retry-After") or options["poll_interval"]))
+            continue
+        stats.jobs["started"] += 1
+        queued_at = time.monotonic()
+
+        while True:
+            if time.monotonic() - queued_at > options["job_timeout"]:
+                stats.jobs["timed_out"] += 1
+                break
+            await asyncio.sleep(options["poll_interval"])
+            response = await _call(client, stats, "status", "GET", f"/status/{job_id}")
+            if response is None or response.status_code != 200:
+                continue
+            status = response.json()["status"]
+            if status in ("completed", "failed"):
+                stats.jobs[status] += 1
+                if status == "completed":
+                    stats.turnaround.append(time.monotonic() - queued_at)
+                break
+
+
+def _lag_histogram(text: str) -> dict:
+    """Cumulative bucket counts, sum and count of the event loop lag histogram."""
+    buckets, total, count = {}, 0.0, 0
+    for line in text.splitlines():
+        if line.startswith(LAG_METRIC + "_bucket"):
+            bound = line.split('le="', 1)[1].split('"', 1)[0]
+            buckets[float("inf") if bound == "+Inf" else float(bound)] = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(LAG_METRIC + "_sum"):
+            total = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(LAG_METRIC + "_count"):
+            count = float(line.rsplit(" ", 1)[1])
+    return {"buckets": buckets, "sum": total, "count": count}
+
+
+def _lag_summary(before: dict, after: dict) -> dict:
+    """Event loop lag during the run, from the difference of two scrapes."""
+    count = after["count"] - before["count"]
+    if count <= 0:
+        return {"samples": 0}
+    buckets = sorted((bound, n - before["buckets"].get(bound, 0)) for bound, n in after["buckets"].items())
+
+    def upper_bound(q):
+        # Smallest bucket bound covering q of the samples
+        for bound, n in buckets:
+            if n >= q * count:
+                return bound
+        return float("inf")
+
+    def fmt(bound):
+        return None if bound == float("inf") else _ms(bound)
+
+    worst = next((bound for bound, n in reversed(buckets) if n < count), None)
+    return {
+        "samples": int(count),
+        "mean_ms": _ms((after["sum"] - before["sum"]) / count),
+        "p50_ms_le": fmt(upper_bound(0.5)),
+        "p99_ms_le": fmt(upper_bound(0.99)),
+        "max_ms_gt": fmt(worst) if worst is not None else 0.0,
+    }
+
+
+async def _scrape_lag(client: httpx.AsyncClient) -> dict:
+    try:
+        response = await client.get("/metrics")
+        return _lag_histogram(response.text)
+    except httpx.HTTPError:
+        return {"buckets": {}, "sum": 0.0, "count": 0}
+
+
+async def run_load(base_url: str, audio: List[bytes], options: dict) -> dict:
+    stats = LoadStats()
+    limits = httpx.Limits(max_connections=options["users"] * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=options["request_timeout"], limits=limits) as client:
+        lag_before = await _scrape_lag(client)
+        started = time.monotonic()
+        deadline = started + options["duration"]
+        await asyncio.gather(*(
+            _user(client, stats, audio, user, deadline, options) for user in range(options["users"])
+        ))
+        elapsed = time.monotonic() - started
+        lag_after = await _scrape_lag(client)
+
+    completed = stats.jobs.get("completed", 0)
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "endpoints": stats.endpoints(),
+        "jobs": dict(stats.jobs),
+        "jobs_per_minute": round(completed / elapsed * 60, 2) if elapsed else None,
+        "turnaround": _latency_summary(stats.turnaround),
+        "event_loop_lag": _lag_summary(lag_before, lag_after),
+    }
+
+
+def _start_app(port: int, ollama_url: str, workdir: Path, options: dict, extra_env: dict) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "STUB_MODELS": "1",
+        "OLLAMA_HOST": ollama_url,
+        "JOB_DB_PATH": str(workdir / "jobs.db"),
+        "UPLOAD_DIR": str(workdir / "uploads"),
+        "STUB_ASR_RTF": str(options["asr_rtf"]),
+        "STUB_DIARIZATION_RTF": str(options["diarization_rtf"]),
+        **extra_env,
+    }
+    log = open(workdir / "app.log", "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+def _wait_until_up(url: str, timeout: float, process: Optional[subprocess.Popen] = None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"App exited with code {process.returncode}")
+        try:
+            if httpx.get(url + "/health", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"App did not become healthy within {timeout:.0f}s")
+
+
+def _print_report(report: dict):
+    print(f"\n{'endpoint':<10}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+          f"{'errors':>9}{'429s':>8}")
+    for endpoint, summary in report["endpoints"].items():
+        print(f"{endpoint:<10}{summary['count']:>8}{summary['p50'] or 0:>10.1f}{summary['p90'] or 0:>10.1f}"
+              f"{summary['p99'] or 0:>10.1f}{summary['max'] or 0:>10.1f}"
+              f"{summary['error_rate']:>9.2%}{summary['rejected_rate']:>8.2%}")
+    turnaround = report["turnaround"]
+    print(f"\nJobs: {report['jobs']}  ->  {report['jobs_per_minute']} completed/min")
+    print(f"Turnaround p50 {turnaround['p50']} ms, p90 {turnaround['p90']} ms, max {turnaround['max']} ms")
+    lag = report["event_loop_lag"]
+    if lag.get("samples"):
+        print(f"Event loop lag: mean {lag['mean_ms']} ms, p50 <= {lag['p50_ms_le']} ms, "
+              f"p99 <= {lag['p99_ms_le']} ms, max > {lag['max_ms_gt']} ms ({lag['samples']} samples)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API with stub models and a fake LLM")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to keep starting jobs")
+    parser.add_argument("--audio-seconds", type=float, default=60.0, help="Length of each synthetic call")
+    parser.add_argument("--audio-variants", type=int, default=4, help="Distinct synthetic calls to upload")
+    parser.add_argument("--allow-dedup", action="store_true",
+                        help="Let identical uploads reuse earlier results (default: force processing)")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--job-timeout", type=float, default=600.0)
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Fake LLM seconds to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50.0,
+                        help="Fake LLM generation speed (0 = instant)")
+    parser.add_argument("--asr-rtf", type=float, default=0.0, help="Simulated ASR seconds per audio second")
+    parser.add_argument("--diarization-rtf", type=float, default=0.0,
+                        help="Simulated diarization seconds per audio second")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the app (e.g. STAGE_WORKERS, MAX_QUEUE_SIZE)")
+    parser.add_argument("--url", help="Target an already running app instead of starting one")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/load-<time>.json)")
+    args = parser.parse_args()
+
+    options = {key: getattr(args, key) for key in (
+        "users", "duration", "poll_interval", "job_timeout", "request_timeout",
+        "allow_dedup", "asr_rtf", "diarization_rtf",
+    )}
+    extra_env = dict(item.split("=", 1) for item in args.env)
+
+    with tempfile.TemporaryDirectory(prefix="load-test-") as workdir:
+        workdir = Path(workdir)
+        audio = []
+        for seed in range(args.audio_variants):
+            path = workdir / f"call-{seed}.wav"
+            synthetic_call(path, args.audio_seconds, seed=seed)
+            audio.append(path.read_bytes())
+
+        ollama = app = None
+        try:
+            if args.url:
+                base_url = args.url.rstrip("/")
+            else:
+                ollama = start_fake_ollama(latency=args.llm_latency, tokens_per_second=args.llm_tokens_per_second)
+                port = _free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                print(f"Starting app on {base_url} (fake Ollama on {ollama.url})...", file=sys.stderr)
+                app = _start_app(port, ollama.url, workdir, options, extra_env)
+            _wait_until_up(base_url, args.startup_timeout, app)
+
+            print(f"Running {args.users} users for {args.duration:.0f}s...", file=sys.stderr)
+            report = asyncio.run(run_load(base_url, audio, options))
+        finally:
+            if app is not None:
+                app.terminate()
+                try:
+                    app.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    app.kill()
+                if app.returncode not in (0, -15, None):
+                    print((workdir / "app.log").read_text()[-4000:], file=sys.stderr)
+            if ollama is not None:
+                ollama.shutdown()
+
+    report["config"] = {
+        **options,
+        "audio_seconds": args.audio_seconds,
+        "llm_latency": args.llm_latency,
+        "llm_tokens_per_second": args.llm_tokens_per_second,
+        "env": extra_env,
+        "llm_requests": ollama.requests if ollama is not None else None,
+    }
+    report["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"load-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    _print_report(report)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
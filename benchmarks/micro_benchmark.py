@@ -0,0 +1,217 @@
+"""
+Micro-benchmarks for the pure-Python segment and scoring utilities.
+
+Each case drives one function with synthetic inputs at growing sizes
+(10^4 to 10^6 items by default) and reports the best time per size, the time
+per item and the fitted growth exponent (time ~ n^k: k close to 1 is linear,
+k close to 2 quadratic). A case stops growing once a single run exceeds
+--max-seconds, so superlinear code does not stall the suite.
+
+    python benchmarks/micro_benchmark.py
+    python benchmarks/micro_benchmark.py --cases combine evaluate_batch --sizes 1000 10000 100000
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARK_DIR.parent
+RESULTS_DIR = BENCHMARK_DIR / "results"
+
+sys.path[:0] = [str(REPO_DIR), str(REPO_DIR / "audio_transcriber")]
+
+from audio_processing.combine_diar_transcript import combine_transcript_with_diarization  # noqa: E402
+from audio_processing.segments import merge_segments, parse_segments, speaker_stats  # noqa: E402
+
+# Average words per diarized turn, seconds per word
+WORDS_PER_TURN = 20
+WORD_SECONDS = 0.4
+STATUSES = ["YES", "NO", "PARTIAL", "N/A"]
+CATEGORIES = ["Opening", "Discovery", "Resolution", "Compliance", "Closing"]
+
+
+def _rttm_lines(n: int, rng: random.Random) -> list:
+    lines, t = [], 0.0
+    for _ in range(n):
+        end = t + rng.uniform(0.5, 8.0)
+        lines.append(f"{t:.2f} {end:.2f} speaker_{rng.randrange(2)}")
+        t = end + rng.uniform(0.0, 4.0)
+    return lines
+
+
+def _words(n: int, rng: random.Random) -> list:
+    words, t = [], 0.0
+    for i in range(n):
+        end = t + WORD_SECONDS * rng.uniform(0.5, 1.0)
+        words.append({"start": round(t, 3), "end": round(end, 3), "word": f"w{i}"})
+        t += WORD_SECONDS
+    return words
+
+
+def _turns(n_words: int, rng: random.Random) -> list:
+    """Diarized turns covering `n_words` words of `_words` (string times, as parse_segments returns)."""
+    turns, t = [], 0.0
+    total = n_words * WORD_SECONDS
+    while t < total:
+        end = min(t + WORDS_PER_TURN * WORD_SECONDS * rng.uniform(0.5, 1.5), total)
+        turns.append({"start": f"{t:.2f}", "end": f"{end:.2f}", "speaker": f"speaker_{len(turns) % 2}"})
+        t = end
+    return turns
+
+
+def _transcript(n: int, rng: random.Random) -> list:
+    return [{
+        "speaker": f"speaker_{i % 2}",
+        "start": i * 5.0,
+        "end": i * 5.0 + rng.uniform(1, 5),
+        "text": " ".join(f"w{j}" for j in range(rng.randint(1, 25))),
+    } for i in range(n)]
+
+
+def _questions(n: int) -> list:
+    return [{"id": f"q{i}", "question": f"Question {i}?", "description": "Synthetic",
+             "category": CATEGORIES[i % len(CATEGORIES)], "weight": 1 + i % 3} for i in range(n)]
+
+
+def _evaluations(n: int, rng: random.Random) -> list:
+    return [{"question_id": q["id"], "category": q["category"], "weight": q["weight"],
+             "status": rng.choice(STATUSES), "confidence": rng.randint(1, 100)} for q in _questions(n)]
+
+
+class _Reply:
+    def __init__(self, content: str):
+        self.content = content
+
+
+def _evaluator():
+    from evaluator import CallEvaluator
+
+    # Never called for real: each case installs a canned reply
+    return CallEvaluator(llm=lambda _prompt: None)
+
+
+# --------------------------------------------------------------------- cases
+# Each setup returns a zero-argument callable that runs the function once;
+# inputs the function mutates are rebuilt outside the timed region.
+
+def setup_parse_segments(n, rng):
+    lines = _rttm_lines(n, rng)
+    return lambda: parse_segments(lines)
+
+
+def setup_merge_segments(n, rng):
+    segments = parse_segments(_rttm_lines(n, rng))
+    return lambda: merge_segments([dict(s) for s in segments])
+
+
+def setup_combine(n, rng):
+    words = _words(n, rng)
+    turns = _turns(n, rng)
+    return lambda: combine_transcript_with_diarization([dict(t) for t in turns], words, None)
+
+
+def setup_speaker_stats(n, rng):
+    transcript = _transcript(n, rng)
+    return lambda: speaker_stats(transcript)
+
+
+def setup_calculate_scores(n, rng):
+    evaluator, evaluations = _evaluator(), _evaluations(n, rng)
+    return lambda: evaluator._calculate_scores(evaluations)
+
+
+def setup_group_by_category(n, rng):
+    evaluator, evaluations = _evaluator(), _evaluations(n, rng)
+    return lambda: evaluator._group_by_category(evaluations)
+
+
+def setup_evaluate_batch(n, rng):
+    evaluator, questions = _evaluator(), _questions(n)
+    answers = [{"question_id": q["id"], "status": "YES", "confidence": 90, "evidence": "",
+                "reasoning": ""} for q in reversed(questions)]
+    reply = _Reply(json.dumps(answers))
+    evaluator.llm = lambda _prompt: reply
+    return lambda: evaluator._evaluate_batch("transcript", "summary", questions)
+
+
+CASES = {
+    "parse_segments": setup_parse_segments,
+    "merge_segments": setup_merge_segments,
+    "combine": setup_combine,
+    "speaker_stats": setup_speaker_stats,
+    "calculate_scores": setup_calculate_scores,
+    "group_by_category": setup_group_by_category,
+    "evaluate_batch": setup_evaluate_batch,
+}
+
+
+def _time(run, repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _growth(points: list) -> float:
+    """Least-squares slope of log(time) against log(n)."""
+    if len(points) < 2:
+        return None
+    xs = [math.log(n) for n, _ in points]
+    ys = [math.log(max(seconds, 1e-9)) for _, seconds in points]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    var = sum((x - mx) ** 2 for x in xs)
+    return round(sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var, 2) if var else None
+
+
+def run_case(name: str, sizes: list, repeat: int, max_seconds: float, seed: int) -> dict:
+    points = []
+    for n in sizes:
+        run = CASES[name](n, random.Random(seed))
+        seconds = _time(run, repeat)
+        points.append((n, seconds))
+        print(f"  {name:<18}{n:>10}{seconds:>12.4f}s{seconds / n * 1e6:>10.2f} us/item", file=sys.stderr)
+        if seconds > max_seconds:
+            break
+    return {
+        "sizes": [n for n, _ in points],
+        "seconds": [round(seconds, 6) for _, seconds in points],
+        "growth_exponent": _growth(points),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the segment and scoring utilities")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size (best is kept)")
+    parser.add_argument("--max-seconds", type=float, default=10.0,
+                        help="Stop growing a case once one run takes longer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/micro-<time>.json)")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.cases:
+        results[name] = run_case(name, sorted(args.sizes), args.repeat, args.max_seconds, args.seed)
+
+    print(f"\n{'case':<20}{'largest n':>12}{'seconds':>10}{'growth':>8}")
+    for name, result in results.items():
+        print(f"{name:<20}{result['sizes'][-1]:>12}{result['seconds'][-1]:>10.4f}"
+              f"{result['growth_exponent'] if result['growth_exponent'] is not None else '-':>8}")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"micro-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "results": results},
+                                 indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+End-to-end pipeline benchmark with stub models.
+
+Each scenario (audio length x speakers x channel layout) runs in a fresh
+process: it writes a synthetic call, then pushes it through every stage with
+the real `pipeline.run_stage`, `AudioTranscriber` and `CallEvaluator`, backed
+by the stubs in audio_transcriber/stubs.py (so no GPU, NeMo or Ollama is
+needed). Model cost can be simulated with --asr-rtf, --diarization-rtf and
+--llm-latency; leave them at 0 to measure the pipeline's own overhead.
+
+Reported per scenario: per-stage latency, real-time factor, throughput and
+peak RSS. Results are written as JSON so runs can be compared over time:
+
+    python benchmarks/pipeline_benchmark.py --durations 60 600 --layouts mono split --repeat 3
+    python benchmarks/pipeline_benchmark.py --compare benchmarks/results/pipeline-20250101-120000.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARK_DIR.parent
+APP_DIR = REPO_DIR / "audio_transcriber"
+RESULTS_DIR = BENCHMARK_DIR / "results"
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_scenario(scenario: dict, options: dict) -> dict:
+    """Benchmark one scenario (runs in its own process so peak RSS is its own)."""
+    sys.path[:0] = [str(APP_DIR), str(BENCHMARK_DIR)]
+    import pipeline
+    from job_store import JobStore
+    from stubs import stub_models
+    from synthetic_audio import synthetic_call
+
+    output = io.StringIO() if not options["verbose"] else None
+    with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as tmp, \
+            (contextlib.redirect_stdout(output) if output else contextlib.nullcontext()):
+        tmp = Path(tmp)
+        audio = tmp / "call.wav"
+        started = time.perf_counter()
+        turns = synthetic_call(audio, scenario["duration"], scenario["speakers"], scenario["layout"],
+                               scenario["sample_rate"], seed=options["seed"])
+        generate_seconds = time.perf_counter() - started
+
+        pipeline.transcriber, pipeline.evaluator = stub_models(
+            speakers=scenario["speakers"],
+            asr_rtf=options["asr_rtf"],
+            diarization_rtf=options["diarization_rtf"],
+            llm_latency=options["llm_latency"],
+            llm_tokens_per_second=options["llm_tokens_per_second"],
+        )
+        store = JobStore(tmp / "jobs.db")
+        runs = []
+        try:
+            for i in range(options["warmup"] + options["repeat"]):
+                # Each run gets its own copy: the prepare stage writes next to the upload
+                job_id = str(uuid.uuid4())
+                upload = tmp / f"{job_id}.wav"
+                upload.write_bytes(audio.read_bytes())
+                store.create(job_id, status="processing", file_path=str(upload), filename=audio.name)
+
+                started = time.perf_counter()
+                for stage in pipeline.STAGES:
+                    pipeline.run_stage(store, job_id, stage)
+                    job = store.get(job_id)
+                    if job["status"] == "failed":
+                        raise RuntimeError(f"{stage} failed: {job['message']}")
+                wall = time.perf_counter() - started
+
+                if i < options["warmup"]:
+                    continue
+                timing = store.get_result(job_id)["timing"]
+                runs.append({
+                    "wall_seconds": round(wall, 4),
+                    "stages": timing["stages"],
+                    "real_time_factor": timing["real_time_factor"],
+                    "segment_count": timing["segment_count"],
+                    "llm": timing["llm"],
+                })
+        finally:
+            store.close()
+
+    return {
+        "turns": len(turns),
+        "generate_seconds": round(generate_seconds, 4),
+        "runs": runs,
+        "peak_rss_bytes": _peak_rss_bytes(),
+    }
+
+
+def _summarize(scenario: dict, measured: dict) -> dict:
+    runs = measured["runs"]
+    wall = statistics.median(run["wall_seconds"] for run in runs)
+    stages = {
+        stage: round(statistics.median(run["stages"][stage] or 0 for run in runs), 4)
+        for stage in runs[0]["stages"]
+    }
+    return {
+        "wall_seconds": {
+            "median": round(wall, 4),
+            "min": min(run["wall_seconds"] for run in runs),
+            "max": max(run["wall_seconds"] for run in runs),
+        },
+        "stage_seconds": stages,
+        "real_time_factor": round(wall / scenario["duration"], 4),
+        "audio_seconds_per_second": round(scenario["duration"] / wall, 2) if wall else None,
+        "jobs_per_hour": round(3600 / wall, 1) if wall else None,
+        "segment_count": runs[0]["segment_count"],
+        "llm_calls": runs[0]["llm"]["calls"],
+        "llm_tokens": runs[0]["llm"]["prompt_tokens"] + runs[0]["llm"]["completion_tokens"],
+        "peak_rss_mb": round(measured["peak_rss_bytes"] / 1024 ** 2, 1),
+    }
+
+
+def _scenario_name(scenario: dict) -> str:
+    return (f"{scenario['duration']:g}s-{scenario['speakers']}spk-{scenario['layout']}"
+            f"-{scenario['sample_rate'] // 1000}k")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _print_table(results: list, previous: dict = None):
+    header = f"{'scenario':<28}{'wall (s)':>10}{'RTF':>8}{'x realtime':>12}{'jobs/h':>9}{'RSS MB':>9}"
+    if previous:
+        header += f"{'vs prev':>10}"
+    print(header)
+    for entry in results:
+        summary = entry["summary"]
+        line = (f"{entry['name']:<28}{summary['wall_seconds']['median']:>10.3f}"
+                f"{summary['real_time_factor']:>8.3f}{summary['audio_seconds_per_second'] or 0:>12.1f}"
+                f"{summary['jobs_per_hour'] or 0:>9.0f}{summary['peak_rss_mb']:>9.1f}")
+        before = previous.get(entry["name"]) if previous else None
+        if before:
+            old = before["summary"]["wall_seconds"]["median"]
+            line += f"{(summary['wall_seconds']['median'] - old) / old * 100:>+9.1f}%"
+        print(line)
+        stages = "  ".join(f"{stage} {seconds:.3f}" for stage, seconds in summary["stage_seconds"].items())
+        print(f"    {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the processing pipeline with stub models")
+    parser.add_argument("--durations", type=float, nargs="+", default=[60.0, 300.0],
+                        help="Audio lengths in seconds")
+    parser.add_argument("--speakers", type=int, nargs="+", default=[2])
+    parser.add_argument("--layouts", nargs="+", default=["mono"], choices=["mono", "stereo", "split"])
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs per scenario")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--asr-rtf", type=float, default=0.0,
+                        help="Simulated ASR seconds per second of audio")
+    parser.add_argument("--diarization-rtf", type=float, default=0.0,
+                        help="Simulated diarization seconds per second of audio")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0.0,
+                        help="Simulated LLM generation speed (0 = instant)")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/pipeline-<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output")
+    args = parser.parse_args()
+
+    options = {
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "asr_rtf": args.asr_rtf,
+        "diarization_rtf": args.diarization_rtf,
+        "llm_latency": args.llm_latency,
+        "llm_tokens_per_second": args.llm_tokens_per_second,
+        "verbose": args.verbose,
+    }
+    scenarios = [
+        {"duration": duration, "speakers": speakers, "layout": layout, "sample_rate": args.sample_rate}
+        for duration in args.durations for speakers in args.speakers for layout in args.layouts
+    ]
+
+    results = []
+    ctx = mp.get_context("spawn")
+    for scenario in scenarios:
+        name = _scenario_name(scenario)
+        print(f"Running {name}...", file=sys.stderr)
+        with ctx.Pool(1) as pool:
+            measured = pool.apply(_run_scenario, (scenario, options))
+        results.append({
+            "name": name,
+            "scenario": scenario,
+            "summary": _summarize(scenario, measured),
+            **measured,
+        })
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "options": {key: value for key, value in options.items() if key != "verbose"},
+        },
+        "results": results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"pipeline-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    previous = None
+    if args.compare:
+        previous = {entry["name"]: entry for entry in json.loads(Path(args.compare).read_text())["results"]}
+    _print_table(results, previous)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
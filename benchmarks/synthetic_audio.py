@@ -0,0 +1,120 @@
+"""
+Synthetic multi-speaker call audio for benchmarks and load tests.
+
+Speakers take turns; each turn is a run of voiced "syllables" (a few harmonics
+of the speaker's pitch under a smooth envelope) separated by short pauses, and
+turns are separated by longer pauses, over a faint noise floor. The result is
+written as 16-bit PCM WAV with the standard library `wave` module.
+
+Channel layouts:
+    mono    one channel with every speaker
+    stereo  the same mix on both channels
+    split   speaker i on channel i % 2, like agent/customer call recordings
+
+    python benchmarks/synthetic_audio.py call.wav --duration 300 --speakers 3 --layout split
+"""
+
+import argparse
+import wave
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+LAYOUTS = ("mono", "stereo", "split")
+
+# Fundamental frequency per speaker (Hz), cycled for more speakers
+PITCHES = (110.0, 210.0, 150.0, 260.0)
+
+# Pauses in seconds: within a turn (must stay below the stub diarizer's
+# `turn_gap`) and between turns (must stay above it)
+SYLLABLE_PAUSE = (0.04, 0.15)
+TURN_PAUSE = (0.7, 1.3)
+TURN_LENGTH = (2.0, 9.0)
+
+
+def _syllable(duration: float, pitch: float, sample_rate: int, rng: np.random.Generator) -> np.ndarray:
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    # Slight pitch drift makes it less tonal
+    f0 = pitch * (1 + 0.05 * np.sin(2 * np.pi * rng.uniform(1, 4) * t))
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    tone = sum(np.sin(k * phase) / k for k in (1, 2, 3, 4))
+    return np.hanning(len(t)) * tone * rng.uniform(0.4, 0.8)
+
+
+def synthetic_call(path, duration: float = 60.0, speakers: int = 2, layout: str = "mono",
+                   sample_rate: int = 16000, seed: int = 0) -> List[dict]:
+    """
+    Write a synthetic call and return its ground-truth turns.
+
+    Args:
+        path: Destination WAV file
+        duration: Length in seconds
+        speakers: Number of speakers taking turns (round robin)
+        layout: "mono", "stereo" or "split"
+        sample_rate: Output sample rate (e.g. 8000 for telephony)
+        seed: Random seed, so runs are reproducible
+
+    Returns:
+        List of {"speaker", "start", "end"} dicts
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout '{layout}'. Use one of: {', '.join(LAYOUTS)}")
+    rng = np.random.default_rng(seed)
+    total = int(duration * sample_rate)
+    channels = 1 if layout == "mono" else 2
+    audio = np.zeros((channels, total), dtype=np.float32)
+
+    turns = []
+    position = rng.uniform(*TURN_PAUSE) / 2
+    speaker = 0
+    while position < duration - 0.5:
+        turn_end = min(position + rng.uniform(*TURN_LENGTH), duration - 0.25)
+        start = position
+        pitch = PITCHES[speaker % len(PITCHES)]
+        while position < turn_end:
+            length = rng.uniform(0.12, 0.3)
+            offset = int(position * sample_rate)
+            voice = _syllable(length, pitch, sample_rate, rng)[:total - offset]
+            if layout == "split":
+                audio[speaker % 2, offset:offset + len(voice)] += voice
+            else:
+                audio[:, offset:offset + len(voice)] += voice
+            voiced_end = position + length
+            position = voiced_end + rng.uniform(*SYLLABLE_PAUSE)
+        turns.append({"speaker": f"speaker_{speaker}", "start": round(start, 2),
+                      "end": round(min(voiced_end, duration), 2)})
+        speaker = (speaker + 1) % speakers
+        position += rng.uniform(*TURN_PAUSE)
+
+    audio += rng.normal(0, 0.002, audio.shape).astype(np.float32)
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        # Interleave channels frame by frame
+        f.writeframes(pcm.T.tobytes())
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic multi-speaker call")
+    parser.add_argument("output", help="Destination WAV file")
+    parser.add_argument("--duration", type=float, default=60.0, help="Length in seconds")
+    parser.add_argument("--speakers", type=int, default=2)
+    parser.add_argument("--layout", choices=LAYOUTS, default="mono")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    turns = synthetic_call(args.output, args.duration, args.speakers, args.layout,
+                           args.sample_rate, args.seed)
+    print(f"Wrote {args.output}: {args.duration:.0f}s, {len(turns)} turns, {args.layout}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The app uses flat imports from its own directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "audio_transcriber"))
+
+from job_store import JobStore  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(tmp_path / "jobs.db")
+    yield store
+    store.close()
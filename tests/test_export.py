@@ -0,0 +1,66 @@
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds
+
+import export
+
+
+@pytest.fixture(autouse=True)
+def no_settle_delay(monkeypatch):
+    monkeypatch.setattr(export, "SETTLE_SECONDS", 0.0)
+
+
+def _complete(store, job_id):
+    store.create(job_id, filename=f"{job_id}.wav")
+    store.set_result(job_id, {
+        "filename": f"{job_id}.wav",
+        "transcript": [{"speaker": "S0", "start": 0.0, "end": 1.5, "text": "hello"}],
+        "evaluation": {"evaluations": [{"question_id": "q1", "status": "YES", "decided_by": "llm"}],
+                       "scores": {"overall_score": 100.0, "grade": "A"}},
+    })
+
+
+def _exported_ids(output_dir, table="calls"):
+    dataset = ds.dataset(output_dir / table, format="parquet", partitioning="hive")
+    return sorted(dataset.to_table(columns=["job_id"]).column("job_id").to_pylist())
+
+
+def test_incremental_export_only_writes_new_jobs(store, tmp_path):
+    out = tmp_path / "export"
+    _complete(store, "a")
+    _complete(store, "b")
+    first = export.export_results(store, out, batch_size=1)
+    assert first["jobs"] == 2 and first["rows"]["segments"] == 2
+    state = export.load_state(out)
+    assert (state["watermark"], state["job_id"]) == (first["watermark"], "b")
+
+    nothing = export.export_results(store, out)
+    assert nothing["jobs"] == 0 and nothing["files"] == []
+    assert export.load_state(out)["watermark"] == first["watermark"]
+
+    _complete(store, "c")
+    second = export.export_results(store, out)
+    assert second["jobs"] == 1
+    assert _exported_ids(out) == ["a", "b", "c"]
+    assert len(export.load_state(out)["runs"]) == 3
+
+
+def test_full_export_replaces_earlier_files(store, tmp_path):
+    out = tmp_path / "export"
+    _complete(store, "a")
+    export.export_results(store, out)
+    _complete(store, "b")
+    export.export_results(store, out)
+    full = export.export_results(store, out, full=True)
+    assert full["jobs"] == 2
+    assert _exported_ids(out) == ["a", "b"]
+    assert len(list((out / "calls").glob("day=*/part-*"))) == 1
+
+
+def test_concurrent_export_into_same_directory_is_refused(store, tmp_path):
+    out = tmp_path / "export"
+    lock = export._directory_lock(out)
+    with lock:
+        with pytest.raises(export.ExportInProgress):
+            export.export_results(store, out)
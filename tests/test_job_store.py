@@ -0,0 +1,93 @@
+
+def _evaluation(decided_by="llm"):
+    return {"evaluations": [{"question_id": "q1", "status": "Yes" if decided_by == "llm" else "N/A",
+                             "weight": 1, "decided_by": decided_by}]}
+
+
+def _completed(store, job_id, content_hash="abc", questions_hash="q", decided_by="llm"):
+    store.create(job_id, content_hash=content_hash, pipeline_version="1", questions_hash=questions_hash)
+    store.set_result(job_id, {"job_id": job_id, "evaluation": _evaluation(decided_by)})
+
+
+def test_find_duplicate_prefers_same_questions(store):
+    _completed(store, "old", questions_hash="q")
+    _completed(store, "other", questions_hash="r")
+    store.create("new", content_hash="abc", pipeline_version="1", questions_hash="q")
+    assert store.find_duplicate("new", "abc", "1", "q")["job_id"] == "old"
+    assert store.find_duplicate("new", "abc", "1", "s")["job_id"] == "other"
+
+
+def test_find_duplicate_ignores_other_audio_and_versions(store):
+    _completed(store, "old")
+    assert store.find_duplicate("new", "xyz", "1", "q") is None
+    assert store.find_duplicate("new", "abc", "2", "q") is None
+    assert store.find_duplicate("old", "abc", "1", "q") is None
+
+
+def test_find_duplicate_skips_fallback_evaluations(store):
+    _completed(store, "good")
+    _completed(store, "failed", decided_by="fallback")
+    assert store.find_duplicate("new", "abc", "1", "q")["job_id"] == "good"
+    store.delete("good")
+    assert store.find_duplicate("new", "abc", "1", "q") is None
+
+
+def _enqueued(store, job_id, priority=0, max_queue=10, stage="prepare", **kwargs):
+    store.create(job_id)
+    return store.enqueue(job_id, priority, max_queue, stage=stage, **kwargs)
+
+
+def test_claim_order_is_priority_then_fifo(store):
+    _enqueued(store, "batch-1", priority=2)
+    _enqueued(store, "api-1", priority=0)
+    _enqueued(store, "batch-2", priority=2)
+    _enqueued(store, "api-2", priority=0)
+    assert store.queue_position("api-2") == 1
+    assert store.queue_position("batch-1") == 2
+    order = [store.claim_next("w", stage="prepare")["job_id"] for _ in range(4)]
+    assert order == ["api-1", "api-2", "batch-1", "batch-2"]
+    assert store.claim_next("w", stage="prepare") is None
+
+
+def test_claim_is_per_stage(store):
+    _enqueued(store, "a", stage="prepare")
+    _enqueued(store, "b", stage="evaluate")
+    assert store.claim_next("w", stage="evaluate")["job_id"] == "b"
+    job = store.get("b")
+    assert (job["status"], job["claimed_by"], job["attempts"]) == ("processing", "w", 1)
+    assert job["started_at"] is not None
+
+
+def test_full_queue_rejects_or_defers(store):
+    assert _enqueued(store, "a", max_queue=1) == "queued"
+    assert _enqueued(store, "b", max_queue=1) is None
+    assert _enqueued(store, "c", max_queue=1, defer=True) == "deferred"
+    assert store.promote_deferred(max_queue=1) == 0
+    store.claim_next("w", stage="prepare")
+    assert store.promote_deferred(max_queue=1) == 1
+    assert store.get("c")["status"] == "queued"
+
+
+def test_jobs_between_stages_do_not_count_against_the_queue(store):
+    _enqueued(store, "a", max_queue=1)
+    store.claim_next("w", stage="prepare")
+    store.complete_stage("a", "prepare", {}, "diarize")
+    assert store.get("a")["status"] == "queued"
+    assert _enqueued(store, "b", max_queue=1) == "queued"
+
+
+def test_requeue_claimed_returns_jobs_and_fails_repeat_offenders(store):
+    _enqueued(store, "a")
+    _enqueued(store, "b")
+    store.claim_next("dead", stage="prepare")
+    store.claim_next("alive", stage="prepare")
+    assert store.requeue_claimed(["dead"]) == 1
+    job = store.get("a")
+    assert (job["status"], job["claimed_by"]) == ("queued", None)
+    assert store.get("b")["status"] == "processing"
+
+    assert store.claim_next("dead", stage="prepare")["attempts"] == 2
+    assert store.requeue_claimed(["dead"]) == 1
+    assert store.claim_next("dead", stage="prepare")["attempts"] == 3
+    assert store.requeue_claimed(["dead"]) == 0
+    assert store.get("a")["status"] == "failed"
@@ -0,0 +1,25 @@
+import pipeline
+
+
+def _claimed_job(store, job_id="a"):
+    store.create(job_id, file_path=f"/nonexistent/{job_id}.wav")
+    store.enqueue(job_id, 0, max_queue=10, stage="diarize")
+    return store.claim_next("1-abcdef-diarize-0", stage="diarize")
+
+
+def test_run_stage_hands_job_to_next_queue(store, monkeypatch):
+    monkeypatch.setitem(pipeline.STAGE_RUNNERS, "diarize", lambda store, job: {"segments": []})
+    _claimed_job(store)
+    pipeline.run_stage(store, "a", "diarize")
+    job = store.get("a")
+    assert (job["status"], job["stage"], job["claimed_by"]) == ("queued", "transcribe", None)
+
+
+def test_run_stage_can_hold_claim_between_stages(store, monkeypatch):
+    monkeypatch.setitem(pipeline.STAGE_RUNNERS, "diarize", lambda store, job: {"segments": []})
+    _claimed_job(store)
+    pipeline.run_stage(store, "a", "diarize", hold_claim=True)
+    job = store.get("a")
+    assert (job["status"], job["stage"], job["claimed_by"]) == ("processing", "transcribe", "1-abcdef-diarize-0")
+    # Nobody else can take it while the batch runner still holds it
+    assert store.claim_next("2-fedcba-transcribe-0", stage="transcribe") is None
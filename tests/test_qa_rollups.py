@@ -0,0 +1,83 @@
+ROLLUP_TABLES = ("qa_rollup_day", "qa_rollup_grade", "qa_rollup_question", "qa_rollup_category")
+
+
+def _result(status="YES", decided_by="llm", score=100.0, grade="A"):
+    return {
+        "evaluation": {
+            "evaluations": [
+                {"question_id": "q1", "category": "Opening", "status": status,
+                 "confidence": 0.9, "weight": 1, "decided_by": decided_by},
+                {"question_id": "q2", "category": "Closing", "status": "NO",
+                 "confidence": 0.5, "weight": 1, "decided_by": "rules"},
+            ],
+            "scores": {"overall_score": score, "grade": grade, "average_confidence": 0.7},
+        },
+        "transcript": [{"speaker": "S0", "start": 0.0, "end": 1.0, "text": "thank you for calling"}],
+    }
+
+
+def _rollups(store):
+    """Every rollup row, keyed by table and primary key."""
+    conn = store._connect()
+    rows = {}
+    for table in ROLLUP_TABLES:
+        for row in conn.execute(f"SELECT * FROM {table}"):
+            row = dict(row)
+            key = (table, row.pop("day"), row.pop("grade", None) or row.pop("question_id", None)
+                   or row.pop("category", None))
+            rows[key] = {k: v for k, v in row.items() if isinstance(v, (int, float))}
+    return rows
+
+
+def _all_zero(rows):
+    return all(value == 0 for counts in rows.values() for value in counts.values())
+
+
+def test_reprocessing_replaces_contribution(store):
+    store.create("a")
+    store.set_result("a", _result())
+    once = _rollups(store)
+    store.set_result("a", _result())
+    assert _rollups(store) == once
+
+    store.set_result("a", _result(status="NO", score=50.0, grade="C"))
+    summary = store.qa_analytics()["summary"]
+    assert summary["calls"] == 1
+    assert summary["grade_distribution"]["A"] == 0 and summary["grade_distribution"]["C"] == 1
+
+
+def test_forgetting_a_job_subtracts_everything(store):
+    store.create("a")
+    store.set_result("a", _result())
+    store.create("b")
+    store.set_result("b", _result(status="PARTIAL", score=75.0, grade="B"))
+    store.delete("a", forget_analytics=True)
+    store.delete("b", forget_analytics=True)
+    assert _all_zero(_rollups(store))
+    assert store.qa_analytics()["summary"]["calls"] == 0
+
+
+def test_retention_delete_keeps_history(store):
+    store.create("a")
+    store.set_result("a", _result())
+    store.delete("a")
+    assert store.qa_analytics()["summary"]["calls"] == 1
+
+
+def test_deduplicated_jobs_are_not_counted_again(store):
+    store.create("a")
+    store.set_result("a", _result())
+    counted = _rollups(store)
+    store.create("b")
+    store.set_result("b", _result(), deduplicated_from="a")
+    assert _rollups(store) == counted
+    if store.search_enabled:
+        assert store.search_stats()["calls"] == 1
+    assert store.index_missing() == 0
+
+
+def test_fallback_answers_are_left_out(store):
+    store.create("a")
+    store.set_result("a", _result(status="N/A", decided_by="fallback"))
+    questions = {q["question_id"] for q in store.qa_analytics()["by_question"]}
+    assert questions == {"q2"}
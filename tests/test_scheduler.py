@@ -0,0 +1,70 @@
+import os
+import socket
+import subprocess
+import sys
+
+from scheduler import InstanceRegistration, requeue_orphaned
+
+
+def _processing(store, job_id, claimed_by):
+    store.create(job_id)
+    store.enqueue(job_id, 0, max_queue=10, stage="prepare")
+    store.update(job_id, status="processing", claimed_by=claimed_by)
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_requeues_claims_of_unregistered_instance(store):
+    _processing(store, "a", "123-abcdef-prepare-0")
+    assert requeue_orphaned(store) == 1
+    assert store.get("a")["status"] == "queued"
+
+
+def test_keeps_claims_of_own_live_instance(store):
+    registration = InstanceRegistration(store)
+    registration.start()
+    try:
+        _processing(store, "a", f"{registration.id}-prepare-0")
+        assert requeue_orphaned(store) == 0
+        assert store.get("a")["status"] == "processing"
+    finally:
+        registration.stop()
+
+
+def test_same_pid_restart_is_dead(store):
+    # An earlier incarnation with this pid (container restart) that still looks fresh
+    old = f"{os.getpid()}-0ld000"
+    store.register_instance(old, os.getpid(), socket.gethostname())
+    _processing(store, "a", f"{old}-transcribe-0")
+    assert requeue_orphaned(store) == 1
+
+
+def test_exited_process_is_dead(store):
+    pid = _dead_pid()
+    store.register_instance(f"{pid}-abcdef", pid, socket.gethostname())
+    _processing(store, "a", f"{pid}-abcdef-prepare-0")
+    assert requeue_orphaned(store) == 1
+
+
+def test_silent_instance_is_dead(store):
+    store.register_instance("1-abcdef", 1, "other-host")
+    _processing(store, "a", "1-abcdef-prepare-0")
+    assert requeue_orphaned(store) == 0
+    assert requeue_orphaned(store, timeout=-1) == 1
+
+
+def test_live_instance_on_other_host_is_kept(store):
+    store.register_instance("99-abcdef", 99, "other-host")
+    _processing(store, "a", "99-abcdef-prepare-0")
+    assert requeue_orphaned(store) == 0
+
+
+def test_repeatedly_orphaned_job_fails(store):
+    _processing(store, "a", "123-abcdef-prepare-0")
+    store.update("a", attempts=3)
+    requeue_orphaned(store)
+    assert store.get("a")["status"] == "failed"